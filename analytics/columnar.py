@@ -0,0 +1,181 @@
+import json
+from decimal import Decimal
+
+import numpy as np
+
+from products.models import Product
+from transactions.models import TransactionEvent
+
+BINCOUNT_MAX_GROUPS = 1 << 22
+
+
+# Append-only: the snapshots of a SalesAnalytics share their dictionaries, and each one reads them through a
+# DictionaryView limited to the labels it had when it was published, so a refresh can add codes while requests
+# aggregate the previous snapshot.
+class Dictionary:
+    def __init__(self):
+        self.codes = {}
+        self.labels = []
+
+    def encode(self, values) -> np.ndarray:
+        codes, labels = self.codes, self.labels
+        result = np.empty(len(values), dtype=np.int64)
+        for position, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(labels)
+                labels.append(value)
+            result[position] = code
+        return result
+
+    def view(self) -> 'DictionaryView':
+        return DictionaryView(self, len(self.labels))
+
+
+class DictionaryView:
+    def __init__(self, dictionary: Dictionary, size: int):
+        self.dictionary = dictionary
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def label(self, code: int):
+        return self.dictionary.labels[code]
+
+    def lookup(self, values) -> np.ndarray:
+        codes = self.dictionary.codes
+        return np.array([codes[value] for value in values if codes.get(value, self.size) < self.size], dtype=np.int64)
+
+
+class SalesSnapshot:
+    LINE_COLUMNS = ('transaction', 'product_id', 'quantity', 'cents', 'payment_method', 'client', 'status')
+
+    def __init__(self):
+        self.columns = {name: np.empty(0, dtype=np.int64) for name in self.LINE_COLUMNS}
+        self.live = np.empty(0, dtype=bool)
+        self.dictionaries = {name: Dictionary() for name in ('transaction', 'payment_method', 'client', 'status')}
+        self.views = {name: dictionary.view() for name, dictionary in self.dictionaries.items()}
+        self.last_line_id = 0
+        self.last_event_id = 0
+        self.products = {}
+
+    def copy(self) -> 'SalesSnapshot':
+        snapshot = SalesSnapshot()
+        snapshot.columns = dict(self.columns)
+        snapshot.live = self.live
+        snapshot.dictionaries = self.dictionaries
+        snapshot.views = dict(self.views)
+        snapshot.last_line_id = self.last_line_id
+        snapshot.last_event_id = self.last_event_id
+        return snapshot
+
+    def append(self, rows: list[tuple]) -> None:
+        line_ids, transactions, product_ids, quantities, cents, payment_methods, clients, statuses = zip(*rows)
+        new_columns = {
+            'transaction': self.dictionaries['transaction'].encode(transactions),
+            'product_id': np.fromiter(product_ids, dtype=np.int64, count=len(rows)),
+            'quantity': np.fromiter(quantities, dtype=np.int64, count=len(rows)),
+            'cents': np.fromiter(cents, dtype=np.int64, count=len(rows)),
+            'payment_method': self.dictionaries['payment_method'].encode(payment_methods),
+            'client': self.dictionaries['client'].encode(clients),
+            'status': self.dictionaries['status'].encode(statuses),
+        }
+        self.columns = {name: np.concatenate((self.columns[name], new_columns[name])) for name in self.LINE_COLUMNS}
+        self.live = np.concatenate((self.live, np.ones(len(rows), dtype=bool)))
+        self.last_line_id = max(self.last_line_id, max(line_ids))
+        self.views = {name: dictionary.view() for name, dictionary in self.dictionaries.items()}
+
+    def apply_events(self, events: list[tuple[int, str, object, str]]) -> None:
+        transaction_codes = self.dictionaries['transaction'].codes
+        updated, deleted = {}, []
+        for event_id, event_type, transaction_id, payload in events:
+            code = transaction_codes.get(transaction_id)
+            if code is not None and event_type == TransactionEvent.UPDATED:
+                updated.setdefault(json.loads(payload)['status'], []).append(code)
+            elif code is not None and event_type == TransactionEvent.DELETED:
+                deleted.append(code)
+            self.last_event_id = event_id
+        if updated:
+            status = self.columns['status'].copy()
+            for status_name, codes in updated.items():
+                status[np.isin(self.columns['transaction'], codes)] = self.dictionaries['status'].encode([status_name])[0]
+            self.columns['status'] = status
+            self.views['status'] = self.dictionaries['status'].view()
+        if deleted:
+            self.live = self.live & ~np.isin(self.columns['transaction'], deleted)
+
+    def load_products(self) -> None:
+        rows = list(Product.objects.values_list('id', 'name', 'category', 'subcategory'))
+        size = max([product_id for product_id, *_ in rows] + [int(self.columns['product_id'].max(initial=0))]) + 1
+        exists = np.zeros(size, dtype=bool)
+        self.products = {'exists': exists}
+        for position, name in enumerate(('product', 'category', 'subcategory'), start=1):
+            dictionary = Dictionary()
+            attribute = np.zeros(size, dtype=np.int64)
+            if rows:
+                product_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+                attribute[product_ids] = dictionary.encode([row[position] for row in rows])
+                exists[product_ids] = True
+            self.products[name] = (attribute, dictionary.view())
+
+    def get_dimension(self, dimension: str) -> tuple[np.ndarray, DictionaryView]:
+        if dimension in self.products:
+            attribute, labels = self.products[dimension]
+            return attribute[self.columns['product_id']], labels
+        return self.columns[dimension], self.views[dimension]
+
+
+def aggregate(snapshot: SalesSnapshot, group_by: list[str], filters: dict[str, list[str]], order_by: str,
+              limit: int | None) -> list[dict]:
+    columns, labels = {}, {}
+    for dimension in set(group_by) | set(filters):
+        columns[dimension], labels[dimension] = snapshot.get_dimension(dimension)
+
+    mask = snapshot.live & snapshot.products['exists'][snapshot.columns['product_id']]
+    for dimension, values in filters.items():
+        mask &= np.isin(columns[dimension], labels[dimension].lookup(values))
+
+    cardinalities = [max(len(labels[dimension]), 1) for dimension in group_by]
+    keys = np.zeros(int(mask.sum()), dtype=np.int64)
+    for dimension, cardinality in zip(group_by, cardinalities):
+        keys = keys * cardinality + columns[dimension][mask]
+    if np.prod(cardinalities, dtype=np.float64) <= BINCOUNT_MAX_GROUPS:
+        group_keys, inverse = None, keys
+        groups = int(np.prod(cardinalities, dtype=np.int64))
+    else:
+        group_keys, inverse = np.unique(keys, return_inverse=True)
+        groups = len(group_keys)
+
+    transactions = snapshot.columns['transaction'][mask]
+    pairs = np.sort(inverse * (int(transactions.max(initial=0)) + 1) + transactions)
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+    metrics = {
+        'lines': np.bincount(inverse, minlength=groups),
+        'quantity': np.bincount(inverse, weights=snapshot.columns['quantity'][mask], minlength=groups).astype(np.int64),
+        'total': np.bincount(inverse, weights=snapshot.columns['cents'][mask], minlength=groups).astype(np.int64),
+        'transactions': np.bincount(pairs // (int(transactions.max(initial=0)) + 1), minlength=groups),
+    }
+    present = np.flatnonzero(metrics['lines'])
+    ranking = metrics[order_by][present]
+    if limit is not None and limit < len(present):
+        top = np.argpartition(-ranking, limit - 1)[:limit]
+        present, ranking = present[top], ranking[top]
+    present = present[np.argsort(-ranking, kind='stable')]
+
+    rows = []
+    for group in present:
+        row = {}
+        key = int(group_keys[group]) if group_keys is not None else int(group)
+        for dimension, cardinality in reversed(list(zip(group_by, cardinalities))):
+            key, code = divmod(key, cardinality)
+            row[dimension] = labels[dimension].label(code)
+        row = {dimension: row[dimension] for dimension in group_by}
+        row.update({
+            'lines': int(metrics['lines'][group]),
+            'transactions': int(metrics['transactions'][group]),
+            'quantity': int(metrics['quantity'][group]),
+            'total': Decimal(int(metrics['total'][group])).scaleb(-2),
+        })
+        rows.append(row)
+    return rows
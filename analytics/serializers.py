@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+from analytics.services import SalesAnalytics
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    group_by = serializers.CharField(required=False, allow_blank=True, default='')
+    order_by = serializers.ChoiceField(choices=SalesAnalytics.METRICS, default='total')
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_group_by(self, value):
+        group_by = [dimension.strip() for dimension in value.split(',') if dimension.strip()]
+        for dimension in group_by:
+            if dimension not in SalesAnalytics.DIMENSIONS:
+                raise serializers.ValidationError(f"Dimension {dimension} is not supported, use one of "
+                                                  f"{', '.join(SalesAnalytics.DIMENSIONS)}")
+        if len(set(group_by)) != len(group_by):
+            raise serializers.ValidationError("Dimensions can not be repeated")
+        return group_by
+
+class AnalyticsRowSerializer(serializers.Serializer):
+    product = serializers.CharField(required=False)
+    category = serializers.CharField(required=False)
+    subcategory = serializers.CharField(required=False)
+    payment_method = serializers.CharField(required=False)
+    client = serializers.CharField(required=False)
+    status = serializers.CharField(required=False)
+    lines = serializers.IntegerField()
+    transactions = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=16, decimal_places=2)
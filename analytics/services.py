@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F, IntegerField, CharField
+from django.db.models.functions import Cast, Round
+
+from transactions.models import ProductPerTransaction, ArchivedProductPerTransaction, TransactionEvent
+
+
+class SalesAnalytics:
+    PRODUCT_DIMENSIONS = ('product', 'category', 'subcategory')
+    TRANSACTION_DIMENSIONS = ('payment_method', 'client', 'status')
+    DIMENSIONS = PRODUCT_DIMENSIONS + TRANSACTION_DIMENSIONS
+    METRICS = ('total', 'quantity', 'lines', 'transactions')
+    LINE_FIELDS = ('id', 'transaction_key', 'product_id', 'quantity', 'cents', 'transaction__payment_method',
+                   'transaction__client_id', 'transaction__status')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.built_at = 0.0
+        self.refreshed_at = 0.0
+
+    # A single thread refreshes at a time; the others keep answering from the current snapshot instead of waiting.
+    # Only the first build and forced refreshes block.
+    def refresh(self, force: bool = False):
+        snapshot = self.snapshot
+        if not force and snapshot and time.monotonic() - self.refreshed_at < settings.ANALYTICS_REFRESH_INTERVAL:
+            return snapshot
+        if not self.lock.acquire(blocking=force or snapshot is None):
+            return snapshot
+        try:
+            now = time.monotonic()
+            if not force and self.snapshot and now - self.refreshed_at < settings.ANALYTICS_REFRESH_INTERVAL:
+                return self.snapshot
+            if force or not self.snapshot or now - self.built_at >= settings.ANALYTICS_REBUILD_INTERVAL or self.has_event_gap():
+                snapshot = self.build()
+                self.built_at = now
+            else:
+                snapshot = self.snapshot.copy()
+                self.load_lines(snapshot, ProductPerTransaction, snapshot.last_line_id)
+                snapshot.apply_events(list(TransactionEvent.objects.filter(id__gt=snapshot.last_event_id).order_by('id')
+                                           .annotate(transaction_key=Cast('transaction_id', output_field=CharField()))
+                                           .values_list('id', 'event_type', 'transaction_key', 'payload')))
+            snapshot.load_products()
+            self.snapshot, self.refreshed_at = snapshot, now
+            return snapshot
+        finally:
+            self.lock.release()
+
+    def build(self):
+        from analytics.columnar import SalesSnapshot
+
+        snapshot = SalesSnapshot()
+        snapshot.last_event_id = TransactionEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.load_lines(snapshot, ArchivedProductPerTransaction, 0)
+        self.load_lines(snapshot, ProductPerTransaction, 0)
+        return snapshot
+
+    def has_event_gap(self) -> bool:
+        first_event_id = TransactionEvent.objects.order_by('id').values_list('id', flat=True).first()
+        return first_event_id is not None and first_event_id > self.snapshot.last_event_id + 1
+
+    def load_lines(self, snapshot, model, after_id: int) -> None:
+        queryset = (model.objects.filter(id__gt=after_id).order_by('id')
+                    .annotate(transaction_key=Cast('transaction_id', output_field=CharField()),
+                              cents=Cast(Round(F('total') * 100), output_field=IntegerField()))
+                    .values_list(*self.LINE_FIELDS))
+        rows = []
+        for row in queryset.iterator(chunk_size=settings.ANALYTICS_LOAD_BATCH_SIZE):
+            rows.append(row)
+            if len(rows) == settings.ANALYTICS_LOAD_BATCH_SIZE:
+                snapshot.append(rows)
+                rows = []
+        if rows:
+            snapshot.append(rows)
+
+    def query(self, group_by: list[str], filters: dict[str, list[str]] | None = None, order_by: str = 'total',
+              limit: int | None = None) -> list[dict]:
+        from analytics.columnar import aggregate
+
+        return aggregate(self.refresh(), group_by, filters or {}, order_by, limit)
+
+
+sales_analytics = SalesAnalytics()
@@ -0,0 +1,112 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
+from rest_framework import status
+
+import clients.models
+from analytics.columnar import aggregate
+from analytics.services import sales_analytics
+from products.models import Product
+from transactions.models import Transaction, ProductPerTransaction, ArchivedProductPerTransaction
+
+
+# Create your tests here.
+
+@override_settings(ANALYTICS_REFRESH_INTERVAL=0)
+class AnalyticsTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.client = Client(headers={"authorization": token})
+        self.products = [Product.objects.create(name=f"Producto {number}", category=("Hogar", "Ropa")[number % 2],
+                                                subcategory="Test", price=Decimal("1000.50") * (number + 1), quantity=100)
+                         for number in range(4)]
+        for document in ("a", "b", "c"):
+            clients.models.Client.objects.create(document=document, name=document, last_name=document,
+                                                 email=f"{document}@example.com")
+        for number in range(12):
+            transaction = Transaction.objects.create(client_id="abc"[number % 3], payment_method=("cash", "card")[number % 2],
+                                                     status=("PAGADO", "PAGADO", "PENDIENTE")[number % 3], total=0,
+                                                     created_at=timezone.now() - timedelta(days=400 * (number % 2)))
+            for product in self.products[number % 4:]:
+                ProductPerTransaction.objects.create(transaction=transaction, product=product, quantity=number % 3 + 1,
+                                                     total=product.price * (number % 3 + 1))
+        sales_analytics.refresh(force=True)
+
+    def expected(self, *fields, **filters) -> list[dict]:
+        names = {'product__name': 'product', 'product__category': 'category', 'transaction__payment_method': 'payment_method',
+                 'transaction__client': 'client', 'transaction__status': 'status'}
+        rows = (ProductPerTransaction.objects.filter(**filters).values(*fields)
+                .annotate(lines=Count('id'), transactions=Count('transaction', distinct=True), quantity=Sum('quantity'),
+                          total=Sum('total')).order_by('-total'))
+        return [{**{names[field]: row[field] for field in fields}, 'lines': row['lines'], 'transactions': row['transactions'],
+                 'quantity': row['quantity'], 'total': float(row['total'])} for row in rows]
+
+    def test_group_by_matches_sql_aggregation(self):
+        response = self.client.get("/api/analytics/?group_by=category,payment_method")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(response.json(), self.expected('product__category', 'transaction__payment_method'))
+        totals = [row['total'] for row in response.json()]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+        response = self.client.get("/api/analytics/?group_by=product&status=PAGADO&client=a,b&order_by=lines&limit=2")
+        expected = sorted(self.expected('product__name', transaction__status="PAGADO", transaction__client__in=["a", "b"]),
+                          key=lambda row: -row['lines'])
+        self.assertEqual([row['lines'] for row in response.json()], [row['lines'] for row in expected[:2]])
+        self.assertTrue(all(row['product'] in {product.name for product in self.products} for row in response.json()))
+
+        totals = ProductPerTransaction.objects.aggregate(lines=Count('id'), transactions=Count('transaction', distinct=True),
+                                                         quantity=Sum('quantity'), total=Sum('total'))
+        self.assertEqual(self.client.get("/api/analytics/").json(), [{**totals, 'total': float(totals['total'])}])
+
+    def test_snapshot_is_refreshed_incrementally(self):
+        built_at = sales_analytics.built_at
+        transaction = Transaction.objects.create(client_id="a", payment_method="transfer", status="PENDIENTE", total=0)
+        ProductPerTransaction.objects.create(transaction=transaction, product=self.products[0], quantity=5, total=5000)
+        self.client.post("/api/transactions/bulk-status/", {"filter": {"status": "PENDIENTE"}, "status": "ANULADO"},
+                         content_type="application/json")
+        self.client.delete(f"/api/transactions/{Transaction.objects.filter(client_id='b').first().id}/")
+        Product.objects.filter(id=self.products[0].id).update(category="Oficina")
+
+        response = self.client.get("/api/analytics/?group_by=category,status,payment_method")
+        self.assertEqual(sales_analytics.built_at, built_at)
+        self.assertCountEqual(response.json(), self.expected('product__category', 'transaction__status',
+                                                             'transaction__payment_method'))
+
+    def test_refresh_keeps_the_labels_of_the_published_snapshot(self):
+        snapshot = sales_analytics.snapshot
+        before = aggregate(snapshot, ['payment_method', 'client'], {}, 'total', None)
+        transaction = Transaction.objects.create(client_id="a", payment_method="transfer", status="PENDIENTE", total=0)
+        ProductPerTransaction.objects.create(transaction=transaction, product=self.products[0], quantity=5, total=5000)
+
+        refreshed = sales_analytics.refresh()
+        self.assertIs(refreshed.dictionaries, snapshot.dictionaries)
+        self.assertEqual(len(refreshed.get_dimension('payment_method')[1]), 3)
+        self.assertEqual(len(snapshot.get_dimension('payment_method')[1]), 2)
+        self.assertEqual(len(snapshot.get_dimension('payment_method')[1].lookup(["transfer"])), 0)
+        self.assertEqual(aggregate(snapshot, ['payment_method', 'client'], {}, 'total', None), before)
+
+    def test_archived_lines_are_included(self):
+        before = self.client.get("/api/analytics/?group_by=category,client").json()
+        call_command("archive_transactions", days=365, stdout=io.StringIO())
+        self.assertTrue(ArchivedProductPerTransaction.objects.exists())
+
+        self.assertEqual(self.client.get("/api/analytics/?group_by=category,client").json(), before)
+        sales_analytics.refresh(force=True)
+        self.assertEqual(self.client.get("/api/analytics/?group_by=category,client").json(), before)
+
+    def test_requests_use_the_current_snapshot_while_another_thread_refreshes(self):
+        snapshot = sales_analytics.snapshot
+        with sales_analytics.lock:
+            self.assertIs(sales_analytics.refresh(), snapshot)
+        self.assertIsNot(sales_analytics.refresh(), snapshot)
+
+    def test_invalid_query_is_rejected(self):
+        for query in ("group_by=price", "group_by=status,status", "order_by=price", "limit=0"):
+            self.assertEqual(self.client.get(f"/api/analytics/?{query}").status_code, status.HTTP_400_BAD_REQUEST)
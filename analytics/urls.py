@@ -0,0 +1,8 @@
+from rest_framework.routers import DefaultRouter
+
+from analytics.views import AnalyticsView
+
+router = DefaultRouter()
+router.register(r'analytics', AnalyticsView, basename='analytics')
+
+urlpatterns = router.urls
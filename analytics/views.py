@@ -0,0 +1,42 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+
+from analytics.serializers import AnalyticsQuerySerializer, AnalyticsRowSerializer
+from analytics.services import SalesAnalytics, sales_analytics
+from commons.authentication import JWTAuthentication
+from commons.permissions import Permissions, HasActionPermission
+import logging
+
+# Create your views here.
+
+class AnalyticsView(viewsets.ViewSet):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [HasActionPermission]
+    action_permissions = {
+        'list': (Permissions.VIEW_TRANSACTION,),
+    }
+
+    header_param = openapi.Parameter('authorization', openapi.IN_HEADER, description="authorization token header param",
+                                     type=openapi.IN_HEADER)
+    query_params = [
+        openapi.Parameter('group_by', openapi.IN_QUERY, description="comma separated dimensions: " +
+                          ", ".join(SalesAnalytics.DIMENSIONS), type=openapi.TYPE_STRING),
+        openapi.Parameter('order_by', openapi.IN_QUERY, description="metric to sort by, descending",
+                          type=openapi.TYPE_STRING, enum=list(SalesAnalytics.METRICS)),
+        openapi.Parameter('limit', openapi.IN_QUERY, description="top N groups", type=openapi.TYPE_INTEGER),
+    ] + [openapi.Parameter(dimension, openapi.IN_QUERY, description=f"comma separated {dimension} values to filter by",
+                           type=openapi.TYPE_STRING) for dimension in SalesAnalytics.DIMENSIONS]
+
+    @swagger_auto_schema(responses={200: AnalyticsRowSerializer(many=True)}, manual_parameters=[header_param, *query_params])
+    def list(self, request):
+        logging.info("Calling analytics service with user %s", request.user.username)
+        query_serializer = AnalyticsQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        filters = {dimension: request.query_params[dimension].split(',') for dimension in SalesAnalytics.DIMENSIONS
+                   if dimension in request.query_params}
+        rows = sales_analytics.query(query_serializer.validated_data['group_by'], filters,
+                                     query_serializer.validated_data['order_by'], query_serializer.validated_data.get('limit'))
+        logging.info("Analytics service called successfully with user %s", request.user.username)
+        return Response(rows, status=status.HTTP_200_OK)
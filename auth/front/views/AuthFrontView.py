@@ -1,22 +1,24 @@
+from django.contrib.auth import authenticate
 from django.shortcuts import redirect
 from rest_framework.renderers import TemplateHTMLRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-import requests
+
+from auth.serializers import UserRequestSerializer
+from auth.services import AuthService
 
 class AuthFrontView(ViewSet):
     renderer_classes = [TemplateHTMLRenderer]
+    auth_service = AuthService()
 
     def list(self, request):
         return Response(template_name='auth/front/templates/login.html')
 
     def create(self, request):
-        response = requests.post(request.build_absolute_uri('/api/auth/login/'), {
-            'username': request.data['username'],
-            'password': request.data['password']
-        })
-        if response.status_code != 200:
+        user_request_credentials = UserRequestSerializer(data=request.data)
+        user = authenticate(**user_request_credentials.validated_data) if user_request_credentials.is_valid() else None
+        if not user:
             return Response({
-                'errors': response.json()["message"],
+                'errors': "Username or password incorrect",
             }, template_name='auth/front/templates/login.html')
-        return redirect(f"/api/front/products/?token={response.json()['token']}")
\ No newline at end of file
+        return redirect(f"/api/front/products/?token={self.auth_service.issue_tokens(user)['token']}")
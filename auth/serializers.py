@@ -3,4 +3,7 @@ from rest_framework import serializers
 
 class UserRequestSerializer(serializers.Serializer):
     username = serializers.CharField()
-    password = serializers.CharField()
\ No newline at end of file
+    password = serializers.CharField()
+
+class RefreshRequestSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
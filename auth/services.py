@@ -0,0 +1,80 @@
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from commons.jwt_utils import JWTUtils
+from commons.permissions import Permissions
+
+
+class AuthService:
+    @staticmethod
+    def group_permissions_cache_key(user_id: int) -> str:
+        return f"auth:group_permissions:{user_id}"
+
+    def get_permissions_mask(self, user: User) -> int:
+        cache_key = self.group_permissions_cache_key(user.pk)
+        permissions_mask = cache.get(cache_key)
+        if permissions_mask is None:
+            permissions_mask = Permissions.to_mask(user.get_group_permissions())
+            cache.set(cache_key, permissions_mask, settings.GROUP_PERMISSIONS_CACHE_TIMEOUT)
+        return permissions_mask
+
+    def issue_tokens(self, user: User) -> dict[str, str]:
+        return {
+            "token": JWTUtils.encode_access_token(user.get_username(), self.get_permissions_mask(user)),
+            "refresh": JWTUtils.encode_refresh_token(user.get_username()),
+        }
+
+    def refresh_access_token(self, refresh_token: str) -> str | None:
+        try:
+            claims = JWTUtils.decode(refresh_token)
+        except jwt.InvalidTokenError:
+            return None
+        if claims.get('type') != JWTUtils.REFRESH_TOKEN:
+            return None
+
+        user = User.objects.filter(username=claims['user'], is_active=True).first()
+        if user is None:
+            return None
+        return JWTUtils.encode_access_token(user.get_username(), self.get_permissions_mask(user))
+
+    @staticmethod
+    def invalidate_group_permissions(user_ids) -> None:
+        cache.delete_many([AuthService.group_permissions_cache_key(user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_group_permissions(sender, instance, **kwargs):
+    AuthService.invalidate_group_permissions([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        AuthService.invalidate_group_permissions([instance.pk])
+    elif pk_set is not None:
+        AuthService.invalidate_group_permissions(pk_set)
+    else:
+        AuthService.invalidate_group_permissions(User.objects.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        user_ids = User.objects.values_list('pk', flat=True)
+    else:
+        user_ids = instance.user_set.values_list('pk', flat=True)
+    AuthService.invalidate_group_permissions(user_ids)
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_group_deleted(sender, instance, **kwargs):
+    AuthService.invalidate_group_permissions(User.objects.values_list('pk', flat=True))
@@ -1,3 +1,95 @@
-from django.test import TestCase
+from django.contrib.auth.models import User, Group, Permission
+from django.test import TestCase, Client
+from rest_framework import status
+
+from commons.authentication import token_cache
+from commons.jwt_utils import JWTUtils
+from commons.permissions import Permissions
+
 
 # Create your tests here.
+
+class AuthTestCase(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        User.objects.create_user('viewer', 'viewer@gmail.com', 'viewerpass')
+        self.client = Client()
+
+    def test_login_successfully(self):
+        response = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["message"], "Login successful")
+
+    def test_login_with_wrong_password(self):
+        response = self.client.post("/api/auth/login/", {"username": "test", "password": "wrong"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_request_without_token_is_unauthorized(self):
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_request_with_invalid_token_is_unauthorized(self):
+        response = Client(headers={"authorization": "not-a-token"}).get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertDictEqual(response.json(), {"message": "Invalid or expired token."})
+
+    def test_request_without_permission_is_forbidden(self):
+        token = self.client.post("/api/auth/login/", {"username": "viewer", "password": "viewerpass"}).json()["token"]
+        response = Client(headers={"authorization": token}).get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertDictEqual(response.json(), {"message": "You don't have permissions to perform this action."})
+
+    def test_verified_token_is_cached(self):
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        client = Client(headers={"authorization": token})
+        self.assertEqual(client.get("/api/products/").status_code, status.HTTP_200_OK)
+        self.assertEqual(len(token_cache.entries), 1)
+        self.assertEqual(client.get("/api/clients/").status_code, status.HTTP_200_OK)
+        self.assertEqual(len(token_cache.entries), 1)
+
+    def test_expired_token_is_unauthorized(self):
+        token = JWTUtils.encode({"user": "test", "perms": Permissions.to_mask(Permissions.ALL), "type": "access", "exp": 1})
+        response = Client(headers={"authorization": token}).get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_without_expiration_type_or_mask_is_unauthorized(self):
+        claims = {"user": "test", "perms": Permissions.to_mask(Permissions.ALL), "type": "access", "exp": 2 ** 40}
+        for missing in ("perms", "type", "exp"):
+            token = JWTUtils.encode({name: value for name, value in claims.items() if name != missing})
+            self.assertEqual(Client(headers={"authorization": token}).get("/api/products/").status_code,
+                             status.HTTP_401_UNAUTHORIZED)
+        legacy_token = JWTUtils.encode({"user": "test", "permissions": ["products.view_product"]})
+        self.assertEqual(Client(headers={"authorization": legacy_token}).get("/api/products/").status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(len(token_cache.entries), 0)
+
+    def test_access_token_carries_permission_mask(self):
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        claims = JWTUtils.decode(token)
+        self.assertEqual(Permissions.from_mask(claims["perms"]), frozenset(Permissions.ALL))
+        self.assertNotIn("permissions", claims)
+        self.assertIn("exp", claims)
+
+    def test_refresh_token_mints_access_token(self):
+        refresh = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["refresh"]
+        response = self.client.post("/api/auth/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Client(headers={"authorization": response.json()["token"]}).get("/api/products/").status_code,
+                         status.HTTP_200_OK)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        tokens = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()
+        self.assertEqual(Client(headers={"authorization": tokens["refresh"]}).get("/api/products/").status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post("/api/auth/refresh/", {"refresh": tokens["token"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_group_permissions_cache_is_invalidated_on_group_change(self):
+        refresh = self.client.post("/api/auth/login/", {"username": "viewer", "password": "viewerpass"}).json()["refresh"]
+        group = Group.objects.create(name="sellers")
+        group.permissions.add(Permission.objects.get(codename="view_product"))
+        User.objects.get(username="viewer").groups.add(group)
+
+        token = self.client.post("/api/auth/refresh/", {"refresh": refresh}).json()["token"]
+        self.assertEqual(Permissions.from_mask(JWTUtils.decode(token)["perms"]), frozenset([Permissions.VIEW_PRODUCT]))
@@ -6,17 +6,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
-from auth.serializers import UserRequestSerializer
-from commons.jwt_utils import JWTUtils
+from auth.serializers import UserRequestSerializer, RefreshRequestSerializer
+from auth.services import AuthService
+import logging
 
 
 # Create your views here.
 
 class AuthView(ViewSet):
-
+    auth_service = AuthService()
 
     @swagger_auto_schema(request_body=UserRequestSerializer, responses={200: "{'message': 'Login successful',"
-                                         "'token': 'IDTOKEN'}",
+                                         "'token': 'IDTOKEN', 'refresh': 'REFRESHTOKEN'}",
                                     401: "{'message': 'Username or password incorrect'}"})
     @action(detail=False, methods=['POST'], url_path='login')
     def login(self,request):
@@ -24,17 +25,30 @@ class AuthView(ViewSet):
         if user_request_credentials.is_valid():
             user: User = authenticate(**user_request_credentials.validated_data)
             if user:
-                print(f"auth: {user.get_username()} {user.get_group_permissions()}")
-                token_body_info = {
-                    "user": user.get_username(),
-                    "permissions": [permission for permission in user.get_group_permissions()]
-                }
-                token = JWTUtils.encode(token_body_info)
+                logging.info("Login successful with user %s", user.get_username())
                 return Response({
                     "message": "Login successful",
-                    "token": token
+                    **self.auth_service.issue_tokens(user)
                 },status=status.HTTP_200_OK)
 
         return Response({
             "message": "Username or password incorrect",
-        }, status=status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    @swagger_auto_schema(request_body=RefreshRequestSerializer, responses={200: "{'message': 'Token refreshed',"
+                                         "'token': 'IDTOKEN'}",
+                                    401: "{'message': 'Invalid or expired refresh token'}"})
+    @action(detail=False, methods=['POST'], url_path='refresh')
+    def refresh(self, request):
+        refresh_request = RefreshRequestSerializer(data=request.data)
+        if refresh_request.is_valid():
+            token = self.auth_service.refresh_access_token(refresh_request.validated_data['refresh'])
+            if token:
+                return Response({
+                    "message": "Token refreshed",
+                    "token": token
+                }, status=status.HTTP_200_OK)
+
+        return Response({
+            "message": "Invalid or expired refresh token",
+        }, status=status.HTTP_401_UNAUTHORIZED)
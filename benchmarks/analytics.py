@@ -0,0 +1,106 @@
+"""
+Benchmark of the columnar sales analytics engine against SQL GROUP BY.
+
+Creates a fresh SQLite database seeded with ``--transactions`` sales, builds the
+analytics snapshot, appends ``--new-transactions`` sales and refreshes it
+incrementally, and then runs a set of breakdowns both through the snapshot and as
+the equivalent ``GROUP BY`` over ``ProductPerTransaction`` joined with
+``Product`` and ``Transaction``. It prints, as JSON, the build and refresh
+times and the p50 of every query in both engines::
+
+    python -m benchmarks.analytics --transactions 500000 --iterations 10
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+
+QUERIES = (
+    (("category",), {}),
+    (("category", "payment_method"), {}),
+    (("subcategory", "status"), {"payment_method": ["card"]}),
+    (("client",), {"status": ["PAGADO"]}),
+    (("product",), {}),
+)
+SQL_FIELDS = {
+    "product": "product__name",
+    "category": "product__category",
+    "subcategory": "product__subcategory",
+    "payment_method": "transaction__payment_method",
+    "client": "transaction__client_id",
+    "status": "transaction__status",
+}
+
+
+def timed(function, iterations: int) -> float:
+    durations = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - started_at)
+    return round(statistics.median(durations) * 1000, 2)
+
+
+def sql_query(group_by: tuple[str, ...], filters: dict[str, list[str]], limit: int) -> list[dict]:
+    from django.db.models import Count, Sum
+    from transactions.models import ProductPerTransaction
+
+    queryset = ProductPerTransaction.objects.filter(**{f"{SQL_FIELDS[dimension]}__in": values
+                                                      for dimension, values in filters.items()})
+    return list(queryset.values(*(SQL_FIELDS[dimension] for dimension in group_by))
+                .annotate(lines=Count("id"), transactions=Count("transaction", distinct=True),
+                          quantity=Sum("quantity"), total=Sum("total")).order_by("-total")[:limit])
+
+
+def run(transactions: int, new_transactions: int, iterations: int, limit: int) -> dict:
+    from django.core.management import call_command
+    from analytics.services import sales_analytics
+
+    call_command("migrate", verbosity=0)
+    call_command("seed_scale_data", transactions=transactions, clients=transactions // 10, stdout=io.StringIO())
+    started_at = time.perf_counter()
+    snapshot = sales_analytics.refresh(force=True)
+    build_ms = round((time.perf_counter() - started_at) * 1000, 2)
+    lines = len(snapshot.live)
+
+    call_command("seed_scale_data", transactions=new_transactions, products=10, clients=100, seed=7, stdout=io.StringIO())
+    sales_analytics.refreshed_at = 0.0
+    started_at = time.perf_counter()
+    snapshot = sales_analytics.refresh()
+    refresh_ms = round((time.perf_counter() - started_at) * 1000, 2)
+
+    queries = []
+    for group_by, filters in QUERIES:
+        queries.append({
+            "group_by": ",".join(group_by),
+            "filters": filters,
+            "columnar_ms": timed(lambda: sales_analytics.query(list(group_by), filters, "total", limit), iterations),
+            "sql_ms": timed(lambda: sql_query(group_by, filters, limit), iterations),
+        })
+    return {"lines": lines, "appended_lines": len(snapshot.live) - lines, "build_ms": build_ms,
+            "incremental_refresh_ms": refresh_ms, "queries": queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=200000)
+    parser.add_argument("--new-transactions", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["SQLITE_PATH"] = os.path.join(directory, "analytics.sqlite3")
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sales_system.settings")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        os.environ["ANALYTICS_REFRESH_INTERVAL"] = "3600"
+        import django
+        django.setup()
+        print(json.dumps(run(args.transactions, args.new_transactions, args.iterations, args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+In-process benchmark of every API endpoint against seeded datasets.
+
+For each dataset size the script creates a fresh SQLite database, migrates it,
+seeds it with the ``seed_scale_data`` command, and then drives the endpoints through
+Django's test client: login, product and client CRUD, transaction create, list
+and retrieve, and the JSON and PDF sales reports. It prints throughput, latency
+percentiles and query counts per endpoint and compares them with the baseline
+committed in ``benchmarks/baselines/endpoints-<size>.json``. More queries or
+errors than the baseline fail the run; a p95 latency more than ``--tolerance``
+over the baseline is only reported as a warning, since it depends on the
+machine. A size without a committed baseline also fails::
+
+    python -m benchmarks.endpoints --sizes small medium --iterations 30
+    python -m benchmarks.endpoints --sizes small --update-baselines
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.http_load import percentile
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+SIZES = {
+    "small": {"products": 100, "clients": 500, "transactions": 2000},
+    "medium": {"products": 1000, "clients": 5000, "transactions": 20000},
+    "large": {"products": 5000, "clients": 50000, "transactions": 200000},
+}
+PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+
+def setup_django(database_path: str):
+    os.environ["SQLITE_PATH"] = database_path
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sales_system.settings")
+    os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    import django
+    django.setup()
+    from django.test.utils import override_settings
+    override_settings(ALLOWED_HOSTS=["*"], EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend").enable()
+
+
+def build_scenarios(client, context: dict) -> list[tuple]:
+    from clients.models import Client
+    from products.models import Product
+    from transactions.models import Transaction
+
+    product_request = {"name": "Benchmark", "category": "Benchmark", "subcategory": "Benchmark", "price": "1000.00",
+                       "quantity": 10}
+    counter = iter(range(10 ** 9))
+
+    def client_request():
+        number = next(counter)
+        return {"document": f"bench{number}", "name": "Benchmark", "last_name": "Benchmark",
+                "email": f"bench{number}@example.com"}
+
+    def new_product():
+        return Product.objects.create(**product_request).id
+
+    def new_client():
+        return Client.objects.create(**client_request()).document
+
+    product_id = Product.objects.order_by("id").values_list("id", flat=True).first()
+    client_document = Client.objects.order_by("document").values_list("document", flat=True).first()
+    transaction_id = Transaction.objects.order_by("id").values_list("id", flat=True).first()
+    transaction_request = {"client": client_document, "products": [{"product": product_id, "quantity": 1}],
+                           "payment_method": "cash", "status": "PAGADO"}
+    json_request = {"content_type": "application/json"}
+
+    return [
+        ("login", None, lambda _: context["anonymous"].post("/api/auth/login/", context["credentials"])),
+        ("products.list", None, lambda _: client.get("/api/products/")),
+        ("products.retrieve", None, lambda _: client.get(f"/api/products/{product_id}/")),
+        ("products.create", None, lambda _: client.post("/api/products/", product_request, **json_request)),
+        ("products.update", new_product, lambda pk: client.put(f"/api/products/{pk}/", product_request, **json_request)),
+        ("products.delete", new_product, lambda pk: client.delete(f"/api/products/{pk}/")),
+        ("clients.list", None, lambda _: client.get("/api/clients/")),
+        ("clients.retrieve", None, lambda _: client.get(f"/api/clients/{client_document}/")),
+        ("clients.create", None, lambda _: client.post("/api/clients/", client_request(), **json_request)),
+        ("clients.update", new_client, lambda pk: client.put(f"/api/clients/{pk}/", {**client_request(), "document": pk},
+                                                             **json_request)),
+        ("clients.delete", new_client, lambda pk: client.delete(f"/api/clients/{pk}/")),
+        ("transactions.list", None, lambda _: client.get("/api/transactions/")),
+        ("transactions.retrieve", None, lambda _: client.get(f"/api/transactions/{transaction_id}/")),
+        ("transactions.report_json", None, lambda _: client.get("/api/transactions/json/report/")),
+        ("transactions.report_pdf", None, lambda _: client.get("/api/transactions/pdf/report/")),
+        ("transactions.create", None, lambda _: client.post("/api/transactions/", transaction_request, **json_request)),
+    ]
+
+
+def run_scenario(prepare, call, iterations: int) -> dict:
+    from django.db import connection
+
+    from commons.metrics import QueryTimer
+
+    # Collect and freeze what the earlier scenarios left behind, so a full collection of it (30-120 ms) does not land
+    # in whichever scenario happens to cross the threshold.
+    gc.collect()
+    gc.freeze()
+    try:
+        latencies, queries, errors = [], [], 0
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            argument = prepare() if prepare else None
+            timer = QueryTimer()
+            request_started_at = time.perf_counter()
+            with connection.execute_wrapper(timer):
+                response = call(argument)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            latencies.append(time.perf_counter() - request_started_at)
+            queries.append(timer.count)
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started_at
+    finally:
+        gc.unfreeze()
+    latencies.sort()
+    return {
+        "requests_per_s": round(iterations / elapsed, 1),
+        "latency_ms": {name: round(percentile(latencies, fraction) * 1000, 2) for name, fraction in PERCENTILES},
+        "queries": max(queries),
+        "errors": errors,
+    }
+
+
+def run_size(size: str, iterations: int) -> dict:
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.test import Client
+
+    call_command("migrate", verbosity=0)
+    started_at = time.perf_counter()
+    call_command("seed_scale_data", stdout=io.StringIO(), **SIZES[size])
+    seeded_in = time.perf_counter() - started_at
+    User.objects.create_superuser("benchmark", "benchmark@example.com", "benchmark")
+    credentials = {"username": "benchmark", "password": "benchmark"}
+    anonymous = Client()
+    client = Client(headers={"authorization": anonymous.post("/api/auth/login/", credentials).json()["token"]})
+    context = {"anonymous": anonymous, "credentials": credentials}
+    results = {name: run_scenario(prepare, call, iterations) for name, prepare, call in build_scenarios(client, context)}
+    return {"size": size, "counts": SIZES[size], "seed_seconds": round(seeded_in, 1), "iterations": iterations,
+            "endpoints": results}
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> tuple[list[str], list[str]]:
+    regressions, warnings = [], []
+    same_iterations = result["iterations"] == baseline["iterations"]
+    if not same_iterations:
+        warnings.append(f"{result['size']}: latencies not compared, the baseline used {baseline['iterations']} "
+                        f"iterations and this run {result['iterations']}")
+    for name, current in result["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{result['size']} {name}: queries {previous['queries']} -> {current['queries']}")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{result['size']} {name}: errors {previous['errors']} -> {current['errors']}")
+        if same_iterations and current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + tolerance):
+            warnings.append(f"{result['size']} {name}: p95 {previous['latency_ms']['p95']} ms -> "
+                            f"{current['latency_ms']['p95']} ms")
+    return regressions, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["small"])
+    parser.add_argument("--iterations", type=int, default=30, help="requests per endpoint")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p95 slowdown over the baseline that is warned about")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    if len(args.sizes) > 1:
+        for size in args.sizes:
+            command = [sys.executable, "-m", "benchmarks.endpoints", "--sizes", size, "--iterations", str(args.iterations),
+                       "--tolerance", str(args.tolerance)] + (["--update-baselines"] if args.update_baselines else [])
+            if subprocess.run(command).returncode:
+                sys.exit(1)
+        return
+
+    size = args.sizes[0]
+    baseline_path = BASELINE_DIR / f"endpoints-{size}.json"
+    if not args.update_baselines and not baseline_path.exists():
+        print(f"MISSING BASELINE {baseline_path}, create it with --update-baselines", file=sys.stderr)
+        sys.exit(1)
+    setup_django(os.path.join(tempfile.mkdtemp(), f"benchmark-{size}.sqlite3"))
+    result = run_size(size, args.iterations)
+    print(json.dumps(result, indent=2))
+
+    if args.update_baselines:
+        baseline_path.write_text(json.dumps(result, indent=2) + "\n")
+        return
+    regressions, warnings = compare(result, json.loads(baseline_path.read_text()), args.tolerance)
+    for warning in warnings:
+        print(f"WARNING {warning}", file=sys.stderr)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
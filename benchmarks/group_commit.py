@@ -0,0 +1,108 @@
+"""
+Throughput of ``create_transaction`` under concurrent checkouts, one commit per
+request vs group commit (``GROUP_COMMIT_ENABLED``).
+
+Creates a fresh SQLite database with products and clients, then starts
+``--users`` threads in one worker that each create ``--sales`` transactions as
+fast as they can, building them with ``TransactionRequestSerializer`` like the
+API does. For each mode it prints, as JSON, the sales per second, the latency
+percentiles and the number of failed sales::
+
+    python -m benchmarks.group_commit --users 500 --sales 4
+"""
+import argparse
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.http_load import percentile
+
+
+def run_mode(group_commit: bool, users: int, sales: int, products: list[int], clients: list[str]) -> dict:
+    from django.db import connection
+    from django.test import override_settings
+    from transactions.serializers import TransactionRequestSerializer
+    from transactions.services import TransactionService
+
+    service = TransactionService()
+    durations, errors = [], []
+    barrier = threading.Barrier(users + 1)
+
+    def user(seed: int):
+        generator = random.Random(seed)
+        try:
+            barrier.wait()
+            for _ in range(sales):
+                request = {"client": generator.choice(clients), "payment_method": "card", "status": "PAGADO",
+                           "products": [{"product": product, "quantity": 1}
+                                        for product in generator.sample(products, generator.randint(1, 3))]}
+                started_at = time.perf_counter()
+                try:
+                    serializer = TransactionRequestSerializer(data=request)
+                    serializer.is_valid(raise_exception=True)
+                    service.create_transaction(*serializer.create(serializer.data))
+                except Exception as e:
+                    errors.append(str(e))
+                durations.append(time.perf_counter() - started_at)
+        finally:
+            connection.close()
+
+    with override_settings(GROUP_COMMIT_ENABLED=group_commit):
+        threads = [threading.Thread(target=user, args=(seed,)) for seed in range(users)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+
+    durations.sort()
+    return {
+        "mode": "group_commit" if group_commit else "per_request_commit",
+        "sales": len(durations) - len(errors),
+        "errors": len(errors),
+        "error_messages": sorted(set(errors))[:3],
+        "sales_per_second": round((len(durations) - len(errors)) / elapsed, 1),
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 1),
+    }
+
+
+def run(users: int, sales: int) -> list[dict]:
+    from django.conf import settings
+    from django.core.management import call_command
+    from clients.models import Client
+    from products.models import Product
+
+    settings.EMAIL_BACKEND = "django.core.mail.backends.dummy.EmailBackend"
+    call_command("migrate", verbosity=0)
+    call_command("seed_scale_data", transactions=0, products=200, clients=1000, stdout=io.StringIO())
+    Product.objects.update(quantity=10 ** 9)
+    products = list(Product.objects.values_list("id", flat=True))
+    clients = list(Client.objects.values_list("document", flat=True))
+    return [run_mode(group_commit, users, sales, products, clients) for group_commit in (False, True)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--sales", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["SQLITE_PATH"] = os.path.join(directory, "group_commit.sqlite3")
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sales_system.settings")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        import django
+        django.setup()
+        print(json.dumps(run(args.users, args.sales), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Closed-loop HTTP load generator used to compare the WSGI and ASGI deployments.
+
+Opens ``--connections`` keep-alive connections against a running server and
+keeps one request in flight on each of them for ``--duration`` seconds, then
+prints throughput and latency percentiles as JSON::
+
+    python -m benchmarks.http_load http://127.0.0.1:8000/api/transactions/ \\
+        --connections 500 --duration 30 --token "$TOKEN"
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status = int(status_line.split()[1])
+    content_length, chunked, keep_alive = 0, False, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            content_length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value:
+            chunked = True
+        elif name == "connection" and value == "close":
+            keep_alive = False
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif content_length:
+        await reader.readexactly(content_length)
+
+    if not keep_alive:
+        raise ConnectionResetError("Server closed keep-alive connection")
+    return status
+
+
+async def worker(url, headers: bytes, deadline: float, latencies: list[float], statuses: dict, errors: list[str]):
+    reader = writer = None
+    request = (f"GET {url.path or '/'}{'?' + url.query if url.query else ''} HTTP/1.1\r\n").encode() + headers + b"\r\n"
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+            started_at = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started_at)
+            statuses[status] = statuses.get(status, 0) + 1
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def run(url: str, connections: int, duration: float, token: str | None, host: str | None) -> dict:
+    parsed_url = urlsplit(url)
+    headers = f"Host: {host or parsed_url.netloc}\r\nConnection: keep-alive\r\n"
+    if token:
+        headers += f"authorization: {token}\r\n"
+    latencies, statuses, errors = [], {}, []
+    started_at = time.perf_counter()
+    deadline = started_at + duration
+    await asyncio.gather(*(worker(parsed_url, headers.encode(), deadline, latencies, statuses, errors)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - started_at
+    latencies.sort()
+    return {
+        "url": url,
+        "connections": connections,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+        },
+        "statuses": statuses,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url")
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--token", help="access token sent in the authorization header")
+    parser.add_argument("--host", help="Host header, must be in ALLOWED_HOSTS")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.connections, args.duration, args.token, args.host)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
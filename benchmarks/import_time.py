@@ -0,0 +1,68 @@
+"""
+Worker cold-start import profile based on ``python -X importtime``.
+
+Boots the project the way a WSGI worker does (settings, application and URL
+configuration) in a fresh interpreter and prints the total import time and the
+slowest top-level imports as JSON. Exits with status 1 when the total import
+time is over ``--budget-ms``::
+
+    python -m benchmarks.import_time --top 15 --budget-ms 1200
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BOOT_SCRIPT = (
+    "import os\n"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_system.settings')\n"
+    "from django.core.wsgi import get_wsgi_application\n"
+    "get_wsgi_application()\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+STARTUP_IMPORT_BUDGET_MS = 1200
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def profile_startup() -> list[tuple[str, int, int]]:
+    environment = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    environment.pop('DJANGO_SETTINGS_MODULE', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT], cwd=BASE_DIR, env=environment,
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            imports.append((match.group(4), len(match.group(3)) // 2, int(match.group(2))))
+    return imports
+
+
+def total_import_ms(imports: list[tuple[str, int, int]]) -> float:
+    return sum(cumulative for _, depth, cumulative in imports if depth == 0) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS, help="maximum total import time")
+    args = parser.parse_args()
+    imports = profile_startup()
+    total_ms = total_import_ms(imports)
+    top_level = sorted((entry for entry in imports if entry[1] == 0), key=lambda entry: entry[2], reverse=True)
+    print(json.dumps({
+        "total_ms": round(total_ms, 1),
+        "modules": len(imports),
+        "slowest": {name: round(cumulative / 1000, 1) for name, _, cumulative in top_level[:args.top]},
+    }, indent=2))
+    if total_ms > args.budget_ms:
+        print(f"REGRESSION startup imports took {total_ms:.1f} ms, budget is {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+JSON encoding cost of large list responses: DRF's ``JSONRenderer`` vs the
+``FastJSONRenderer`` from ``commons/renderers.py``, and ``rows_to_json`` which
+encodes database value tuples directly.
+
+Builds ``--rows`` synthetic transaction and product rows in memory (no
+database) and prints the best of ``--repeat`` encoding times per path as JSON::
+
+    python -m benchmarks.json_render --rows 100000 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from decimal import Decimal
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sales_system.settings")
+    import django
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from commons.renderers import FastJSONRenderer, orjson, rows_to_json
+    from products.services import ProductService
+
+    generator = random.Random(42)
+    transactions = [{
+        "id": uuid.UUID(int=generator.getrandbits(128), version=4),
+        "client": f"{number:010d}",
+        "products": [{"product": f"Producto {generator.randrange(1000)}", "quantity": 1,
+                      "total": Decimal(generator.randrange(1000, 500000))} for _ in range(generator.randint(1, 4))],
+        "payment_method": "cash",
+        "status": "PAGADO",
+        "total": Decimal(generator.randrange(1000, 2000000)),
+    } for number in range(args.rows)]
+    product_rows = [(number, f"Producto {number}", "Tecnologia", "Tecnologia 1", Decimal(generator.randrange(1000, 500000)),
+                     generator.randrange(1000)) for number in range(args.rows)]
+    product_dicts = [dict(zip(ProductService.PRODUCT_FIELDS, row)) for row in product_rows]
+
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+    assert drf.render(transactions) == fast.render(transactions)
+    results = {
+        "orjson": orjson is not None,
+        "rows": args.rows,
+        "transactions_drf_ms": round(best_time(lambda: drf.render(transactions), args.repeat) * 1000, 1),
+        "transactions_fast_ms": round(best_time(lambda: fast.render(transactions), args.repeat) * 1000, 1),
+        "products_drf_dicts_ms": round(best_time(lambda: drf.render(
+            [dict(zip(ProductService.PRODUCT_FIELDS, row)) for row in product_rows]), args.repeat) * 1000, 1),
+        "products_fast_rows_ms": round(best_time(lambda: fast.render(
+            rows_to_json(ProductService.PRODUCT_FIELDS, product_rows)), args.repeat) * 1000, 1),
+        "products_drf_prebuilt_dicts_ms": round(best_time(lambda: drf.render(product_dicts), args.repeat) * 1000, 1),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
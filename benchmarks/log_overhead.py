@@ -0,0 +1,112 @@
+"""
+Logging overhead per request: the old synchronous ``basicConfig`` handler with
+eager f-strings vs the ``QueueLogHandler`` from ``commons/log.py`` with lazy
+arguments, with and without success-log sampling.
+
+Each simulated request emits the same log lines a view does (``Calling ...``,
+``... called successfully``) from several threads at once and writes them to a
+log file, so slow log I/O shows up in the request latency. For each profile the
+script prints per-request latency percentiles as JSON::
+
+    python -m benchmarks.log_overhead --requests 20000 --threads 8 --lines 4 --sample-rate 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+from benchmarks.http_load import percentile
+from commons.log import QueueLogHandler, request_context
+
+
+class SlowStream:
+    def __init__(self, stream, write_delay: float):
+        self.stream = stream
+        self.write_delay = write_delay
+
+    def write(self, data: str):
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def configure(profile: str, stream) -> logging.Handler:
+    if profile == "sync":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    else:
+        handler = QueueLogHandler(stream=stream)
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    return handler
+
+
+def simulate_request(profile: str, lines: int, sample_rate: float, username: str):
+    if profile == "sync":
+        for line in range(lines):
+            logging.info(f"Calling list products service step {line} with user {username}")
+        return
+    token = request_context.set({'request_id': uuid.uuid4().hex, 'sampled': random.random() < sample_rate})
+    try:
+        for line in range(lines):
+            logging.info("Calling list products service step %s with user %s", line, username)
+    finally:
+        request_context.reset(token)
+
+
+def run_profile(profile: str, requests: int, threads: int, lines: int, sample_rate: float, write_delay: float) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.log")
+    with open(path, "w") as log_file:
+        handler = configure(profile, SlowStream(log_file, write_delay))
+        latencies = []
+        per_thread = requests // threads
+
+        def worker(number: int):
+            for _ in range(per_thread):
+                started_at = time.perf_counter()
+                simulate_request(profile, lines, sample_rate, f"user{number}")
+                latencies.append(time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        handler.close()
+        elapsed = time.perf_counter() - started_at
+    latencies.sort()
+    return {
+        "profile": profile,
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "request_overhead_us": {name: round(percentile(latencies, fraction) * 1_000_000, 1)
+                                for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "sample_rate": sample_rate,
+        "dropped": getattr(handler, "dropped", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=4, help="log lines emitted per request")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="sample rate of the sampled profile")
+    parser.add_argument("--write-delay", type=float, default=0, help="seconds slept per log write to model a slow sink")
+    args = parser.parse_args()
+    results = [run_profile(profile, args.requests, args.threads, args.lines, sample_rate, args.write_delay)
+               for profile, sample_rate in (("sync", 1), ("queue", 1), ("queue_sampled", args.sample_rate))]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
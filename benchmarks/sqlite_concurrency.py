@@ -0,0 +1,134 @@
+"""
+Concurrent reads during write bursts on SQLite, default settings vs the tuned
+profile from ``SQLITE_PRAGMAS`` in ``sales_system/settings.py``.
+
+Writer threads insert sales in short bursts, one commit per sale like
+``create_transaction`` does, while reader threads run the aggregate queries of
+the sales report. For each profile the script prints read and write throughput
+and latency percentiles as JSON::
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from benchmarks.http_load import percentile
+from sales_system.settings import SQLITE_PRAGMAS
+
+SCHEMA = [
+    "create table products (id integer primary key, name text, price decimal)",
+    "create table transactions_transaction (id char(32) primary key, client_id text, status text, total decimal)",
+    "create table transactions_productpertransaction (id integer primary key, transaction_id char(32), product_id integer, "
+    "quantity integer, total decimal)",
+    "create index transactions_productpertransaction_product_id on transactions_productpertransaction (product_id)",
+]
+READ_QUERIES = [
+    "select count(*) from transactions_transaction where status = 'PAGADO'",
+    "select sum(total) from transactions_transaction where status = 'PAGADO'",
+    "select products.name, sum(total) as total_by_product from transactions_productpertransaction "
+    "inner join products on transactions_productpertransaction.product_id = products.id group by product_id",
+]
+
+
+def connect(path: str, tuned: bool) -> sqlite3.Connection:
+    if not tuned:
+        return sqlite3.connect(path, timeout=5, check_same_thread=False)
+    connection = sqlite3.connect(path, timeout=20, check_same_thread=False, isolation_level='IMMEDIATE')
+    for pragma, value in SQLITE_PRAGMAS.items():
+        connection.execute(f"PRAGMA {pragma}={value}")
+    return connection
+
+
+def seed(path: str, rows: int):
+    connection = sqlite3.connect(path)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.executemany("insert into products (id, name, price) values (?, ?, ?)",
+                           [(product_id, f"product {product_id}", 1000) for product_id in range(1, 101)])
+    for _ in range(rows):
+        write_sale(connection)
+    connection.commit()
+    connection.close()
+
+
+def write_sale(connection: sqlite3.Connection):
+    transaction_id = uuid.uuid4().hex
+    connection.execute("insert into transactions_transaction values (?, 'client', 'PAGADO', 3000)", (transaction_id,))
+    connection.executemany("insert into transactions_productpertransaction (transaction_id, product_id, quantity, total) "
+                           "values (?, ?, 1, 1000)", [(transaction_id, product_id) for product_id in (1, 2, 3)])
+
+
+def run_profile(tuned: bool, readers: int, writers: int, duration: float, burst: int, seed_rows: int) -> dict:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "benchmark.sqlite3")
+    seed(path, seed_rows)
+    deadline = time.perf_counter() + duration
+    read_latencies, write_latencies, errors = [], [], []
+
+    def reader():
+        connection = connect(path, tuned)
+        query = 0
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            try:
+                connection.execute(READ_QUERIES[query % len(READ_QUERIES)]).fetchall()
+                read_latencies.append(time.perf_counter() - started_at)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            query += 1
+        connection.close()
+
+    def writer():
+        connection = connect(path, tuned)
+        while time.perf_counter() < deadline:
+            for _ in range(burst):
+                started_at = time.perf_counter()
+                try:
+                    write_sale(connection)
+                    connection.commit()
+                    write_latencies.append(time.perf_counter() - started_at)
+                except sqlite3.OperationalError as e:
+                    connection.rollback()
+                    errors.append(str(e))
+            time.sleep(0.05)
+        connection.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    read_latencies.sort()
+    write_latencies.sort()
+    return {
+        "profile": "tuned" if tuned else "default",
+        "reads_per_s": round(len(read_latencies) / duration, 1),
+        "read_latency_ms": {name: round(percentile(read_latencies, fraction) * 1000, 2)
+                            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "writes_per_s": round(len(write_latencies) / duration, 1),
+        "write_latency_ms": {name: round(percentile(write_latencies, fraction) * 1000, 2)
+                             for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--burst", type=int, default=50, help="sales committed per writer burst")
+    parser.add_argument("--seed-rows", type=int, default=5000)
+    args = parser.parse_args()
+    results = [run_profile(tuned, args.readers, args.writers, args.duration, args.burst, args.seed_rows) for tuned in (False, True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Idle listener benchmark for the transaction events stream.
+
+Opens ``--listeners`` connections to ``/api/transactions/events/`` on a
+running ASGI server, keeps them open for ``--duration`` seconds and prints, as
+JSON, how many listeners connected, how many events and heartbeats each one
+received and how long every event took to reach all of them. Trigger changes
+meanwhile (for example with ``PUT /api/transactions/{id}/``) to measure the
+fan-out; pass ``--pid`` to also report the server memory and CPU time::
+
+    python -m benchmarks.sse_listeners http://127.0.0.1:8000/api/transactions/events/ \\
+        --listeners 2000 --duration 30 --token "$TOKEN" --pid "$(pgrep -f uvicorn)"
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.http_load import percentile
+
+
+def resident_memory_mb(pid: int | None) -> float | None:
+    if pid is None:
+        return None
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def cpu_seconds(pid: int | None) -> float | None:
+    if pid is None:
+        return None
+    with open(f"/proc/{pid}/stat") as stat:
+        user_ticks, system_ticks = stat.read().rsplit(")", 1)[1].split()[11:13]
+    return (int(user_ticks) + int(system_ticks)) / os.sysconf("SC_CLK_TCK")
+
+
+async def listener(url, request: bytes, arrivals: dict, counters: dict, connected: asyncio.Event, listeners: int):
+    try:
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    except OSError:
+        counters["errors"] += 1
+        return
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if b" 200 " not in status_line:
+            counters["errors"] += 1
+            return
+        counters["connected"] += 1
+        if counters["connected"] == listeners:
+            connected.set()
+        while line := await reader.readline():
+            if line.startswith(b"id: "):
+                arrivals.setdefault(int(line[4:]), []).append(time.perf_counter())
+                counters["events"] += 1
+            elif line.startswith(b": keepalive"):
+                counters["heartbeats"] += 1
+    except (OSError, asyncio.IncompleteReadError):
+        counters["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run(url: str, listeners: int, duration: float, token: str | None, host: str | None, pid: int | None) -> dict:
+    parsed_url = urlsplit(url)
+    headers = f"Host: {host or parsed_url.netloc}\r\nAccept: text/event-stream\r\n"
+    if token:
+        headers += f"authorization: {token}\r\n"
+    request = f"GET {parsed_url.path or '/'}{'?' + parsed_url.query if parsed_url.query else ''} HTTP/1.1\r\n{headers}\r\n"
+    memory_before = resident_memory_mb(pid)
+    arrivals, counters, connected = {}, {"connected": 0, "events": 0, "heartbeats": 0, "errors": 0}, asyncio.Event()
+    started_at = time.perf_counter()
+    tasks = [asyncio.create_task(listener(parsed_url, request.encode(), arrivals, counters, connected, listeners))
+             for _ in range(listeners)]
+    try:
+        await asyncio.wait_for(connected.wait(), duration)
+    except asyncio.TimeoutError:
+        pass
+    connected_in = time.perf_counter() - started_at
+    memory_connected, cpu_connected = resident_memory_mb(pid), cpu_seconds(pid)
+    await asyncio.sleep(max(0.0, started_at + duration - time.perf_counter()))
+    cpu_finished = cpu_seconds(pid)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    spreads = sorted(max(times) - min(times) for times in arrivals.values())
+    return {
+        "url": url,
+        "listeners": listeners,
+        "connected": counters["connected"],
+        "connected_in_s": round(connected_in, 2),
+        "errors": counters["errors"],
+        "events": len(arrivals),
+        "deliveries": counters["events"],
+        "heartbeats": counters["heartbeats"],
+        "fan_out_ms": {
+            "p50": round(percentile(spreads, 0.50) * 1000, 2),
+            "p95": round(percentile(spreads, 0.95) * 1000, 2),
+        },
+        "server_rss_mb": {"before": memory_before, "connected": memory_connected},
+        "server_cpu_s_while_connected": round(cpu_finished - cpu_connected, 2) if pid else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url")
+    parser.add_argument("--listeners", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--token", help="access token sent in the authorization header")
+    parser.add_argument("--host", help="Host header, must be in ALLOWED_HOSTS")
+    parser.add_argument("--pid", type=int, help="server process id, to report its memory and CPU time")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.listeners, args.duration, args.token, args.host, args.pid)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
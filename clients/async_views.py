@@ -0,0 +1,27 @@
+from clients.models import Client
+from clients.services import ClientService
+from clients.views import ClientView
+from commons.async_views import async_read_view, json_response
+from commons.permissions import Permissions
+from commons.renderers import rows_to_json
+import logging
+
+client_list_view = ClientView.as_view({'get': 'list', 'post': 'create'})
+client_detail_view = ClientView.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+client_service = ClientService()
+
+
+@async_read_view(Permissions.VIEW_CLIENT, client_list_view)
+async def list_clients(request, user):
+    logging.info("List clients service called successfully with user %s", user.username)
+    return json_response(rows_to_json(ClientService.CLIENT_FIELDS,
+                                      [row async for row in client_service.get_all_client_values()]))
+
+
+@async_read_view(Permissions.VIEW_CLIENT, client_detail_view)
+async def retrieve_client(request, user, pk):
+    logging.info("Retrieve client service called successfully with user %s", user.username)
+    try:
+        return json_response((await Client.objects.aget(document=pk)).to_dict())
+    except Client.DoesNotExist:
+        return json_response({"detail": "No Client matches the given query."}, 404)
@@ -1,47 +1,58 @@
 from django.shortcuts import redirect
 from rest_framework.decorators import action
-from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.viewsets import ViewSet
-import requests
 
-class ClientsFrontView(ViewSet):
-    renderer_classes = [TemplateHTMLRenderer]
+from clients.models import Client
+from clients.services import ClientService
+from commons.front import FrontViewSet
+from commons.permissions import Permissions
+
+class ClientsFrontView(FrontViewSet):
+    client_service = ClientService()
 
     def list(self, request):
-        response = requests.get(request.build_absolute_uri('/api/clients/'), headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return Response({'clients': response.json(), 'token': request.GET.get('token')} ,template_name='clients/front/templates/clients.html')
+        if not self.has_token_permission(request, Permissions.VIEW_CLIENT):
+            return self.forbidden()
+        page = self.get_page(request, self.client_service.get_all_client_rows())
+        return self.stream_page(request, 'clients/front/templates/clients.html', {'token': request.GET.get('token')},
+                                'clients/front/templates/client_row.html', 'client', page)
 
     @action(detail=False, methods=['GET'], url_path='update')
     def update_view(self, request):
-        response = requests.get(request.build_absolute_uri(f"/api/clients/{request.GET.get('id')}"), headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return Response({'client': response.json(), 'token': request.GET.get('token')} ,template_name='clients/front/templates/update.html')
+        if not self.has_token_permission(request, Permissions.VIEW_CLIENT):
+            return self.forbidden()
+        try:
+            client = self.client_service.get_client_by_id(request.GET.get('id'))
+        except Client.DoesNotExist:
+            return self.forbidden()
+        return Response({'client': client.to_dict(), 'token': request.GET.get('token')} ,template_name='clients/front/templates/update.html')
 
     @action(detail=False, methods=['POST'], url_path='update-client')
     def update_client(self, request):
-        response = requests.put(request.build_absolute_uri(f"/api/clients/{request.GET.get('id')}/"),
-                                headers={'authorization': request.GET.get('token')},
-                                data={'document': request.GET.get('id'), **request.data})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        if not self.has_token_permission(request, Permissions.UPDATE_CLIENT):
+            return self.forbidden()
+        try:
+            self.client_service.update_client(request.GET.get('id'), {**request.data.dict(), 'document': request.GET.get('id')})
+        except (ValidationError, Client.DoesNotExist):
+            return self.forbidden()
         return redirect(f"/api/front/clients/?token={request.GET.get('token')}")
 
     def create(self, request):
-        response = requests.post(request.build_absolute_uri(f"/api/clients/"),
-                                headers={'authorization': request.GET.get('token')},
-                                data=request.data)
-        if response.status_code != 201:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        if not self.has_token_permission(request, Permissions.CREATE_CLIENT):
+            return self.forbidden()
+        try:
+            self.client_service.create_client(request.data.dict())
+        except ValidationError:
+            return self.forbidden()
         return redirect(f"/api/front/clients/?token={request.GET.get('token')}")
 
     @action(detail=False, methods=['GET'], url_path='delete')
     def delete_view(self, request):
-        response = requests.delete(request.build_absolute_uri(f"/api/clients/{request.GET.get('id')}/"),
-                                headers={'authorization': request.GET.get('token')})
-        if response.status_code != 204:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return redirect(f"/api/front/clients/?token={request.GET.get('token')}")
\ No newline at end of file
+        if not self.has_token_permission(request, Permissions.DELETE_CLIENT):
+            return self.forbidden()
+        try:
+            self.client_service.delete_client(request.GET.get('id'))
+        except Client.DoesNotExist:
+            return self.forbidden()
+        return redirect(f"/api/front/clients/?token={request.GET.get('token')}")
@@ -6,4 +6,18 @@ from clients.models import Client
 class ClientDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = Client
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class ClientBulkRowSerializer(serializers.Serializer):
+    document = serializers.CharField(max_length=50)
+    name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    email = serializers.EmailField(max_length=255)
+    phone = serializers.CharField(max_length=15, required=False, allow_null=True, allow_blank=True)
+    address = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    def create(self, validated_data):
+        return Client(**validated_data)
+
+class ClientBulkRequestSerializer(serializers.Serializer):
+    clients = serializers.ListField(child=serializers.DictField(), allow_empty=False)
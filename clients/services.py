@@ -0,0 +1,88 @@
+from django.db.models import QuerySet
+
+from clients.models import Client
+from clients.serializers import ClientBulkRowSerializer, ClientDataSerializer
+from commons.db_router import immediate_atomic
+import logging
+
+
+class ClientService:
+    BULK_BATCH_SIZE = 500
+    BULK_UPDATE_FIELDS = ['name', 'last_name', 'email', 'phone', 'address']
+    CLIENT_FIELDS = ('document', 'name', 'last_name', 'email', 'phone', 'address')
+
+    def create_client(self, data: dict) -> Client:
+        data_serializer = ClientDataSerializer(data=data)
+        data_serializer.is_valid(raise_exception=True)
+        return data_serializer.save()
+
+    def get_client_by_id(self, document: str) -> Client:
+        return Client.objects.get(document=document)
+
+    def get_all_clients(self) -> QuerySet:
+        return Client.objects.all()
+
+    def get_all_client_rows(self) -> QuerySet:
+        return Client.objects.order_by('document').values(*self.CLIENT_FIELDS)
+
+    def get_all_client_values(self) -> QuerySet:
+        return Client.objects.values_list(*self.CLIENT_FIELDS)
+
+    def update_client(self, document: str, data: dict) -> Client:
+        data_serializer = ClientDataSerializer(self.get_client_by_id(document), data=data)
+        data_serializer.is_valid(raise_exception=True)
+        return data_serializer.save()
+
+    def delete_client(self, document: str) -> None:
+        client = self.get_client_by_id(document)
+        client.delete()
+
+    def bulk_upsert_clients(self, rows: list[dict]) -> dict:
+        errors = []
+        clients_by_document: dict[str, tuple[int, Client]] = {}
+        documents_by_email: dict[str, str] = {}
+
+        for index, row in enumerate(rows):
+            row_serializer = ClientBulkRowSerializer(data=row)
+            if not row_serializer.is_valid():
+                errors.append({'index': index, 'document': row.get('document'), 'errors': row_serializer.errors})
+                continue
+
+            client: Client = row_serializer.create(row_serializer.validated_data)
+            if client.document in clients_by_document:
+                errors.append({'index': index, 'document': client.document,
+                               'errors': {'document': ["Duplicated document in request."]}})
+                continue
+            if client.email in documents_by_email:
+                errors.append({'index': index, 'document': client.document,
+                               'errors': {'email': ["Duplicated email in request."]}})
+                continue
+
+            clients_by_document[client.document] = (index, client)
+            documents_by_email[client.email] = client.document
+
+        existing_documents: set[str] = set()
+        documents = list(clients_by_document.keys())
+        emails = list(documents_by_email.keys())
+        for start in range(0, len(documents), self.BULK_BATCH_SIZE):
+            existing_documents.update(Client.objects.filter(document__in=documents[start:start + self.BULK_BATCH_SIZE])
+                                      .values_list('document', flat=True))
+        for start in range(0, len(emails), self.BULK_BATCH_SIZE):
+            for email, owner in Client.objects.filter(email__in=emails[start:start + self.BULK_BATCH_SIZE]).values_list('email', 'document'):
+                if owner != documents_by_email[email]:
+                    index, _ = clients_by_document.pop(documents_by_email[email])
+                    errors.append({'index': index, 'document': documents_by_email[email],
+                                   'errors': {'email': ["client with this email already exists."]}})
+
+        clients_to_save = [client for _, client in clients_by_document.values()]
+        with immediate_atomic():
+            Client.objects.bulk_create(clients_to_save, batch_size=self.BULK_BATCH_SIZE, update_conflicts=True,
+                                       unique_fields=['document'], update_fields=self.BULK_UPDATE_FIELDS)
+
+        updated = sum(1 for client in clients_to_save if client.document in existing_documents)
+        logging.info("Bulk upsert of clients saved %s rows with %s errors", len(clients_to_save), len(errors))
+        return {
+            'created': len(clients_to_save) - updated,
+            'updated': updated,
+            'errors': sorted(errors, key=lambda error: error['index']),
+        }
@@ -147,3 +147,38 @@ class ClientTestCase(TestCase):
 
         with self.assertRaises(clients.models.Client.DoesNotExist):
             clients.models.Client.objects.get(document="test")
+
+    def test_bulk_upsert_clients_successfully(self):
+        clients.models.Client.objects.create(
+            document= "test",
+            name="test",
+            last_name="test",
+            email="test@example.com",
+            phone="123456789",
+            address= "test #123-45"
+        )
+        clients.models.Client.objects.create(
+            document= "other",
+            name="other",
+            last_name="other",
+            email="other@example.com",
+        )
+        bulk_request: dict[str, object] = {
+          "clients": [
+            {"document": "test", "name": "test updated", "last_name": "test", "email": "test@example.com"},
+            {"document": "test2", "name": "test2", "last_name": "test2", "email": "test2@example.com", "phone": "123"},
+            {"document": "test3", "name": "test3", "last_name": "test3", "email": "not-an-email"},
+            {"document": "test4", "name": "test4", "last_name": "test4", "email": "other@example.com"},
+            {"document": "test2", "name": "test2", "last_name": "test2", "email": "test5@example.com"}
+          ]
+        }
+
+        response = self.client.post("/api/clients/bulk/", bulk_request, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertListEqual([(error["index"], list(error["errors"])) for error in response.json()["errors"]],
+                             [(2, ["email"]), (3, ["email"]), (4, ["document"])])
+        self.assertEqual(clients.models.Client.objects.get(document="test").name, "test updated")
+        self.assertEqual(clients.models.Client.objects.get(document="test2").phone, "123")
+        self.assertFalse(clients.models.Client.objects.filter(document__in=["test3", "test4"]).exists())
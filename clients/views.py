@@ -1,13 +1,16 @@
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from clients.models import Client
-from clients.serializers import ClientDataSerializer
-from commons.jwt_utils import JWTUtils
-from commons.permissions import Permissions
+from clients.serializers import ClientDataSerializer, ClientBulkRequestSerializer
+from clients.services import ClientService
+from commons.authentication import JWTAuthentication
+from commons.permissions import Permissions, HasActionPermission
+from commons.renderers import rows_to_json
 import logging
 
 
@@ -15,9 +18,17 @@ import logging
 class ClientView(ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientDataSerializer
-    forbidden_response = Response({
-        "message": "You don't have permissions to perform this action.",
-    }, status=status.HTTP_403_FORBIDDEN)
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [HasActionPermission]
+    action_permissions = {
+        'create': (Permissions.CREATE_CLIENT,),
+        'retrieve': (Permissions.VIEW_CLIENT,),
+        'list': (Permissions.VIEW_CLIENT,),
+        'update': (Permissions.UPDATE_CLIENT,),
+        'partial_update': (Permissions.UPDATE_CLIENT,),
+        'destroy': (Permissions.DELETE_CLIENT,),
+        'bulk_upsert': (Permissions.CREATE_CLIENT, Permissions.UPDATE_CLIENT),
+    }
 
     header_param = openapi.Parameter('authorization', openapi.IN_HEADER, description="authorization token header param",
                                      type=openapi.IN_HEADER)
@@ -25,73 +36,43 @@ class ClientView(ModelViewSet):
     @swagger_auto_schema(request_body=ClientDataSerializer, responses={201: ClientDataSerializer()},
                          manual_parameters=[header_param])
     def create(self, request, *args, **kwargs):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.CREATE_CLIENT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Create client service called successfully with user {token_info['user']}")
+        logging.info("Create client service called successfully with user %s", request.user.username)
         return super().create(request, *args, **kwargs)
 
     @swagger_auto_schema(responses={200: ClientDataSerializer()},
                          manual_parameters=[header_param])
     def retrieve(self, request, *args, **kwargs):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_CLIENT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Retrieve client service called successfully with user {token_info['user']}")
+        logging.info("Retrieve client service called successfully with user %s", request.user.username)
         return super().retrieve(request, *args, **kwargs)
 
     @swagger_auto_schema(responses={200: ClientDataSerializer(many=True)}, manual_parameters=[header_param])
     def list(self, request, *args, **kwargs):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_CLIENT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"List clients service called successfully with user {token_info['user']}")
-        return super().list(request, *args, **kwargs)
+        logging.info("List clients service called successfully with user %s", request.user.username)
+        return Response(rows_to_json(ClientService.CLIENT_FIELDS, ClientService().get_all_client_values()))
 
     @swagger_auto_schema(request_body=ClientDataSerializer, responses={200: ClientDataSerializer()}, manual_parameters=[header_param])
     def update(self, request, *args, **kwargs):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.UPDATE_CLIENT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Update client service called successfully with user {token_info['user']}")
+        logging.info("Update client service called successfully with user %s", request.user.username)
         return super().update(request, *args, **kwargs)
 
     @swagger_auto_schema(request_body=ClientDataSerializer, responses={200: ClientDataSerializer()}, manual_parameters=[header_param])
     def partial_update(self, request, *args, **kwargs):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.UPDATE_CLIENT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Partial update client service called successfully with user {token_info['user']}")
+        logging.info("Partial update client service called successfully with user %s", request.user.username)
         return super().partial_update(request, *args, **kwargs)
 
     @swagger_auto_schema(manual_parameters=[header_param])
     def destroy(self, request, *args, **kwargs):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.DELETE_CLIENT not in token_info['permissions']:
-            return self.forbidden_response
+        logging.info("Delete client service called successfully with user %s", request.user.username)
+        return super().destroy(request, *args, **kwargs)
 
-        logging.info(f"Delete client service called successfully with user {token_info['user']}")
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+    @swagger_auto_schema(request_body=ClientBulkRequestSerializer,
+                         responses={200: "{'created': 0, 'updated': 0, 'errors': [{'index': 0, 'document': '', 'errors': {}}]}"},
+                         manual_parameters=[header_param])
+    @action(detail=False, methods=['POST'], url_path='bulk')
+    def bulk_upsert(self, request):
+        logging.info("Calling bulk upsert clients service with user %s", request.user.username)
+        bulk_request_serializer = ClientBulkRequestSerializer(data=request.data)
+        bulk_request_serializer.is_valid(raise_exception=True)
+        result = ClientService().bulk_upsert_clients(bulk_request_serializer.validated_data['clients'])
+        logging.info("Bulk upsert clients service called successfully with user %s", request.user.username)
+        return Response(result, status=status.HTTP_200_OK)
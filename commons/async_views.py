@@ -0,0 +1,44 @@
+from functools import wraps
+
+import jwt
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.views.decorators.csrf import csrf_exempt
+
+from commons.authentication import verify_token
+from commons.renderers import FastJSONRenderer
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def unauthorized_response(message: str) -> HttpResponse:
+    response = json_response({"message": message}, 401)
+    response['WWW-Authenticate'] = 'Bearer'
+    return response
+
+
+def async_read_view(permission: str, fallback_view=None, allow_query_token: bool = False):
+    def decorator(handler):
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                if fallback_view is None:
+                    return HttpResponseNotAllowed(['GET'])
+                return await sync_to_async(fallback_view)(request, *args, **kwargs)
+
+            token = request.headers.get('authorization') or (allow_query_token and request.GET.get('token'))
+            if not token:
+                return unauthorized_response("Authentication credentials were not provided.")
+            try:
+                user = verify_token(token)
+            except jwt.InvalidTokenError:
+                return unauthorized_response("Invalid or expired token.")
+            if permission not in user.permissions:
+                return json_response({"message": "You don't have permissions to perform this action."}, 403)
+
+            return await handler(request, user, *args, **kwargs)
+        return view
+    return decorator
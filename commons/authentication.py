@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from commons.jwt_utils import JWTUtils
+from commons.permissions import Permissions
+
+
+class TokenUser:
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, claims: dict):
+        self.username = claims['user']
+        self.permissions = Permissions.from_mask(claims['perms'])
+        self.claims = claims
+
+    def get_username(self) -> str:
+        return self.username
+
+    def has_perm(self, permission: str) -> bool:
+        return permission in self.permissions
+
+    def __str__(self):
+        return self.username
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[bytes, tuple[TokenUser, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, digest: bytes) -> TokenUser | None:
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                del self.entries[digest]
+                return None
+            self.entries.move_to_end(digest)
+            return user
+
+    def put(self, digest: bytes, user: TokenUser, expires_at: float) -> None:
+        with self.lock:
+            self.entries[digest] = (user, expires_at)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = VerifiedTokenCache(getattr(settings, 'JWT_TOKEN_CACHE_SIZE', 4096))
+
+
+def verify_token(token: str) -> TokenUser:
+    if token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+
+    digest = hashlib.sha256(token.encode()).digest()
+    user = token_cache.get(digest)
+    if user is None:
+        try:
+            claims = JWTUtils.decode(token, required_claims=('user', 'perms', 'type', 'exp'))
+            if claims['type'] != JWTUtils.ACCESS_TOKEN:
+                raise jwt.InvalidTokenError("Not an access token")
+            user = TokenUser(claims)
+        except (TypeError, ValueError):
+            raise jwt.InvalidTokenError("Invalid permissions claim")
+        token_cache.put(digest, user, claims['exp'])
+    return user
+
+
+def get_request_user(request) -> TokenUser | None:
+    token = request.headers.get('authorization') or request.GET.get('token')
+    if not token:
+        return None
+    try:
+        return verify_token(token)
+    except jwt.InvalidTokenError:
+        return None
+
+
+class JWTAuthentication(BaseAuthentication):
+    def authenticate(self, request):
+        token = request.headers.get('authorization')
+        if not token:
+            return None
+
+        try:
+            return verify_token(token), token
+        except jwt.InvalidTokenError:
+            raise AuthenticationFailed("Invalid or expired token.")
+
+    def authenticate_header(self, request):
+        return 'Bearer'
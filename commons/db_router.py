@@ -0,0 +1,101 @@
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction, DatabaseError, OperationalError
+import logging
+
+read_alias: ContextVar[str | None] = ContextVar('read_alias', default=None)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+@contextmanager
+def reading_from(alias: str | None):
+    token = read_alias.set(alias)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+write_locks = {alias: threading.Lock() for alias in settings.DATABASES}
+
+
+# Transactions open as DEFERRED, so read-only atomic blocks never take the write lock. Write paths use this block
+# instead: it opens with BEGIN IMMEDIATE, because a DEFERRED transaction that has read first fails with "database is
+# locked" when it tries to write after another connection committed. The writers of a worker queue on a lock in
+# turn, with the same timeout, so SQLite's busy handler only arbitrates between workers.
+@contextmanager
+def immediate_atomic(using: str = DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    if not write_locks[using].acquire(timeout=connection.settings_dict['OPTIONS'].get('timeout', 5)):
+        raise OperationalError("database is locked")
+    try:
+        connection.ensure_connection()
+        mode, connection.transaction_mode = connection.transaction_mode, 'IMMEDIATE'
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(transaction.atomic(using=using))
+            finally:
+                connection.transaction_mode = mode
+            yield
+    finally:
+        write_locks[using].release()
+
+
+class ReplicaHealth:
+    HEARTBEAT_TABLE = 'replica_heartbeat'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = 0.0
+        self.usable = False
+
+    def is_usable(self, alias: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            if now - self.checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+                return self.usable
+            self.checked_at = now
+        usable = self.get_lag(alias) <= settings.REPLICA_MAX_LAG
+        with self.lock:
+            self.usable = usable
+        return usable
+
+    async def ais_usable(self, alias: str) -> bool:
+        if time.monotonic() - self.checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            return self.usable
+        return await sync_to_async(self.is_usable)(alias)
+
+    def get_lag(self, alias: str) -> float:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f"select max(beat_at) from {self.HEARTBEAT_TABLE}")
+                beat_at, = cursor.fetchone()
+        except DatabaseError as e:
+            logging.warning("Read replica %s is not available, falling back to primary due to %s", alias, e)
+            return float('inf')
+        return time.time() - beat_at if beat_at is not None else float('inf')
+
+
+replica_health = ReplicaHealth()
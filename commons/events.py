@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections import deque
+
+from django.conf import settings
+
+
+def sse_frame(event_id: int, event_type: str, data: str) -> bytes:
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n".encode()
+
+
+class EventBroadcaster:
+    HEARTBEAT = b": keepalive\n\n"
+
+    def __init__(self, fetch_after, get_last_id, event_prefix: str = ''):
+        self.fetch_after = fetch_after
+        self.get_last_id = get_last_id
+        self.event_prefix = event_prefix
+        self.loop = None
+
+    def reset(self, loop) -> None:
+        self.loop = loop
+        self.listeners = 0
+        self.poller = None
+        self.started = None
+        self.new_events = asyncio.Event()
+        self.buffer = deque(maxlen=getattr(settings, 'EVENT_STREAM_BUFFER_SIZE', 1000))
+        self.floor = 0
+        self.latest_id = 0
+
+    # If the poller cannot read the last event id, the subscribers waiting for it get the error and the next
+    # subscriber starts a new poller.
+    async def poll(self, started: asyncio.Future) -> None:
+        try:
+            self.buffer.clear()
+            self.latest_id = self.floor = await self.get_last_id()
+        except Exception as e:
+            logging.error("There was an error starting the event log poller with error %s", e)
+            self.poller = None
+            started.set_exception(e)
+            return
+        started.set_result(None)
+        interval = getattr(settings, 'EVENT_STREAM_POLL_INTERVAL', 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async for events in self.fetch(self.latest_id):
+                    for event in events:
+                        if len(self.buffer) == self.buffer.maxlen:
+                            self.floor = self.buffer[0][0]
+                        self.buffer.append(event)
+                    self.latest_id = events[-1][0]
+                    self.new_events.set()
+                    self.new_events = asyncio.Event()
+            except Exception as e:
+                logging.error("There was an error polling the event log with error %s", e)
+
+    async def fetch(self, last_id: int):
+        page_size = getattr(settings, 'EVENT_STREAM_PAGE_SIZE', 500)
+        while True:
+            page = [(event_id, sse_frame(event_id, self.event_prefix + event_type, data))
+                    for event_id, event_type, data in await self.fetch_after(last_id, page_size)]
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1][0]
+
+    # Clients older than the buffer are caught up page by page from the event log. Past EVENT_STREAM_MAX_CATCH_UP
+    # events they get a single reset event instead, with the latest id, and should reload the data they display.
+    async def events_after(self, last_id: int):
+        if last_id >= self.latest_id:
+            return
+        if last_id >= self.floor:
+            for event in [event for event in self.buffer if event[0] > last_id]:
+                yield event
+            return
+        if self.latest_id - last_id > getattr(settings, 'EVENT_STREAM_MAX_CATCH_UP', 10000):
+            yield self.latest_id, sse_frame(self.latest_id, self.event_prefix + 'reset', '{}')
+            return
+        async for page in self.fetch(last_id):
+            for event in page:
+                yield event
+
+    async def subscribe(self, last_id: int | None = None):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.reset(loop)
+        self.listeners += 1
+        if self.poller is None:
+            self.started = loop.create_future()
+            self.poller = loop.create_task(self.poll(self.started))
+        started = self.started
+        heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+        try:
+            await asyncio.shield(started)
+            if last_id is None:
+                last_id = self.latest_id
+            yield f"retry: {getattr(settings, 'EVENT_STREAM_RETRY_MS', 3000)}\n\n".encode()
+            while True:
+                new_events = self.new_events
+                sent = False
+                async for last_id, frame in self.events_after(last_id):
+                    yield frame
+                    sent = True
+                if sent:
+                    continue
+                try:
+                    await asyncio.wait_for(new_events.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield self.HEARTBEAT
+        finally:
+            self.listeners -= 1
+            if not self.listeners and self.poller is not None:
+                self.poller.cancel()
+                self.poller = None
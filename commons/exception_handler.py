@@ -0,0 +1,9 @@
+from rest_framework.exceptions import NotAuthenticated, AuthenticationFailed, PermissionDenied
+from rest_framework.views import exception_handler
+
+
+def api_exception_handler(exc, context):
+    response = exception_handler(exc, context)
+    if response is not None and isinstance(exc, (NotAuthenticated, AuthenticationFailed, PermissionDenied)):
+        response.data = {"message": response.data['detail']}
+    return response
@@ -0,0 +1,28 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+blocking_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'BLOCKING_EXECUTOR_WORKERS', 4),
+                                       thread_name_prefix='blocking')
+
+
+async def run_blocking(function, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(blocking_executor, partial(function, *args, **kwargs))
+
+process_executor = None
+process_executor_lock = threading.Lock()
+
+
+# Workers are spawned instead of forked so they do not inherit the server threads or database connections; the pool
+# is created on first use and kept for the life of the process.
+def get_process_executor() -> ProcessPoolExecutor:
+    global process_executor
+    with process_executor_lock:
+        if process_executor is None:
+            process_executor = ProcessPoolExecutor(max_workers=getattr(settings, 'PROCESS_EXECUTOR_WORKERS', None),
+                                                   mp_context=multiprocessing.get_context('spawn'))
+        return process_executor
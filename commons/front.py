@@ -0,0 +1,71 @@
+import hashlib
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator, Page
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from commons.authentication import verify_token
+from commons.streaming import streaming_response
+
+
+class FrontViewSet(ViewSet):
+    renderer_classes = [TemplateHTMLRenderer]
+    forbidden_template = 'auth/front/templates/forbidden.html'
+    rows_placeholder = '<!-- rows -->'
+    # Row data is autoescaped, so a placeholder with '<' can only come from the row template itself.
+    token_placeholder = '<%TOKEN%>'
+
+    def has_token_permission(self, request, permission: str) -> bool:
+        token = request.GET.get('token')
+        if not token:
+            return False
+        try:
+            return permission in verify_token(token).permissions
+        except jwt.InvalidTokenError:
+            return False
+
+    def forbidden(self) -> Response:
+        return Response(template_name=self.forbidden_template)
+
+    def get_page(self, request, queryset) -> Page:
+        return Paginator(queryset, settings.FRONT_PAGE_SIZE).get_page(request.GET.get('page'))
+
+    def render_rows(self, row_template_name: str, context_name: str, rows: list[dict]) -> list[str]:
+        row_template = get_template(row_template_name)
+        keys = [f"front:v2:{row_template_name}:{hashlib.sha1(repr(sorted(row.items())).encode()).hexdigest()}" for row in rows]
+        fragments = cache.get_many(keys)
+        missing_fragments = {}
+        for key, row in zip(keys, rows):
+            if key not in fragments:
+                missing_fragments[key] = row_template.render({context_name: row, 'token': mark_safe(self.token_placeholder)})
+        if missing_fragments:
+            cache.set_many(missing_fragments, settings.FRONT_FRAGMENT_CACHE_TIMEOUT)
+            fragments.update(missing_fragments)
+        return [fragments[key] for key in keys]
+
+    def stream_page(self, request, template_name: str, context: dict, row_template_name: str, context_name: str,
+                    page: Page) -> StreamingHttpResponse:
+        document = render_to_string(template_name, {**context, 'page': page, 'rows': mark_safe(self.rows_placeholder)},
+                                    request)
+        head, tail = document.split(self.rows_placeholder, 1)
+        token = escape(request.GET.get('token', ''))
+        # Read in the view, where ReadReplicaMiddleware still routes the query to the replica; the body is sent after
+        # the middleware returns.
+        rows = list(page.object_list)
+
+        def content():
+            yield head
+            for start in range(0, len(rows), settings.FRONT_STREAM_CHUNK_SIZE):
+                fragments = self.render_rows(row_template_name, context_name, rows[start:start + settings.FRONT_STREAM_CHUNK_SIZE])
+                yield ''.join(fragments).replace(self.token_placeholder, token)
+            yield tail
+
+        return streaming_response(request, content(), content_type='text/html; charset=utf-8')
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from commons.db_router import immediate_atomic
+
+
+class PendingWrite:
+    def __init__(self, function):
+        self.function = function
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+# Coalesces concurrent writes of a worker into one database transaction. The first caller to arrive becomes the
+# leader: it waits GROUP_COMMIT_WINDOW_MS for other callers, runs every pending write in its own savepoint on the
+# leader's connection and commits once. A write that raises only rolls back its savepoint and the error is raised to
+# its caller; if the commit itself fails every caller of the batch gets that error. Followers wait until their write
+# is done or until there is no leader, in which case one of them leads the next batch.
+class GroupCommitter:
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        self.condition = threading.Condition()
+        self.pending = []
+        self.leading = False
+
+    def submit(self, function):
+        if connections[self.using].in_atomic_block:
+            return function()
+        write = PendingWrite(function)
+        with self.condition:
+            self.pending.append(write)
+        while True:
+            with self.condition:
+                while self.leading and not write.done:
+                    self.condition.wait()
+                if write.done:
+                    return write.get()
+                self.leading = True
+            try:
+                self.lead()
+            finally:
+                with self.condition:
+                    self.leading = False
+                    self.condition.notify_all()
+
+    def lead(self) -> None:
+        max_batch = settings.GROUP_COMMIT_MAX_BATCH
+        with self.condition:
+            full = len(self.pending) >= max_batch
+        if not full:
+            time.sleep(settings.GROUP_COMMIT_WINDOW_MS / 1000)
+        with self.condition:
+            batch, self.pending = self.pending[:max_batch], self.pending[max_batch:]
+        self.commit(batch)
+
+    def commit(self, batch: list[PendingWrite]) -> None:
+        try:
+            with immediate_atomic(self.using):
+                for write in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            write.result = write.function()
+                    except Exception as e:
+                        write.error = e
+        except Exception as e:
+            for write in batch:
+                write.result, write.error = None, e
+        finally:
+            for write in batch:
+                write.done = True
+
+
+group_committer = GroupCommitter()
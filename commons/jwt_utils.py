@@ -1,10 +1,39 @@
+import time
+
 import jwt
+from django.conf import settings
+
 
 class JWTUtils:
+    ACCESS_TOKEN = "access"
+    REFRESH_TOKEN = "refresh"
+
     @staticmethod
     def encode(body):
         return jwt.encode(payload=body, key="5r@gldmj+p3wp0%k)wdy70x+_7g^aei35i5%vf@$57u51f1buw")
 
     @staticmethod
-    def decode(token):
-        return jwt.decode(jwt=token, key="5r@gldmj+p3wp0%k)wdy70x+_7g^aei35i5%vf@$57u51f1buw", algorithms=['HS256'])
\ No newline at end of file
+    def decode(token, required_claims=('user', 'type', 'exp')):
+        return jwt.decode(jwt=token, key="5r@gldmj+p3wp0%k)wdy70x+_7g^aei35i5%vf@$57u51f1buw", algorithms=['HS256'],
+                          options={'require': list(required_claims)})
+
+    @staticmethod
+    def encode_access_token(username: str, permissions_mask: int):
+        issued_at = int(time.time())
+        return JWTUtils.encode({
+            "user": username,
+            "perms": permissions_mask,
+            "type": JWTUtils.ACCESS_TOKEN,
+            "iat": issued_at,
+            "exp": issued_at + settings.JWT_ACCESS_TOKEN_LIFETIME,
+        })
+
+    @staticmethod
+    def encode_refresh_token(username: str):
+        issued_at = int(time.time())
+        return JWTUtils.encode({
+            "user": username,
+            "type": JWTUtils.REFRESH_TOKEN,
+            "iat": issued_at,
+            "exp": issued_at + settings.JWT_REFRESH_TOKEN_LIFETIME,
+        })
@@ -0,0 +1,67 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from contextvars import ContextVar
+
+request_context: ContextVar[dict | None] = ContextVar('request_context', default=None)
+
+STANDARD_RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = request_context.get()
+        if context is None:
+            return True
+        if record.levelno < logging.WARNING and not context['sampled']:
+            return False
+        record.request_id = context['request_id']
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in record.__dict__.items() if key not in STANDARD_RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    def __init__(self, json_format: bool = True, max_size: int = 50000, stream=None):
+        super().__init__(queue.Queue(max_size))
+        self.dropped = 0
+        self.addFilter(RequestContextFilter())
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JSONFormatter() if json_format else
+                            logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        self.listener = logging.handlers.QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop_listener)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self.stop_listener()
+        super().close()
+
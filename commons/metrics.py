@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+LabelSet = tuple[tuple[str, str], ...]
+SampleKey = tuple[str, LabelSet]
+
+METRIC_HELP = {
+    'http_requests_total': ('counter', "Requests handled, by route, method and status"),
+    'http_request_duration_seconds': ('histogram', "Request latency in seconds"),
+    'http_request_db_queries_total': ('counter', "Database queries executed while handling requests"),
+    'http_request_db_duration_seconds_total': ('counter', "Time spent in database queries in seconds"),
+    'http_response_size_bytes_total': ('counter', "Response body bytes sent"),
+}
+
+
+class InMemoryMetricsStore:
+    def __init__(self):
+        self.samples: dict[SampleKey, float] = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def add(self, samples: dict[SampleKey, float]) -> None:
+        with self.lock:
+            for key, value in samples.items():
+                self.samples[key] += value
+
+    def collect(self) -> dict[SampleKey, float]:
+        with self.lock:
+            return dict(self.samples)
+
+
+class SQLiteMetricsStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        with self.get_connection() as connection:
+            connection.execute("create table if not exists metrics (name text not null, labels text not null, "
+                               "value real not null, primary key (name, labels))")
+
+    def get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            connection.execute("pragma journal_mode=WAL")
+            connection.execute("pragma synchronous=OFF")
+            self.local.connection = connection
+        return connection
+
+    def add(self, samples: dict[SampleKey, float]) -> None:
+        connection = self.get_connection()
+        connection.execute("begin immediate")
+        try:
+            connection.executemany("insert into metrics (name, labels, value) values (?, ?, ?) "
+                                   "on conflict(name, labels) do update set value = value + excluded.value",
+                                   [(name, encode_labels(labels), value) for (name, labels), value in samples.items()])
+            connection.execute("commit")
+        except Exception:
+            connection.execute("rollback")
+            raise
+
+    def collect(self) -> dict[SampleKey, float]:
+        rows = self.get_connection().execute("select name, labels, value from metrics").fetchall()
+        return {(name, decode_labels(labels)): value for name, labels, value in rows}
+
+
+def encode_labels(labels: LabelSet) -> str:
+    return '|'.join(f"{name}={value}" for name, value in labels)
+
+
+def decode_labels(labels: str) -> LabelSet:
+    return tuple(tuple(label.split('=', 1)) for label in labels.split('|')) if labels else ()
+
+
+class RequestMetrics:
+    def __init__(self, store, buckets: list[float], flush_interval: float):
+        self.store = store
+        self.buckets = sorted(buckets)
+        self.flush_interval = flush_interval
+        self.pending: dict[SampleKey, float] = defaultdict(float)
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+
+    def observe(self, route: str, method: str, status: int, duration: float, db_queries: int, db_duration: float,
+                size: int) -> None:
+        labels = (('route', route), ('method', method))
+        samples = [
+            (('http_requests_total', labels + (('status', str(status)),)), 1),
+            (('http_request_duration_seconds_sum', labels), duration),
+            (('http_request_duration_seconds_count', labels), 1),
+            (('http_request_db_queries_total', labels), db_queries),
+            (('http_request_db_duration_seconds_total', labels), db_duration),
+            (('http_response_size_bytes_total', labels), size),
+        ]
+        for bucket in self.buckets:
+            if duration <= bucket:
+                samples.append((('http_request_duration_seconds_bucket', labels + (('le', str(bucket)),)), 1))
+        samples.append((('http_request_duration_seconds_bucket', labels + (('le', '+Inf'),)), 1))
+        with self.lock:
+            for key, value in samples:
+                self.pending[key] += value
+        if time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(float)
+            self.flushed_at = time.monotonic()
+        if pending:
+            self.store.add(pending)
+
+    def render(self) -> str:
+        self.flush()
+        families = defaultdict(list)
+        for (name, labels), value in sorted(self.store.collect().items(), key=sample_sort_key):
+            family = name.removesuffix('_bucket').removesuffix('_sum').removesuffix('_count') \
+                if name.startswith('http_request_duration_seconds') else name
+            families[family].append((name, labels, value))
+        lines = []
+        for family, samples in families.items():
+            metric_type, description = METRIC_HELP.get(family, ('untyped', family))
+            lines.append(f"# HELP {family} {description}")
+            lines.append(f"# TYPE {family} {metric_type}")
+            for name, labels, value in samples:
+                label_text = ','.join(f'{label}="{escape_label(label_value)}"' for label, label_value in labels)
+                lines.append(f"{name}{{{label_text}}} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def sample_sort_key(sample: tuple[SampleKey, float]):
+    (name, labels), _ = sample
+    bounds = dict(labels)
+    le = bounds.pop('le', None)
+    return name, tuple(bounds.items()), float(le) if le is not None else 0.0
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started_at
+            self.count += 1
+
+
+current_query_timer: ContextVar[QueryTimer | None] = ContextVar('current_query_timer', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    timer = current_query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
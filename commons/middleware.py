@@ -0,0 +1,513 @@
+import asyncio
+import math
+import random
+import re
+import threading
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.db.backends.signals import connection_created
+from django.middleware import clickjacking, common, csrf, security
+from django.http import HttpResponse, HttpResponseBase, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from commons.authentication import get_request_user
+from commons.db_router import reading_from, replica_health
+from commons.log import request_context
+from commons.metrics import InMemoryMetricsStore, QueryTimer, RequestMetrics, SQLiteMetricsStore, current_query_timer, \
+    time_query
+from commons.rate_limit import InMemoryBucketStore, SQLiteBucketStore
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Behind a reverse proxy REMOTE_ADDR is the proxy itself. With CLIENT_IP_HEADER set (e.g. HTTP_X_FORWARDED_FOR) the
+# client is the address appended by the outermost of the TRUSTED_PROXY_COUNT proxies; entries before it are client
+# supplied and ignored.
+def get_client_ip(request) -> str:
+    header = getattr(settings, 'CLIENT_IP_HEADER', None)
+    addresses = [address.strip() for address in request.META.get(header, '').split(',') if address.strip()] if header else []
+    if addresses:
+        return addresses[-min(len(addresses), getattr(settings, 'TRUSTED_PROXY_COUNT', 1))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# Runs natively under WSGI and ASGI: Django passes an async get_response under ASGI, and the middleware then awaits
+# it in __acall__ instead of being wrapped in sync_to_async/async_to_sync thread hops.
+class HybridMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.call(request)
+
+    def call(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+# Django's MiddlewareMixin runs process_request/process_response through sync_to_async under ASGI, two thread hops
+# per middleware and request. These hooks only look at the request and response, so they run in the event loop; a
+# subclass sends the response hook to a thread when it is going to write (e.g. save the session).
+class InlineHooksMixin:
+    async def __acall__(self, request):
+        response = self.process_request(request) if hasattr(self, 'process_request') else None
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            if self.response_needs_thread(request):
+                return await sync_to_async(self.process_response, thread_sensitive=True)(request, response)
+            response = self.process_response(request, response)
+        return response
+
+    def response_needs_thread(self, request) -> bool:
+        return False
+
+
+class SecurityMiddleware(InlineHooksMixin, security.SecurityMiddleware):
+    pass
+
+
+class CommonMiddleware(InlineHooksMixin, common.CommonMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(InlineHooksMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(InlineHooksMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class SessionMiddleware(InlineHooksMixin, sessions_middleware.SessionMiddleware):
+    def response_needs_thread(self, request) -> bool:
+        session = getattr(request, 'session', None)
+        return session is not None and (session.modified or settings.SESSION_SAVE_EVERY_REQUEST) and not session.is_empty()
+
+
+class MessageMiddleware(InlineHooksMixin, messages_middleware.MessageMiddleware):
+    def response_needs_thread(self, request) -> bool:
+        storage = getattr(request, '_messages', None)
+        return storage is not None and (storage.used or storage.added_new)
+
+
+# The CSRF secret is read from its cookie (CSRF_USE_SESSIONS is off), so the hooks, process_view included, never
+# touch the database.
+class CsrfViewMiddleware(InlineHooksMixin, csrf.CsrfViewMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            self.process_view = self.aprocess_view
+
+    async def aprocess_view(self, request, callback, callback_args, callback_kwargs):
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class AdmissionControlMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = getattr(settings, 'ADMISSION_CONTROL_ENABLED', True)
+        self.path_prefix = getattr(settings, 'ADMISSION_CONTROL_PATH_PREFIX', '/api/')
+        self.in_flight = threading.BoundedSemaphore(getattr(settings, 'ADMISSION_MAX_IN_FLIGHT', 64))
+        self.queue_timeout = getattr(settings, 'ADMISSION_QUEUE_TIMEOUT', 0.05)
+        self.rate_limits = getattr(settings, 'RATE_LIMITS', {'default': {'rate': 20, 'burst': 40}})
+        self.endpoint_classes = [(re.compile(pattern), endpoint_class)
+                                 for pattern, endpoint_class in getattr(settings, 'RATE_LIMIT_ENDPOINT_CLASSES', [])]
+        max_idle = max(limit['burst'] / limit['rate'] for limit in self.rate_limits.values())
+        store_path = getattr(settings, 'RATE_LIMIT_STORE_PATH', None)
+        self.store = SQLiteBucketStore(store_path, max_idle) if store_path else InMemoryBucketStore(max_idle)
+
+    def call(self, request):
+        if not self.enabled or not request.path.startswith(self.path_prefix):
+            return self.get_response(request)
+
+        rejected = self.check_rate_limit(request)
+        if rejected:
+            return rejected
+        if not self.in_flight.acquire(timeout=self.queue_timeout):
+            return self.reject_busy(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.in_flight.release()
+            raise
+        return self.release_when_closed(response)
+
+    async def __acall__(self, request):
+        if not self.enabled or not request.path.startswith(self.path_prefix):
+            return await self.get_response(request)
+
+        if isinstance(self.store, SQLiteBucketStore):
+            rejected = await sync_to_async(self.check_rate_limit, thread_sensitive=False)(request)
+        else:
+            rejected = self.check_rate_limit(request)
+        if rejected:
+            return rejected
+        if not await self.acquire_in_flight():
+            return self.reject_busy(request)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self.in_flight.release()
+            raise
+        return self.release_when_closed(response)
+
+    # A streaming body is produced after get_response returns, so its slot is released when the server closes the
+    # response, whether it was sent in full or the client went away. Event streams only wait on the shared poller and
+    # would hold a slot for as long as the client stays connected, so they give it back right away.
+    def release_when_closed(self, response: HttpResponseBase) -> HttpResponseBase:
+        if not response.streaming or response.get('Content-Type', '').startswith('text/event-stream'):
+            self.in_flight.release()
+        else:
+            response._resource_closers.append(self.in_flight.release)
+        return response
+
+    def check_rate_limit(self, request) -> JsonResponse | None:
+        endpoint_class = self.get_endpoint_class(request.path)
+        limit = self.rate_limits.get(endpoint_class, self.rate_limits['default'])
+        retry_after = self.store.consume(f"{self.get_client_key(request)}:{endpoint_class}", limit['rate'], limit['burst'])
+        if retry_after:
+            logging.warning("Rate limit exceeded for %s endpoint %s", endpoint_class, request.path)
+            return self.reject("Too many requests, try again later.", 429, retry_after)
+        return None
+
+    async def acquire_in_flight(self) -> bool:
+        deadline = time.monotonic() + self.queue_timeout
+        while not self.in_flight.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.001)
+        return True
+
+    def reject_busy(self, request) -> JsonResponse:
+        logging.warning("Rejected request to %s because the worker is saturated", request.path)
+        return self.reject("The server is busy, try again later.", 503, 1)
+
+    def get_endpoint_class(self, path: str) -> str:
+        for pattern, endpoint_class in self.endpoint_classes:
+            if pattern.search(path):
+                return endpoint_class
+        return 'default'
+
+    def get_client_key(self, request) -> str:
+        user = get_request_user(request)
+        if user:
+            return f"user:{user.username}"
+        return f"ip:{get_client_ip(request)}"
+
+    @staticmethod
+    def reject(message: str, status_code: int, retry_after: float) -> JsonResponse:
+        response = JsonResponse({"message": message}, status=status_code)
+        response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+class ReadReplicaMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.replica_alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+        self.read_paths = [re.compile(pattern) for pattern in getattr(settings, 'REPLICA_READ_PATHS', [])]
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+    def call(self, request):
+        if not self.replica_alias:
+            return self.get_response(request)
+
+        sticky_key = self.get_sticky_key(request)
+        if request.method not in ('GET', 'HEAD'):
+            response = self.get_response(request)
+            if response.status_code < 400:
+                cache.set(sticky_key, True, self.sticky_seconds)
+            return response
+
+        if (not self.is_read_path(request) or cache.get(sticky_key)
+                or not replica_health.is_usable(self.replica_alias)):
+            return self.get_response(request)
+
+        with reading_from(self.replica_alias):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self.replica_alias:
+            return await self.get_response(request)
+
+        sticky_key = self.get_sticky_key(request)
+        if request.method not in ('GET', 'HEAD'):
+            response = await self.get_response(request)
+            if response.status_code < 400:
+                await cache.aset(sticky_key, True, self.sticky_seconds)
+            return response
+
+        if (not self.is_read_path(request) or await cache.aget(sticky_key)
+                or not await replica_health.ais_usable(self.replica_alias)):
+            return await self.get_response(request)
+
+        with reading_from(self.replica_alias):
+            return await self.get_response(request)
+
+    # Stored in the shared cache so every worker sees the write; anonymous clients are keyed by their address as seen
+    # through the trusted proxies, like the rate limiter does.
+    def get_sticky_key(self, request) -> str:
+        user = get_request_user(request)
+        return f"replica:sticky:{f'user:{user.username}' if user else f'ip:{get_client_ip(request)}'}"
+
+    def is_read_path(self, request) -> bool:
+        return any(pattern.search(request.path) for pattern in self.read_paths)
+
+
+class RequestLogContextMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = getattr(settings, 'LOG_SUCCESS_SAMPLE_RATE', 1.0)
+
+    def call(self, request):
+        request_id, token = self.set_context(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_context.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request_id, token = self.set_context(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_context.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+    def set_context(self, request):
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        return request_id, request_context.set({
+            'request_id': request_id,
+            'sampled': self.sample_rate >= 1 or random.random() < self.sample_rate,
+        })
+
+
+# Queries are timed by a wrapper installed on every connection, reading the timer of the current request from a
+# context variable, so queries run by sync_to_async threads of an async request are counted as well.
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+connection_created.connect(install_query_timer)
+
+
+class RequestMetricsMiddleware(HybridMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        store_path = getattr(settings, 'METRICS_STORE_PATH', None)
+        self.metrics = RequestMetrics(SQLiteMetricsStore(store_path) if store_path else InMemoryMetricsStore(),
+                                      getattr(settings, 'METRICS_LATENCY_BUCKETS', [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]),
+                                      getattr(settings, 'METRICS_FLUSH_INTERVAL', 1))
+        self.auth_token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+
+    def call(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        if request.path == '/metrics':
+            return self.metrics_response(request)
+
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        started_at, timer = self.start(request)
+        token = current_query_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.finish(request, response, started_at, timer)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        if request.path == '/metrics':
+            return await sync_to_async(self.metrics_response, thread_sensitive=False)(request)
+
+        started_at, timer = self.start(request)
+        token = current_query_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_timer.reset(token)
+        return self.finish(request, response, started_at, timer)
+
+    @staticmethod
+    def start(request) -> tuple[float, QueryTimer]:
+        request.render_started_at = request.render_finished_at = None
+        return time.perf_counter(), QueryTimer()
+
+    def finish(self, request, response, started_at: float, timer: QueryTimer):
+        duration = time.perf_counter() - started_at
+        render = (request.render_finished_at - request.render_started_at) if request.render_finished_at else 0
+        response['Server-Timing'] = (f"db;dur={timer.duration * 1000:.1f}, render;dur={render * 1000:.1f}, "
+                                     f"total;dur={duration * 1000:.1f}")
+
+        route = request.resolver_match.view_name if request.resolver_match else 'unmatched'
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.count_streamed(request, response, response.streaming_content, route,
+                                                             started_at, timer)
+        else:
+            self.metrics.observe(route, request.method, response.status_code, duration, timer.count, timer.duration,
+                                 0 if response.streaming else len(response.content))
+        return response
+
+    def process_template_response(self, request, response):
+        request.render_started_at = time.perf_counter()
+        response.add_post_render_callback(lambda rendered: setattr(request, 'render_finished_at', time.perf_counter()))
+        return response
+
+    def count_streamed(self, request, response, content, route, started_at, timer):
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.metrics.observe(route, request.method, response.status_code, time.perf_counter() - started_at,
+                                 timer.count, timer.duration, size)
+
+    # Without METRICS_AUTH_TOKEN the metrics are only served in DEBUG.
+    def metrics_response(self, request) -> HttpResponse:
+        if not self.auth_token and not settings.DEBUG:
+            return HttpResponse(status=403)
+        if self.auth_token and request.headers.get('Authorization') != f"Bearer {self.auth_token}":
+            return HttpResponse(status=401)
+        return HttpResponse(self.metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class CompressionMiddleware(HybridMiddleware):
+    GZIP_RE = re.compile(r'\bgzip\b')
+    BROTLI_RE = re.compile(r'\bbr\b')
+    MAX_RANDOM_BYTES = 100
+    INCOMPRESSIBLE_CONTENT_TYPES = ('application/zip',)
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4)
+
+    def call(self, request):
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.has_header('Content-Encoding') or response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if response.get('Content-Type', '').startswith(self.INCOMPRESSIBLE_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.get_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_sequence(response.streaming_content, encoding)
+            elif encoding == 'br':
+                response.streaming_content = self.compress_brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(response.streaming_content,
+                                                               max_random_bytes=self.MAX_RANDOM_BYTES)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=self.brotli_quality)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.MAX_RANDOM_BYTES)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def get_encoding(self, request) -> str | None:
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli and self.BROTLI_RE.search(accept_encoding):
+            return 'br'
+        if self.GZIP_RE.search(accept_encoding):
+            return 'gzip'
+        return None
+
+    def compress_brotli_sequence(self, sequence):
+        compressor = brotli.Compressor(quality=self.brotli_quality)
+        for item in sequence:
+            chunk = compressor.process(item) + compressor.flush()
+            if chunk:
+                yield chunk
+        yield compressor.finish()
+
+    # Like Django's GZipMiddleware, every chunk of an async stream is a gzip member of its own; concatenated members
+    # are still a valid gzip body.
+    async def compress_async_sequence(self, sequence, encoding: str):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            async for item in sequence:
+                chunk = compressor.process(item) + compressor.flush()
+                if chunk:
+                    yield chunk
+            yield compressor.finish()
+        else:
+            async for item in sequence:
+                yield compress_string(item, max_random_bytes=self.MAX_RANDOM_BYTES)
@@ -1,3 +1,6 @@
+from rest_framework.permissions import BasePermission
+
+
 class Permissions:
     CREATE_CLIENT = "clients.add_client"
     VIEW_CLIENT = "clients.view_client"
@@ -12,4 +15,35 @@ class Permissions:
     CREATE_TRANSACTION = "transactions.add_transaction"
     VIEW_TRANSACTION = "transactions.view_transaction"
     UPDATE_TRANSACTION = "transactions.change_transaction"
-    DELETE_TRANSACTION = "transactions.delete_transaction"
\ No newline at end of file
+    DELETE_TRANSACTION = "transactions.delete_transaction"
+
+    # Append only: the position of each permission is its bit in the token mask
+    ALL = (
+        CREATE_CLIENT, VIEW_CLIENT, UPDATE_CLIENT, DELETE_CLIENT,
+        CREATE_PRODUCT, VIEW_PRODUCT, UPDATE_PRODUCT, DELETE_PRODUCT,
+        CREATE_TRANSACTION, VIEW_TRANSACTION, UPDATE_TRANSACTION, DELETE_TRANSACTION,
+    )
+
+    @staticmethod
+    def to_mask(permissions) -> int:
+        mask = 0
+        for bit, permission in enumerate(Permissions.ALL):
+            if permission in permissions:
+                mask |= 1 << bit
+        return mask
+
+    @staticmethod
+    def from_mask(mask: int) -> frozenset[str]:
+        return frozenset(permission for bit, permission in enumerate(Permissions.ALL) if mask & (1 << bit))
+
+
+class HasActionPermission(BasePermission):
+    message = "You don't have permissions to perform this action."
+
+    def has_permission(self, request, view):
+        if view.action in getattr(view, 'public_actions', ()):
+            return True
+        required_permissions = getattr(view, 'action_permissions', {}).get(view.action)
+        if required_permissions is None or not request.user or not request.user.is_authenticated:
+            return False
+        return all(permission in request.user.permissions for permission in required_permissions)
@@ -0,0 +1,73 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# A bucket left alone for max_idle seconds (the slowest burst / rate) is full again, so forgetting it changes nothing.
+class InMemoryBucketStore:
+    def __init__(self, max_idle: float = 3600, max_size: int = 100000):
+        self.max_idle = max_idle
+        self.max_size = max_size
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated_at = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            retry_after = 0 if tokens >= cost else (cost - tokens) / rate
+            self.buckets[key] = (tokens - cost if not retry_after else tokens, now)
+            self.evict(now)
+            return retry_after
+
+    def evict(self, now: float) -> None:
+        while self.buckets:
+            _, updated_at = next(iter(self.buckets.values()))
+            if updated_at > now - self.max_idle and len(self.buckets) <= self.max_size:
+                return
+            self.buckets.popitem(last=False)
+
+
+class SQLiteBucketStore:
+    def __init__(self, path: str, max_idle: float = 3600):
+        self.path = path
+        self.max_idle = max_idle
+        self.pruned_at = time.time()
+        self.local = threading.local()
+        with self.get_connection() as connection:
+            connection.execute("create table if not exists buckets (key text primary key, tokens real not null, "
+                               "updated_at real not null)")
+
+    def get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            connection.execute("pragma journal_mode=WAL")
+            connection.execute("pragma synchronous=OFF")
+            self.local.connection = connection
+        return connection
+
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        now = time.time()
+        connection = self.get_connection()
+        connection.execute("begin immediate")
+        try:
+            row = connection.execute("select tokens, updated_at from buckets where key = ?", (key,)).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+            retry_after = 0 if tokens >= cost else (cost - tokens) / rate
+            if not retry_after:
+                tokens -= cost
+            connection.execute("insert into buckets (key, tokens, updated_at) values (?, ?, ?) "
+                               "on conflict(key) do update set tokens = excluded.tokens, updated_at = excluded.updated_at",
+                               (key, tokens, now))
+            if now - self.pruned_at >= self.max_idle:
+                self.pruned_at = now
+                connection.execute("delete from buckets where updated_at <= ?", (now - self.max_idle,))
+            connection.execute("commit")
+        except Exception:
+            connection.execute("rollback")
+            raise
+        return retry_after
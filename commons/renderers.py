@@ -0,0 +1,62 @@
+import json
+from decimal import Decimal
+
+from rest_framework.utils import encoders
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+drf_default = encoders.JSONEncoder().default
+
+
+class PrerenderedJSON(bytes):
+    pass
+
+
+def default(obj):
+    if type(obj) is Decimal:
+        return float(obj)
+    return drf_default(obj)
+
+
+def dumps(data) -> bytes:
+    if orjson is None:
+        return json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False,
+                          separators=(',', ':')).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+    content = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def rows_to_json(fields: tuple[str, ...], rows) -> PrerenderedJSON:
+    return PrerenderedJSON(dumps([dict(zip(fields, row)) for row in rows]))
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            if isinstance(data, PrerenderedJSON):
+                data = json.loads(data)
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if isinstance(data, PrerenderedJSON):
+            return bytes(data)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,53 @@
+import math
+
+
+# Log-bucketed quantile sketch (DDSketch): every positive value is counted in bucket ceil(log_gamma(value)) and read
+# back with at most relative_accuracy relative error, so sketches are merged, and values removed, by adding counts.
+class QuantileSketch:
+    ZERO_KEY = -(2 ** 31)
+
+    def __init__(self, relative_accuracy: float = 0.01, buckets: dict[int, int] | None = None):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        for key, count in (buckets or {}).items():
+            self.add_to_bucket(key, count)
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def key(self, value: float) -> int:
+        if value <= 0:
+            return self.ZERO_KEY
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def value(self, key: int) -> float:
+        if key == self.ZERO_KEY:
+            return 0.0
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add_to_bucket(self, key: int, count: int) -> None:
+        count += self.buckets.get(key, 0)
+        if count:
+            self.buckets[key] = count
+        else:
+            self.buckets.pop(key, None)
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.add_to_bucket(self.key(value), count)
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        for key, count in other.buckets.items():
+            self.add_to_bucket(key, count)
+
+    def quantile(self, q: float) -> float | None:
+        count = self.count
+        if count <= 0:
+            return None
+        rank, seen = q * (count - 1), 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return self.value(key)
+        return self.value(max(self.buckets))
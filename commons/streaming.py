@@ -0,0 +1,25 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+# Pulls one chunk at a time from a sync iterator in the request's sync thread, where its queries run on the same
+# connection as the view's.
+async def iterate_in_thread(iterator):
+    iterator = iter(iterator)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    try:
+        while (chunk := await next_chunk(iterator, done)) is not done:
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+# Under ASGI Django consumes a sync streaming_content with sync_to_async(list) before sending anything, so the
+# body is handed over as an async iterator there and keeps being streamed chunk by chunk.
+def streaming_response(request, content, **kwargs) -> StreamingHttpResponse:
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = iterate_in_thread(content)
+    return StreamingHttpResponse(content, **kwargs)
@@ -0,0 +1,479 @@
+import gzip
+import io
+import json
+import logging
+import tempfile
+import threading
+import uuid
+from datetime import datetime, date, timezone
+from decimal import Decimal
+from unittest import mock
+
+import brotli
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction, OperationalError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, AsyncClient, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.import_time import STARTUP_IMPORT_BUDGET_MS, profile_startup, total_import_ms
+from commons.db_router import immediate_atomic, read_alias, replica_health, write_locks, ReplicaHealth
+from commons.group_commit import GroupCommitter, PendingWrite
+from commons.log import QueueLogHandler, request_context
+from commons.metrics import SQLiteMetricsStore
+from commons.middleware import AdmissionControlMiddleware, CompressionMiddleware, ReadReplicaMiddleware, \
+    RequestLogContextMiddleware, RequestMetricsMiddleware, StaticFilesMiddleware
+from commons.rate_limit import InMemoryBucketStore, SQLiteBucketStore
+from commons.renderers import FastJSONParser, FastJSONRenderer, rows_to_json
+from commons.sketches import QuantileSketch
+from sales_system.openapi import openapi_schema
+
+
+# Create your tests here.
+
+class AdmissionControlTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        self.token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+
+    @override_settings(RATE_LIMITS={'default': {'rate': 0.01, 'burst': 2}})
+    def test_rate_limit_returns_too_many_requests(self):
+        client = Client(headers={"authorization": self.token})
+        self.assertEqual(client.get("/api/products/").status_code, status.HTTP_200_OK)
+        self.assertEqual(client.get("/api/products/").status_code, status.HTTP_200_OK)
+        response = client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+
+    @override_settings(RATE_LIMITS={'default': {'rate': 100, 'burst': 100}, 'bulk': {'rate': 0.01, 'burst': 1}})
+    def test_rate_limit_is_per_endpoint_class(self):
+        client = Client(headers={"authorization": self.token})
+        bulk_request = {"clients": [{"document": "test", "name": "test", "last_name": "test", "email": "test@example.com"}]}
+        self.assertEqual(client.post("/api/clients/bulk/", bulk_request, content_type="application/json").status_code,
+                         status.HTTP_200_OK)
+        self.assertEqual(client.post("/api/clients/bulk/", bulk_request, content_type="application/json").status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(client.get("/api/products/").status_code, status.HTTP_200_OK)
+
+    def test_bulk_endpoints_use_the_bulk_class(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        self.assertEqual(middleware.get_endpoint_class("/api/clients/bulk/"), "bulk")
+        self.assertEqual(middleware.get_endpoint_class("/api/transactions/bulk-status/"), "bulk")
+        self.assertEqual(middleware.get_endpoint_class("/api/transactions/"), "default")
+
+    def test_invoice_batches_use_the_export_class(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        self.assertEqual(middleware.get_endpoint_class("/api/transactions/invoices/"), "export")
+        self.assertEqual(middleware.get_endpoint_class("/api/transactions/1/invoice/"), "default")
+
+    @override_settings(RATE_LIMITS={'default': {'rate': 0.01, 'burst': 1}}, CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_anonymous_clients_behind_the_proxy_get_their_own_bucket(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory(REMOTE_ADDR="10.0.0.1")
+        first = factory.post("/api/auth/login/", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        self.assertEqual(middleware(first).status_code, status.HTTP_200_OK)
+        self.assertEqual(middleware(first).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        spoofed = factory.post("/api/auth/login/", HTTP_X_FORWARDED_FOR="198.51.100.1, 203.0.113.7")
+        self.assertEqual(middleware(spoofed).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        second = factory.post("/api/auth/login/", HTTP_X_FORWARDED_FOR="203.0.113.8")
+        self.assertEqual(middleware(second).status_code, status.HTTP_200_OK)
+
+    @override_settings(ADMISSION_MAX_IN_FLIGHT=1, ADMISSION_QUEUE_TIMEOUT=0)
+    def test_saturated_worker_returns_service_unavailable(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get("/api/products/healthcheck/")
+        self.assertEqual(middleware(request).status_code, status.HTTP_200_OK)
+
+        middleware.in_flight.acquire()
+        response = middleware(request)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+
+    @override_settings(ADMISSION_MAX_IN_FLIGHT=1, ADMISSION_QUEUE_TIMEOUT=0)
+    def test_streaming_response_keeps_its_slot_until_closed(self):
+        middleware = AdmissionControlMiddleware(lambda request: StreamingHttpResponse(iter([b"chunk"])))
+        request = RequestFactory().get("/api/front/products/")
+        response = middleware(request)
+        self.assertEqual(middleware(request).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(b"".join(response.streaming_content), b"chunk")
+        response.close()
+        self.assertEqual(middleware(request).status_code, status.HTTP_200_OK)
+
+        events = AdmissionControlMiddleware(lambda request: StreamingHttpResponse(iter([]), content_type='text/event-stream'))
+        events(request)
+        self.assertEqual(events(request).status_code, status.HTTP_200_OK)
+
+
+@override_settings(REPLICA_DATABASE_ALIAS='default', REPLICA_HEALTH_CHECK_INTERVAL=0)
+class ReadReplicaTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        self.token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.middleware = ReadReplicaMiddleware(lambda request: HttpResponse(read_alias.get() or ''))
+        self.factory = RequestFactory(headers={"authorization": self.token})
+
+    def test_list_reads_go_to_replica(self):
+        with mock.patch.object(replica_health, 'is_usable', return_value=True):
+            self.assertEqual(self.middleware(self.factory.get("/api/products/")).content, b"default")
+            self.assertEqual(self.middleware(self.factory.get("/api/products/healthcheck/")).content, b"")
+        self.assertIsNone(read_alias.get())
+
+    def test_reads_stick_to_primary_after_write(self):
+        with mock.patch.object(replica_health, 'is_usable', return_value=True):
+            self.middleware(self.factory.post("/api/products/"))
+            self.assertEqual(self.middleware(self.factory.get("/api/products/")).content, b"")
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_anonymous_clients_behind_the_proxy_stick_separately(self):
+        factory = RequestFactory(REMOTE_ADDR="10.0.0.1")
+        with mock.patch.object(replica_health, 'is_usable', return_value=True):
+            self.middleware(factory.post("/api/auth/login/", HTTP_X_FORWARDED_FOR="203.0.113.7"))
+            self.assertEqual(self.middleware(factory.get("/api/products/", HTTP_X_FORWARDED_FOR="203.0.113.7")).content,
+                             b"")
+            self.assertEqual(self.middleware(factory.get("/api/products/", HTTP_X_FORWARDED_FOR="203.0.113.8")).content,
+                             b"default")
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"create table {ReplicaHealth.HEARTBEAT_TABLE} (id integer primary key, beat_at real not null)")
+            cursor.execute(f"insert into {ReplicaHealth.HEARTBEAT_TABLE} (id, beat_at) values (1, 0)")
+        self.assertEqual(self.middleware(self.factory.get("/api/products/")).content, b"")
+
+    def test_missing_heartbeat_falls_back_to_primary(self):
+        self.assertEqual(ReplicaHealth().get_lag('default'), float('inf'))
+
+
+class RequestLoggingTestCase(TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = QueueLogHandler(stream=self.stream)
+        self.logger = logging.getLogger('commons.tests.request_logging')
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+    def get_records(self) -> list[dict]:
+        self.handler.close()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_records_are_structured_and_carry_request_id(self):
+        token = request_context.set({'request_id': 'abc', 'sampled': True})
+        try:
+            self.logger.warning("Calling service with user %s", "test", extra={'endpoint': 'products'})
+        finally:
+            request_context.reset(token)
+        record, = self.get_records()
+        self.assertEqual(record["message"], "Calling service with user test")
+        self.assertEqual(record["request_id"], "abc")
+        self.assertEqual(record["endpoint"], "products")
+
+    def test_unsampled_requests_only_keep_warnings(self):
+        token = request_context.set({'request_id': 'abc', 'sampled': False})
+        try:
+            self.logger.info("Called successfully")
+            self.logger.warning("Slow response")
+            self.logger.error("There was an error")
+        finally:
+            request_context.reset(token)
+        self.assertEqual([record["level"] for record in self.get_records()], ["WARNING", "ERROR"])
+
+    @override_settings(LOG_SUCCESS_SAMPLE_RATE=0)
+    def test_middleware_sets_request_id(self):
+        seen = []
+        middleware = RequestLogContextMiddleware(lambda request: seen.append(request_context.get()) or HttpResponse())
+        response = middleware(RequestFactory().get("/api/products/", headers={"X-Request-ID": "abc"}))
+        self.assertEqual(response["X-Request-ID"], "abc")
+        self.assertEqual(seen, [{'request_id': 'abc', 'sampled': False}])
+        self.assertIsNone(request_context.get())
+
+
+@override_settings(DEBUG=True)
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        self.token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+
+    @override_settings(METRICS_FLUSH_INTERVAL=0)
+    def test_metrics_are_exposed_per_route(self):
+        client = Client(headers={"authorization": self.token})
+        response = client.get("/api/products/")
+        self.assertRegex(response["Server-Timing"], r"^db;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$")
+
+        metrics = client.get("/metrics")
+        self.assertEqual(metrics.status_code, status.HTTP_200_OK)
+        self.assertIn('http_requests_total{route="products-list",method="GET",status="200"} 1',
+                      metrics.content.decode())
+        self.assertIn('http_request_duration_seconds_bucket{route="products-list",method="GET",le="+Inf"} 1',
+                      metrics.content.decode())
+        self.assertRegex(metrics.content.decode(),
+                         r'http_request_db_queries_total\{route="products-list",method="GET"\} [1-9]')
+
+    @override_settings(ROOT_URLCONF='sales_system.async_urls', METRICS_FLUSH_INTERVAL=0)
+    def test_async_requests_run_through_native_async_middleware(self):
+        async def view(request):
+            return HttpResponse("x" * 2048)
+
+        for middleware_class in (StaticFilesMiddleware, CompressionMiddleware, RequestMetricsMiddleware,
+                                 RequestLogContextMiddleware, AdmissionControlMiddleware, ReadReplicaMiddleware):
+            middleware = middleware_class(view)
+            self.assertTrue(iscoroutinefunction(middleware), middleware_class.__name__)
+            self.assertEqual(async_to_sync(middleware)(RequestFactory().get("/api/products/")).status_code,
+                             status.HTTP_200_OK)
+
+        client = AsyncClient()
+        response = async_to_sync(client.get)("/api/products/", headers={"authorization": self.token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("X-Request-ID", response)
+        self.assertRegex(response["Server-Timing"], r"^db;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$")
+        self.assertRegex(async_to_sync(client.get)("/metrics").content.decode(),
+                         r'http_request_db_queries_total\{route="[^"]+",method="GET"\} [1-9]')
+
+    @override_settings(METRICS_AUTH_TOKEN='secret')
+    def test_metrics_require_token_when_configured(self):
+        self.assertEqual(Client().get("/metrics").status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Client(headers={"authorization": "Bearer secret"}).get("/metrics").status_code,
+                         status.HTTP_200_OK)
+
+    @override_settings(DEBUG=False)
+    def test_metrics_require_token_outside_debug(self):
+        self.assertEqual(Client().get("/metrics").status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sqlite_store_aggregates_workers(self):
+        path = tempfile.mktemp(suffix=".sqlite3")
+        sample = {('http_requests_total', (('route', 'products-list'),)): 1}
+        SQLiteMetricsStore(path).add(sample)
+        SQLiteMetricsStore(path).add(sample)
+        self.assertEqual(SQLiteMetricsStore(path).collect(), {('http_requests_total', (('route', 'products-list'),)): 2})
+
+
+class FastJSONRendererTestCase(TestCase):
+    data = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "price": Decimal("15000.50"),
+        "created_date": datetime(2024, 5, 1, 10, 30, 15, 123456),
+        "updated_at": datetime(2024, 5, 1, 10, 30, 15, tzinfo=timezone.utc),
+        "day": date(2024, 5, 1),
+        "name": "Cañón \u2028 \"quoted\"",
+        "selling_by_products": {"Producto": Decimal("1.10"), 1: None},
+        "products": [{"quantity": 2, "total": 3.5, "active": True}],
+    }
+
+    def test_output_is_byte_compatible_with_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+        self.assertEqual(FastJSONRenderer().render(None), JSONRenderer().render(None))
+
+    def test_rows_are_rendered_without_intermediate_serialization(self):
+        rows = [(1, "Producto", Decimal("10.00")), (2, "Otro", Decimal("0.50"))]
+        expected = JSONRenderer().render([dict(zip(("id", "name", "price"), row)) for row in rows])
+        self.assertEqual(FastJSONRenderer().render(rows_to_json(("id", "name", "price"), rows)), expected)
+        self.assertEqual(FastJSONRenderer().render(rows_to_json(("id", "name", "price"), rows), "application/json; indent=4"),
+                         JSONRenderer().render(json.loads(expected), "application/json; indent=4"))
+
+    def test_parser(self):
+        self.assertEqual(FastJSONParser().parse(io.BytesIO('{"name": "Cañón", "price": 1.5}'.encode())),
+                         {"name": "Cañón", "price": 1.5})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+
+class OpenAPISchemaTestCase(TestCase):
+    def test_committed_schema_is_up_to_date(self):
+        self.assertFalse(openapi_schema.is_stale(), "Run python manage.py generate_openapi_schema")
+
+    def test_schema_is_served_with_etag(self):
+        response = Client().get("/swagger.json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, openapi_schema.path.read_bytes())
+        self.assertEqual(Client().get("/swagger.json", headers={"If-None-Match": response["ETag"]}).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(Client().get("/swagger/?format=openapi").content, response.content)
+
+
+class CompressionTestCase(TestCase):
+    def test_large_responses_are_compressed(self):
+        plain = Client().get("/swagger.json")
+        gzipped = Client(headers={"accept-encoding": "gzip"}).get("/swagger.json")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzipped["ETag"], "W/" + plain["ETag"])
+        self.assertIn("Accept-Encoding", gzipped["Vary"])
+        self.assertEqual(gzip.decompress(gzipped.content), plain.content)
+
+        brotli_response = Client(headers={"accept-encoding": "gzip, deflate, br"}).get("/swagger.json")
+        self.assertEqual(brotli_response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(brotli_response.content), plain.content)
+        self.assertEqual(int(brotli_response["Content-Length"]), len(brotli_response.content))
+        self.assertLess(len(brotli_response.content), len(plain.content) / 4)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1024)
+    def test_small_responses_are_not_compressed(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+        response = CompressionMiddleware(lambda request: HttpResponse(b"x" * 1023))(request)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, b"x" * 1023)
+
+    def test_streaming_responses_are_compressed_incrementally(self):
+        chunks = [b'{"id": %d, "name": "Producto"}\n' % i for i in range(100)]
+        for encoding, decompress in (("gzip", gzip.decompress), ("br", brotli.decompress)):
+            request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=encoding)
+            response = CompressionMiddleware(lambda request: StreamingHttpResponse(iter(chunks)))(request)
+            self.assertEqual(response["Content-Encoding"], encoding)
+            self.assertFalse(response.has_header("Content-Length"))
+            streamed = list(response.streaming_content)
+            self.assertGreater(len(streamed), 1)
+            self.assertEqual(decompress(b"".join(streamed)), b"".join(chunks))
+
+    def test_async_streaming_responses_are_compressed_except_event_streams(self):
+        chunks = [b'<tr><td>Producto %d</td></tr>\n' % i for i in range(100)]
+
+        async def content():
+            for chunk in chunks:
+                yield chunk
+
+        async def stream(encoding: str, content_type: str):
+            request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=encoding)
+            response = CompressionMiddleware(lambda request: StreamingHttpResponse(content(), content_type=content_type))(request)
+            return response, b"".join([chunk async for chunk in response.streaming_content])
+
+        for encoding, decompress in (("gzip", gzip.decompress), ("br", brotli.decompress)):
+            response, body = async_to_sync(stream)(encoding, "text/html")
+            self.assertEqual(response["Content-Encoding"], encoding)
+            self.assertEqual(decompress(body), b"".join(chunks))
+        response, body = async_to_sync(stream)("gzip", "text/event-stream")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(body, b"".join(chunks))
+
+
+class QuantileSketchTestCase(TestCase):
+    def test_merged_sketches_match_a_single_sketch_within_accuracy(self):
+        values = [(number * 7919) % 100000 / 10 + 1 for number in range(10000)]
+        whole, first, second = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in values:
+            whole.add(value)
+        for value in values[:3000]:
+            first.add(value)
+        for value in values[3000:]:
+            second.add(value)
+        merged = QuantileSketch(buckets=first.buckets)
+        merged.merge(second)
+        self.assertEqual(merged.buckets, whole.buckets)
+
+        ordered = sorted(values)
+        for q in (0.0, 0.5, 0.95, 0.99, 1.0):
+            expected = ordered[int(q * (len(ordered) - 1))]
+            self.assertLessEqual(abs(whole.quantile(q) - expected), expected * 0.01 + 1e-9)
+
+        for value in values[3000:]:
+            whole.add(value, -1)
+        self.assertEqual(whole.buckets, first.buckets)
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+
+class ImmediateAtomicTestCase(TransactionTestCase):
+    def test_only_write_blocks_begin_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                User.objects.count()
+            with immediate_atomic():
+                User.objects.create_user('writer')
+                with immediate_atomic():
+                    User.objects.count()
+        self.assertEqual([query['sql'] for query in queries if query['sql'].startswith('BEGIN')],
+                         ['BEGIN', 'BEGIN IMMEDIATE'])
+        self.assertIsNone(connection.transaction_mode)
+
+    def test_writers_of_a_worker_wait_for_the_lock_up_to_the_timeout(self):
+        with mock.patch.dict(connection.settings_dict['OPTIONS'], {'timeout': 0.01}), write_locks['default']:
+            with self.assertRaisesMessage(OperationalError, "database is locked"):
+                with immediate_atomic():
+                    pass
+        with immediate_atomic():
+            User.objects.create_user('writer')
+        self.assertTrue(User.objects.filter(username='writer').exists())
+
+
+class GroupCommitterTestCase(TestCase):
+    def test_failed_write_only_rolls_back_its_savepoint(self):
+        def create(name):
+            return User.objects.create_user(name).username
+
+        def fail():
+            User.objects.create_user('rolled-back')
+            raise ValueError("fallo")
+
+        batch = [PendingWrite(lambda: create('first')), PendingWrite(fail), PendingWrite(lambda: create('second'))]
+        GroupCommitter().commit(batch)
+        self.assertTrue(all(write.done for write in batch))
+        self.assertEqual(batch[0].get(), 'first')
+        self.assertEqual(batch[2].get(), 'second')
+        with self.assertRaisesMessage(ValueError, "fallo"):
+            batch[1].get()
+        self.assertCountEqual(User.objects.values_list('username', flat=True), ['first', 'second'])
+
+    def test_writes_inside_an_atomic_block_are_not_deferred(self):
+        self.assertTrue(connection.in_atomic_block)
+        self.assertEqual(GroupCommitter().submit(lambda: 42), 42)
+
+
+class StartupImportTestCase(TestCase):
+    DEFERRED_MODULES = ('reportlab', 'drf_yasg.generators', 'drf_yasg.views', 'drf_yasg.codecs', 'numpy')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.imports = profile_startup()
+
+    def test_worker_startup_defers_heavy_modules(self):
+        imported = {name for name, _, _ in self.imports}
+        for module in self.DEFERRED_MODULES:
+            self.assertNotIn(module, imported, f"{module} must be imported lazily by the code that needs it")
+
+    def test_worker_startup_imports_fit_the_budget(self):
+        self.assertLessEqual(total_import_ms(self.imports), STARTUP_IMPORT_BUDGET_MS,
+                             "Run python -m benchmarks.import_time to see the slowest imports")
+
+
+class BucketStoreTestCase(TestCase):
+    def test_in_memory_bucket_store(self):
+        store = InMemoryBucketStore()
+        self.assertEqual(store.consume("key", 1, 2), 0)
+        self.assertEqual(store.consume("key", 1, 2), 0)
+        self.assertGreater(store.consume("key", 1, 2), 0)
+        self.assertEqual(store.consume("other", 1, 2), 0)
+
+    def test_in_memory_bucket_store_evicts_idle_buckets(self):
+        store = InMemoryBucketStore(max_idle=60, max_size=3)
+        with mock.patch("commons.rate_limit.time.monotonic", return_value=1000):
+            for key in ("first", "second", "third"):
+                store.consume(key, 1, 2)
+        with mock.patch("commons.rate_limit.time.monotonic", return_value=1030):
+            store.consume("fourth", 1, 2)
+        self.assertEqual(list(store.buckets), ["second", "third", "fourth"])
+        with mock.patch("commons.rate_limit.time.monotonic", return_value=1080):
+            store.consume("fourth", 1, 2)
+        self.assertEqual(list(store.buckets), ["fourth"])
+
+    def test_sqlite_bucket_store_is_shared(self):
+        with tempfile.NamedTemporaryFile(suffix=".sqlite3") as store_file:
+            first_store = SQLiteBucketStore(store_file.name)
+            second_store = SQLiteBucketStore(store_file.name)
+            self.assertEqual(first_store.consume("key", 0.01, 2), 0)
+            self.assertEqual(second_store.consume("key", 0.01, 2), 0)
+            self.assertGreater(first_store.consume("key", 0.01, 2), 0)
+
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(second_store.consume("threads", 0.01, 5)))
+                       for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results.count(0), 5)
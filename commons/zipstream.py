@@ -0,0 +1,28 @@
+import zipfile
+
+
+class ChunkSink:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> list[bytes]:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+# Writes the archive to a sink without seek() or tell(), so zipfile streams every member with a data descriptor
+# and the chunks can be sent as soon as each member is added.
+def stream_zip(files):
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield from sink.drain()
+    yield from sink.drain()
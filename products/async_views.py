@@ -0,0 +1,44 @@
+from commons.async_views import async_read_view, json_response
+from commons.permissions import Permissions
+from commons.renderers import rows_to_json
+from products.models import Product
+from products.serializers import RelatedProductQuerySerializer
+from products.services import ProductService, RelatedProductService
+from products.views import ProductView
+import logging
+
+product_list_view = ProductView.as_view({'get': 'list', 'post': 'create'})
+product_detail_view = ProductView.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'})
+product_related_view = ProductView.as_view({'get': 'related'})
+product_service = ProductService()
+related_product_service = RelatedProductService()
+
+
+@async_read_view(Permissions.VIEW_PRODUCT, product_list_view)
+async def list_products(request, user):
+    logging.info("Calling async list products service with user %s", user.username)
+    return json_response(rows_to_json(ProductService.PRODUCT_FIELDS,
+                                      [row async for row in product_service.get_all_product_values()]))
+
+
+@async_read_view(Permissions.VIEW_PRODUCT, product_detail_view)
+async def retrieve_product(request, user, pk):
+    logging.info("Calling async retrieve product service with user %s", user.username)
+    try:
+        return json_response((await Product.objects.aget(id=pk)).to_dict())
+    except Product.DoesNotExist:
+        logging.error("There was an error retrieving product service with user %s", user.username)
+        return json_response({"error": "Product not found"}, 404)
+
+
+@async_read_view(Permissions.VIEW_PRODUCT, product_related_view)
+async def related_products(request, user, pk):
+    logging.info("Calling async related products service with user %s", user.username)
+    query_serializer = RelatedProductQuerySerializer(data=request.GET)
+    if not query_serializer.is_valid():
+        return json_response(query_serializer.errors, 400)
+    rows = [row async for row in related_product_service.get_related(pk, query_serializer.validated_data['limit'])]
+    if not rows and not await Product.objects.filter(id=pk).aexists():
+        logging.error("There was an error retrieving related products service with user %s", user.username)
+        return json_response({"error": "Product not found"}, 404)
+    return json_response(rows_to_json(RelatedProductService.RESPONSE_FIELDS, rows))
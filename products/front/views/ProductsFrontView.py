@@ -1,47 +1,65 @@
 from django.shortcuts import redirect
 from rest_framework.decorators import action
-from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.viewsets import ViewSet
-import requests
 
-class ProductsFrontView(ViewSet):
-    renderer_classes = [TemplateHTMLRenderer]
+from commons.front import FrontViewSet
+from commons.permissions import Permissions
+from products.models import Product
+from products.serializers import ProductRequestSerializer
+from products.services import ProductService
+
+class ProductsFrontView(FrontViewSet):
+    product_service = ProductService()
 
     def list(self, request):
-        response = requests.get(request.build_absolute_uri('/api/products/'), headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return Response({'products': response.json(), 'token': request.GET.get('token')} ,template_name='products/front/templates/products.html')
+        if not self.has_token_permission(request, Permissions.VIEW_PRODUCT):
+            return self.forbidden()
+        page = self.get_page(request, self.product_service.get_all_product_rows())
+        return self.stream_page(request, 'products/front/templates/products.html', {'token': request.GET.get('token')},
+                                'products/front/templates/product_row.html', 'product', page)
 
     @action(detail=False, methods=['GET'], url_path='update')
     def update_view(self, request):
-        response = requests.get(request.build_absolute_uri(f"/api/products/{request.GET.get('id')}"), headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return Response({'product': response.json(), 'token': request.GET.get('token')} ,template_name='products/front/templates/update.html')
+        if not self.has_token_permission(request, Permissions.VIEW_PRODUCT):
+            return self.forbidden()
+        try:
+            product = self.product_service.get_product_by_id(request.GET.get('id'))
+        except (Product.DoesNotExist, ValueError):
+            return self.forbidden()
+        return Response({'product': product.to_dict(), 'token': request.GET.get('token')} ,template_name='products/front/templates/update.html')
 
     @action(detail=False, methods=['POST'], url_path='update-product')
     def update_product(self, request):
-        response = requests.put(request.build_absolute_uri(f"/api/products/{request.GET.get('id')}/"),
-                                headers={'authorization': request.GET.get('token')},
-                                data=request.data)
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        if not self.has_token_permission(request, Permissions.UPDATE_PRODUCT):
+            return self.forbidden()
+        try:
+            product_request_serializer = ProductRequestSerializer(data=request.data)
+            product_request_serializer.is_valid(raise_exception=True)
+            product: Product = product_request_serializer.create(product_request_serializer.data)
+            product.id = request.GET.get('id')
+            self.product_service.update_product(product)
+        except (ValidationError, Product.DoesNotExist, ValueError):
+            return self.forbidden()
         return redirect(f"/api/front/products/?token={request.GET.get('token')}")
 
     def create(self, request):
-        response = requests.post(request.build_absolute_uri(f"/api/products/"),
-                                headers={'authorization': request.GET.get('token')},
-                                data=request.data)
-        if response.status_code != 201:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        if not self.has_token_permission(request, Permissions.CREATE_PRODUCT):
+            return self.forbidden()
+        try:
+            product_request_serializer = ProductRequestSerializer(data=request.data)
+            product_request_serializer.is_valid(raise_exception=True)
+            self.product_service.create_product(product_request_serializer.create(product_request_serializer.data))
+        except ValidationError:
+            return self.forbidden()
         return redirect(f"/api/front/products/?token={request.GET.get('token')}")
 
     @action(detail=False, methods=['GET'], url_path='delete')
     def delete_view(self, request):
-        response = requests.delete(request.build_absolute_uri(f"/api/products/{request.GET.get('id')}/"),
-                                headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return redirect(f"/api/front/products/?token={request.GET.get('token')}")
\ No newline at end of file
+        if not self.has_token_permission(request, Permissions.DELETE_PRODUCT):
+            return self.forbidden()
+        try:
+            self.product_service.delete_product(request.GET.get('id'))
+        except (Product.DoesNotExist, ValueError):
+            return self.forbidden()
+        return redirect(f"/api/front/products/?token={request.GET.get('token')}")
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'db_table': 'related_products',
+                'indexes': [models.Index(fields=['product', '-count'], name='related_products_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'related'), name='unique_related_product')],
+            },
+        ),
+    ]
@@ -22,4 +22,14 @@ class Product(models.Model):
             'subcategory': self.subcategory,
             'price': self.price,
             'quantity': self.quantity,
-        }
\ No newline at end of file
+        }
+
+class RelatedProduct(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'related_products'
+        constraints = [models.UniqueConstraint(fields=['product', 'related'], name='unique_related_product')]
+        indexes = [models.Index(fields=['product', '-count'], name='related_products_top_idx')]
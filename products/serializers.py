@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from products.models import Product
@@ -19,4 +20,13 @@ class ProductDataSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def map_to_entity(self, data) -> Product:
-        return Product(**data)
\ No newline at end of file
+        return Product(**data)
+
+class RelatedProductQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=settings.RELATED_PRODUCTS_MAX_LIMIT,
+                                     default=settings.RELATED_PRODUCTS_LIMIT)
+
+class RelatedProductSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    count = serializers.IntegerField()
@@ -1,10 +1,17 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, router
 from django.db.models import QuerySet
 
-from products.models import Product
+from commons.db_router import immediate_atomic
+from products.models import Product, RelatedProduct
 from products.serializers import ProductDataSerializer
 import logging
 
 class ProductService:
+    PRODUCT_FIELDS = ('id', 'name', 'category', 'subcategory', 'price', 'quantity')
+
     def create_product(self, product: Product) -> Product:
         data_serializer = ProductDataSerializer(data=product.to_dict())
         if data_serializer.is_valid(raise_exception=True):
@@ -12,7 +19,7 @@ class ProductService:
             data_saved = data_serializer.data
             return data_serializer.map_to_entity(data_saved)
 
-        logging.error(f"There was an error when saving product with data {product.to_dict()}")
+        logging.error("There was an error when saving product with data %s", product.to_dict())
         raise Exception("Ocurrio un error al guardar el producto")
 
     def get_product_by_id(self, product_id: int) -> Product:
@@ -21,6 +28,12 @@ class ProductService:
     def get_all_products(self) -> QuerySet:
         return Product.objects.all()
 
+    def get_all_product_rows(self) -> QuerySet:
+        return Product.objects.order_by('id').values(*self.PRODUCT_FIELDS)
+
+    def get_all_product_values(self) -> QuerySet:
+        return Product.objects.order_by('id').values_list(*self.PRODUCT_FIELDS)
+
     def get_product_to_update(self, old_product: Product, product_to_update: Product) -> Product:
         old_product.name = product_to_update.name
         old_product.price = product_to_update.price
@@ -40,4 +53,44 @@ class ProductService:
 
     def delete_product(self, product_id: int) -> None:
         product = self.get_product_by_id(product_id)
-        product.delete()
\ No newline at end of file
+        product.delete()
+
+class RelatedProductService:
+    RELATED_FIELDS = ('related_id', 'related__name', 'count')
+    RESPONSE_FIELDS = ('id', 'name', 'count')
+
+    def get_increments(self, baskets, sign: int = 1) -> dict[tuple[int, int], int]:
+        increments = defaultdict(int)
+        for basket in baskets:
+            product_ids = set(basket)
+            if len(product_ids) > settings.RELATED_PRODUCTS_MAX_BASKET_SIZE:
+                continue
+            for product_id in product_ids:
+                for related_id in product_ids:
+                    if product_id != related_id:
+                        increments[(product_id, related_id)] += sign
+        return increments
+
+    def record(self, baskets, sign: int = 1) -> None:
+        increments = self.get_increments(baskets, sign)
+        if not increments:
+            return
+        connection = connections[router.db_for_write(RelatedProduct)]
+        table, count = (connection.ops.quote_name(name) for name in (RelatedProduct._meta.db_table, 'count'))
+        with connection.cursor() as cursor:
+            cursor.executemany(f"insert into {table} (product_id, related_id, {count}) values (%s, %s, %s) "
+                               f"on conflict (product_id, related_id) do update set {count} = {table}.{count} + excluded.{count}",
+                               [(*pair, count) for pair, count in increments.items()])
+
+    def rebuild(self, baskets) -> int:
+        increments = self.get_increments(baskets)
+        with immediate_atomic():
+            RelatedProduct.objects.all().delete()
+            RelatedProduct.objects.bulk_create([RelatedProduct(product_id=product_id, related_id=related_id, count=count)
+                                                for (product_id, related_id), count in increments.items() if count > 0],
+                                               batch_size=1000)
+        return len(increments)
+
+    def get_related(self, product_id: int, limit: int) -> QuerySet:
+        return (RelatedProduct.objects.filter(product_id=product_id, count__gt=0).order_by('-count')
+                .values_list(*self.RELATED_FIELDS)[:limit])
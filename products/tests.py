@@ -1,10 +1,18 @@
+import io
 from decimal import Decimal
+from unittest import mock
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth.models import User
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, AsyncClient, override_settings
 from rest_framework import status
 
-from products.models import Product
+import clients.models
+from commons.db_router import read_alias, replica_health
+from products.models import Product, RelatedProduct
 from products.services import ProductService
 
 
@@ -109,3 +117,112 @@ class ProductTestCase(TestCase):
 
         with self.assertRaises(Product.DoesNotExist):
             Product.objects.get(id=product_id)
+
+    def test_front_list_products_successfully(self):
+        Product.objects.create(
+            name="Another Product",
+            category="Another Category",
+            subcategory="Another Subcategory",
+            price=25000.00,
+            quantity=15
+        )
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+
+        response = Client().get(f"/api/front/products/?token={token}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Another Product", content)
+        self.assertIn(f"update/?id=1&token={token}", content)
+        self.assertIn("Pagina 1 de 1", content)
+
+    def test_front_rows_only_get_the_token_in_their_links(self):
+        for name in ("%TOKEN%", "<%TOKEN%>"):
+            Product.objects.create(name=name, category="Test", subcategory="Test", price=1000, quantity=1)
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+
+        content = b"".join(Client().get(f"/api/front/products/?token={token}").streaming_content).decode()
+        self.assertEqual(content.count(token), content.count("&token=") + content.count("?token="))
+        self.assertIn("%TOKEN%", content)
+        self.assertIn("&lt;%TOKEN%&gt;", content)
+
+    @override_settings(REPLICA_DATABASE_ALIAS='default')
+    def test_front_rows_are_read_from_the_replica_and_streamed_under_asgi(self):
+        Product.objects.create(name="Another Product", category="Test", subcategory="Test", price=1000, quantity=1)
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        cache.clear()
+        aliases = []
+
+        def record_alias(execute, sql, params, many, context):
+            if 'FROM "products"' in sql:
+                aliases.append(read_alias.get())
+            return execute(sql, params, many, context)
+
+        async def get():
+            response = await AsyncClient().get(f"/api/front/products/?token={token}")
+            return response, b"".join([chunk async for chunk in response.streaming_content])
+
+        with mock.patch.object(replica_health, 'is_usable', return_value=True), \
+                connection.execute_wrapper(record_alias):
+            content = b"".join(Client().get(f"/api/front/products/?token={token}").streaming_content)
+            response, async_content = async_to_sync(get)()
+        self.assertIn(b"Another Product", content)
+        self.assertTrue(response.is_async)
+        self.assertEqual(async_content, content)
+        self.assertEqual(set(aliases), {'default'})
+
+    def test_front_list_products_without_token_is_forbidden(self):
+        response = Client().get("/api/front/products/")
+        self.assertTemplateUsed(response, 'auth/front/templates/forbidden.html')
+
+
+class RelatedProductTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.client = Client(headers={"authorization": token})
+        self.products = [Product.objects.create(name=f"Producto {number}", category="Test", subcategory="Test",
+                                                price=Decimal(1000), quantity=100) for number in range(4)]
+        clients.models.Client.objects.create(document="test", name="test", last_name="test", email="test@example.com")
+        self.transaction_ids = [self.buy(0, 1, 2), self.buy(0, 1), self.buy(0, 1), self.buy(0, 3), self.buy(2)]
+
+    def buy(self, *positions) -> str:
+        response = self.client.post("/api/transactions/", {
+            "client": "test",
+            "products": [{"product": self.products[position].id, "quantity": 1} for position in positions],
+            "payment_method": "cash",
+            "status": "PAGADO",
+        }, content_type="application/json")
+        return response.json()["id"]
+
+    def related(self, position: int, query: str = "") -> list[tuple]:
+        response = self.client.get(f"/api/products/{self.products[position].id}/related/{query}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row["name"], row["count"]) for row in response.json()]
+
+    def test_related_products_are_counted_on_each_sale(self):
+        related = self.related(0)
+        self.assertEqual(related[0], ("Producto 1", 3))
+        self.assertCountEqual(related[1:], [("Producto 2", 1), ("Producto 3", 1)])
+        self.assertEqual(self.related(1, "?limit=1"), [("Producto 0", 3)])
+        self.assertEqual(self.related(3), [("Producto 0", 1)])
+
+        self.client.delete(f"/api/transactions/{self.transaction_ids[3]}/")
+        self.assertEqual(self.related(3), [])
+        pairs = sorted(RelatedProduct.objects.filter(count__gt=0).values_list('product_id', 'related_id', 'count'))
+        call_command("rebuild_related_products", stdout=io.StringIO())
+        self.assertEqual(sorted(RelatedProduct.objects.values_list('product_id', 'related_id', 'count')), pairs)
+
+        with override_settings(ROOT_URLCONF='sales_system.async_urls'):
+            response = async_to_sync(AsyncClient().get)(f"/api/products/{self.products[1].id}/related/",
+                                                        headers={"authorization": self.client.defaults["HTTP_AUTHORIZATION"]})
+        self.assertEqual(response.json(), self.client.get(f"/api/products/{self.products[1].id}/related/").json())
+
+    def test_related_products_are_removed_with_the_product(self):
+        self.assertEqual(self.client.delete(f"/api/products/{self.products[1].id}/").status_code, status.HTTP_200_OK)
+        self.assertNotIn("Producto 1", [name for name, _ in self.related(0)])
+        self.assertFalse(RelatedProduct.objects.filter(product_id=self.products[1].id).exists())
+
+    def test_related_products_of_unknown_product_is_not_found(self):
+        self.assertEqual(self.client.get("/api/products/999/related/").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(f"/api/products/{self.products[0].id}/related/?limit=0").status_code,
+                         status.HTTP_400_BAD_REQUEST)
@@ -9,20 +9,32 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
-from commons.jwt_utils import JWTUtils
-from commons.permissions import Permissions
+from commons.authentication import JWTAuthentication
+from commons.permissions import Permissions, HasActionPermission
+from commons.renderers import rows_to_json
 from products.models import Product
-from products.serializers import ProductRequestSerializer, ProductDataSerializer
-from products.services import ProductService
+from products.serializers import ProductRequestSerializer, ProductDataSerializer, RelatedProductQuerySerializer, \
+    RelatedProductSerializer
+from products.services import ProductService, RelatedProductService
 import logging
 
 
 class ProductView(ViewSet):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [HasActionPermission]
+    public_actions = ('healthcheck',)
+    action_permissions = {
+        'create': (Permissions.CREATE_PRODUCT,),
+        'retrieve': (Permissions.VIEW_PRODUCT,),
+        'list': (Permissions.VIEW_PRODUCT,),
+        'update': (Permissions.UPDATE_PRODUCT,),
+        'destroy': (Permissions.DELETE_PRODUCT,),
+        'related': (Permissions.VIEW_PRODUCT,),
+    }
+
     def __init__(self, **kwargs: Any):
         self.product_service = ProductService()
-        self.forbidden_response = Response({
-        "message": "You don't have permissions to perform this action.",
-    }, status=status.HTTP_403_FORBIDDEN)
+        self.related_product_service = RelatedProductService()
         super().__init__(**kwargs)
 
     header_param = openapi.Parameter('authorization', openapi.IN_HEADER, description="authorization token header param",
@@ -35,106 +47,86 @@ class ProductView(ViewSet):
     @swagger_auto_schema(request_body=ProductRequestSerializer, responses={201: ProductDataSerializer()},
                          manual_parameters=[header_param])
     def create(self, request):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.CREATE_PRODUCT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling create product service with user {token_info['user']}")
+        logging.info("Calling create product service with user %s", request.user.username)
         product_request_serializer: ProductRequestSerializer = ProductRequestSerializer(data=request.data)
         if product_request_serializer.is_valid(raise_exception=True):
             product: Product = product_request_serializer.create(product_request_serializer.data)
             product_saved: Product = self.product_service.create_product(product)
             product_serializer: ProductDataSerializer = ProductDataSerializer(product_saved)
-            logging.info(f"Create product service called successfully with user {token_info['user']}")
+            logging.info("Create product service called successfully with user %s", request.user.username)
             return Response(product_serializer.data, status=status.HTTP_201_CREATED)
 
     @swagger_auto_schema(responses={200: ProductDataSerializer(),
                                     404: "{'error': 'Product not found'}"},
                          manual_parameters=[header_param])
     def retrieve(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_PRODUCT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling retrieve product service with user {token_info['user']}")
+        logging.info("Calling retrieve product service with user %s", request.user.username)
 
         try:
-            logging.info(f"Retrieve product service called successfully with user {token_info['user']}")
+            logging.info("Retrieve product service called successfully with user %s", request.user.username)
             return Response(self.product_service.get_product_by_id(pk).to_dict(), status=status.HTTP_200_OK)
         except Product.DoesNotExist:
-            logging.error(f"There was an error retrieving product service with user {token_info['user']}")
+            logging.error("There was an error retrieving product service with user %s", request.user.username)
             return Response({
                 "error": "Product not found",
             },status=status.HTTP_404_NOT_FOUND)
 
     @swagger_auto_schema(responses={200: ProductDataSerializer(many=True)}, manual_parameters=[header_param])
     def list(self, request):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_PRODUCT not in token_info['permissions']:
-            return self.forbidden_response
+        logging.info("Calling list products service with user %s", request.user.username)
 
-        logging.info(f"Calling list products service with user {token_info['user']}")
+        response = rows_to_json(ProductService.PRODUCT_FIELDS, self.product_service.get_all_product_values())
 
-        products = self.product_service.get_all_products()
-        response = []
-        for product in products:
-            response.append(product.to_dict())
-
-        logging.info(f"List products service called successfully with user {token_info['user']}")
+        logging.info("List products service called successfully with user %s", request.user.username)
         return Response(response, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(request_body=ProductRequestSerializer, responses={200: ProductDataSerializer()}, manual_parameters=[header_param])
     def update(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.UPDATE_PRODUCT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling update product service with user {token_info['user']}")
+        logging.info("Calling update product service with user %s", request.user.username)
 
         product_request_serializer: ProductRequestSerializer = ProductRequestSerializer(data=request.data)
         if product_request_serializer.is_valid(raise_exception=True):
             product: Product = product_request_serializer.create(product_request_serializer.data)
             product.id = pk
             product_saved: Product = self.product_service.update_product(product)
-            logging.info(f"Update product service called successfully with user {token_info['user']}")
+            logging.info("Update product service called successfully with user %s", request.user.username)
             return Response(product_saved.to_dict(), status=status.HTTP_200_OK)
 
-        logging.error(f"There was an error calling update product service with user {token_info['user']}")
+        logging.error("There was an error calling update product service with user %s", request.user.username)
 
     @swagger_auto_schema(responses={200: "'message': 'This product has been deleted successfully'",
                                     404: "{'error': 'Product not found'}"}, manual_parameters=[header_param])
     def destroy(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.DELETE_PRODUCT not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling delete product service with user {token_info['user']}")
+        logging.info("Calling delete product service with user %s", request.user.username)
 
         try:
             self.product_service.delete_product(pk)
-            logging.info(f"Delete product service called successfully with user {token_info['user']}")
+            logging.info("Delete product service called successfully with user %s", request.user.username)
             return Response({
                 "message": "This product has been deleted successfully",
             },status=status.HTTP_200_OK)
         except Product.DoesNotExist:
-            logging.error(f"There was an error retrieving product in delete product service with user {token_info['user']}")
+            logging.error("There was an error retrieving product in delete product service with user %s", request.user.username)
             return Response({
                 "error": "Product not found",
             },status=status.HTTP_404_NOT_FOUND)
 
+    @swagger_auto_schema(query_serializer=RelatedProductQuerySerializer,
+                         responses={200: RelatedProductSerializer(many=True), 404: "{'error': 'Product not found'}"},
+                         manual_parameters=[header_param])
+    @action(detail=True, methods=['GET'], url_path='related')
+    def related(self, request, pk=None):
+        logging.info("Calling related products service with user %s", request.user.username)
+        query_serializer = RelatedProductQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        related_products = list(self.related_product_service.get_related(pk, query_serializer.validated_data['limit']))
+        if not related_products and not Product.objects.filter(id=pk).exists():
+            logging.error("There was an error retrieving related products service with user %s", request.user.username)
+            return Response({
+                "error": "Product not found",
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        logging.info("Related products service called successfully with user %s", request.user.username)
+        return Response(rows_to_json(RelatedProductService.RESPONSE_FIELDS, related_products), status=status.HTTP_200_OK)
+
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
\ No newline at end of file
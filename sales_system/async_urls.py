@@ -0,0 +1,26 @@
+"""
+URL configuration for the async serving mode.
+
+The list, retrieve, related products and report endpoints are served by native async views that
+use Django's async ORM; every other route, and every non-GET method on those
+routes, falls through to the regular DRF views in ``sales_system.urls``. The
+transaction events stream only exists here, since it holds the connection open.
+"""
+from django.urls import path, re_path
+
+from clients import async_views as clients_async_views
+from products import async_views as products_async_views
+from sales_system.urls import urlpatterns as sync_urlpatterns
+from transactions import async_views as transactions_async_views
+
+urlpatterns = [
+    path('api/products/', products_async_views.list_products),
+    path('api/products/<int:pk>/', products_async_views.retrieve_product),
+    path('api/products/<int:pk>/related/', products_async_views.related_products),
+    path('api/clients/', clients_async_views.list_clients),
+    re_path(r'^api/clients/(?P<pk>(?!bulk/)[^/.]+)/$', clients_async_views.retrieve_client),
+    path('api/transactions/', transactions_async_views.list_transactions),
+    path('api/transactions/events/', transactions_async_views.stream_transaction_events),
+    path('api/transactions/<uuid:pk>/', transactions_async_views.retrieve_transaction),
+    path('api/transactions/<str:pk>/report/', transactions_async_views.generate_report),
+] + sync_urlpatterns
@@ -11,7 +11,6 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
 from pathlib import Path
-import logging
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,20 +41,31 @@ INSTALLED_APPS = [
     'products',
     'clients',
     'transactions',
+    'analytics',
     'drf_yasg',
 ]
 
+# Every middleware runs natively in both WSGI and ASGI modes; the Django ones are subclassed in commons.middleware
+# so their hooks do not hop to a thread on each async request.
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'commons.middleware.SecurityMiddleware',
+    'commons.middleware.StaticFilesMiddleware',
+    'commons.middleware.CompressionMiddleware',
+    'commons.middleware.RequestMetricsMiddleware',
+    'commons.middleware.RequestLogContextMiddleware',
+    'commons.middleware.AdmissionControlMiddleware',
+    'commons.middleware.ReadReplicaMiddleware',
+    'commons.middleware.SessionMiddleware',
+    'commons.middleware.CommonMiddleware',
+    'commons.middleware.CsrfViewMiddleware',
+    'commons.middleware.AuthenticationMiddleware',
+    'commons.middleware.MessageMiddleware',
+    'commons.middleware.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'sales_system.urls'
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'false').lower() == 'true'
+
+ROOT_URLCONF = 'sales_system.async_urls' if ASYNC_VIEWS else 'sales_system.urls'
 
 TEMPLATES = [
     {
@@ -79,13 +89,53 @@ WSGI_APPLICATION = 'sales_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -32000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        # Async views run their queries in sync_to_async threads whose connections are never closed by the request
+        # cycle, so persistent connections only pay off under WSGI.
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 0 if ASYNC_VIEWS else 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Also the busy timeout: SQLite waits up to this many seconds for the write lock.
+            'timeout': 20,
+            'init_command': ';'.join(f"PRAGMA {pragma}={value}" for pragma, value in SQLITE_PRAGMAS.items()),
+        },
     }
 }
 
+SQLITE_REPLICA_PATH = os.environ.get('SQLITE_REPLICA_PATH')
+REPLICA_DATABASE_ALIAS = 'replica' if SQLITE_REPLICA_PATH else None
+if REPLICA_DATABASE_ALIAS:
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': SQLITE_REPLICA_PATH,
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            'init_command': DATABASES['default']['OPTIONS']['init_command'] + ';PRAGMA query_only=1',
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['commons.db_router.ReadReplicaRouter']
+REPLICA_READ_PATHS = [
+    r'^/api/(products|clients|transactions)/$',
+    r'^/api/transactions/[^/]+/report/$',
+    r'^/api/front/(products|clients|transactions)/$',
+]
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 30))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.environ.get('REPLICA_HEALTH_CHECK_INTERVAL', 1))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -122,16 +172,40 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_JSON = os.environ.get('LOG_JSON', 'true').lower() == 'true'
+LOG_SUCCESS_SAMPLE_RATE = float(os.environ.get('LOG_SUCCESS_SAMPLE_RATE', 1.0))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 50000))
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'queue': {
+            '()': 'commons.log.QueueLogHandler',
+            'json_format': LOG_JSON,
+            'max_size': LOG_QUEUE_SIZE,
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+}
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -142,11 +216,101 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 CSRF_TRUSTED_ORIGINS = ['https://tendencias-sales-system.onrender.com']
-#REST_FRAMEWORK = {
-#    'DEFAULT_RENDERER_CLASSES': [
-#        'rest_framework.renderers.JSONRenderer',
-#    ],
-#    'DEFAULT_PARSER_CLASSES': [
-#        'rest_framework.parsers.JSONParser',
-#    ]
-#}
\ No newline at end of file
+REST_FRAMEWORK = {
+    'EXCEPTION_HANDLER': 'commons.exception_handler.api_exception_handler',
+    'DEFAULT_RENDERER_CLASSES': [
+        'commons.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'commons.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Shared by every worker of the host, so invalidations (group permissions, replica stickiness, front fragments) are
+# seen by all of them. CACHE_BACKEND and CACHE_LOCATION can point it at Redis or Memcached instead.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
+    }
+}
+
+JWT_TOKEN_CACHE_SIZE = int(os.environ.get('JWT_TOKEN_CACHE_SIZE', 4096))
+JWT_ACCESS_TOKEN_LIFETIME = int(os.environ.get('JWT_ACCESS_TOKEN_LIFETIME', 15 * 60))
+JWT_REFRESH_TOKEN_LIFETIME = int(os.environ.get('JWT_REFRESH_TOKEN_LIFETIME', 7 * 24 * 60 * 60))
+GROUP_PERMISSIONS_CACHE_TIMEOUT = int(os.environ.get('GROUP_PERMISSIONS_CACHE_TIMEOUT', 60 * 60))
+
+ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', 'true').lower() == 'true'
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 64))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 0.05))
+RATE_LIMIT_STORE_PATH = os.environ.get('RATE_LIMIT_STORE_PATH')
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER')
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1))
+RATE_LIMITS = {
+    'default': {'rate': 20, 'burst': 40},
+    'report': {'rate': 0.5, 'burst': 5},
+    'bulk': {'rate': 0.1, 'burst': 2},
+    'export': {'rate': 0.05, 'burst': 2},
+}
+RATE_LIMIT_ENDPOINT_CLASSES = [
+    (r'/report/$', 'report'),
+    (r'/bulk(-status)?/$', 'bulk'),
+    (r'/invoices/$', 'export'),
+]
+
+BLOCKING_EXECUTOR_WORKERS = int(os.environ.get('BLOCKING_EXECUTOR_WORKERS', 4))
+
+FRONT_PAGE_SIZE = int(os.environ.get('FRONT_PAGE_SIZE', 50))
+FRONT_STREAM_CHUNK_SIZE = int(os.environ.get('FRONT_STREAM_CHUNK_SIZE', 10))
+FRONT_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRONT_FRAGMENT_CACHE_TIMEOUT', 10 * 60))
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+# Without a store path every worker keeps and serves its own counters; /metrics needs the token unless DEBUG is on.
+METRICS_STORE_PATH = os.environ.get('METRICS_STORE_PATH')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN')
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+OPENAPI_SCHEMA_PATH = os.environ.get('OPENAPI_SCHEMA_PATH', BASE_DIR / 'sales_system' / 'openapi.json')
+OPENAPI_SCHEMA_MAX_AGE = int(os.environ.get('OPENAPI_SCHEMA_MAX_AGE', 5 * 60))
+SWAGGER_SETTINGS = {'SPEC_URL': 'schema-json'}
+REDOC_SETTINGS = {'SPEC_URL': 'schema-json'}
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+TRANSACTION_BULK_STATUS_MAX_IDS = int(os.environ.get('TRANSACTION_BULK_STATUS_MAX_IDS', 10000))
+TRANSACTION_ARCHIVE_AFTER_DAYS = int(os.environ.get('TRANSACTION_ARCHIVE_AFTER_DAYS', 365))
+TRANSACTION_ARCHIVE_BATCH_SIZE = int(os.environ.get('TRANSACTION_ARCHIVE_BATCH_SIZE', 1000))
+TRANSACTION_CREATED_AT_BACKFILL = os.environ.get('TRANSACTION_CREATED_AT_BACKFILL')
+
+EVENT_STREAM_POLL_INTERVAL = float(os.environ.get('EVENT_STREAM_POLL_INTERVAL', 1.0))
+EVENT_STREAM_HEARTBEAT = float(os.environ.get('EVENT_STREAM_HEARTBEAT', 15))
+EVENT_STREAM_BUFFER_SIZE = int(os.environ.get('EVENT_STREAM_BUFFER_SIZE', 1000))
+EVENT_STREAM_PAGE_SIZE = int(os.environ.get('EVENT_STREAM_PAGE_SIZE', 500))
+EVENT_STREAM_MAX_CATCH_UP = int(os.environ.get('EVENT_STREAM_MAX_CATCH_UP', 10000))
+TRANSACTION_EVENTS_RETENTION_DAYS = int(os.environ.get('TRANSACTION_EVENTS_RETENTION_DAYS', 7))
+
+ANALYTICS_REFRESH_INTERVAL = float(os.environ.get('ANALYTICS_REFRESH_INTERVAL', 5))
+ANALYTICS_REBUILD_INTERVAL = float(os.environ.get('ANALYTICS_REBUILD_INTERVAL', 60 * 60))
+ANALYTICS_LOAD_BATCH_SIZE = int(os.environ.get('ANALYTICS_LOAD_BATCH_SIZE', 50000))
+
+SALES_SKETCH_RELATIVE_ACCURACY = float(os.environ.get('SALES_SKETCH_RELATIVE_ACCURACY', 0.01))
+
+RELATED_PRODUCTS_LIMIT = int(os.environ.get('RELATED_PRODUCTS_LIMIT', 10))
+RELATED_PRODUCTS_MAX_LIMIT = int(os.environ.get('RELATED_PRODUCTS_MAX_LIMIT', 50))
+RELATED_PRODUCTS_MAX_BASKET_SIZE = int(os.environ.get('RELATED_PRODUCTS_MAX_BASKET_SIZE', 50))
+
+PROCESS_EXECUTOR_WORKERS = int(os.environ.get('PROCESS_EXECUTOR_WORKERS', os.cpu_count() or 1))
+INVOICE_CACHE_DIR = os.environ.get('INVOICE_CACHE_DIR', BASE_DIR / 'invoices')
+INVOICE_RENDER_IN_PROCESS_POOL = os.environ.get('INVOICE_RENDER_IN_PROCESS_POOL', 'true').lower() == 'true'
+INVOICE_BATCH_MAX_IDS = int(os.environ.get('INVOICE_BATCH_MAX_IDS', 10000))
+INVOICE_BATCH_LOAD_SIZE = int(os.environ.get('INVOICE_BATCH_LOAD_SIZE', 500))
+
+GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', 'false').lower() == 'true'
+GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 2))
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 64))
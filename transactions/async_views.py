@@ -0,0 +1,62 @@
+from django.http import HttpResponse, StreamingHttpResponse
+
+from commons.async_views import async_read_view, json_response
+from commons.events import EventBroadcaster
+from commons.executors import run_blocking
+from commons.permissions import Permissions
+from transactions.models import Transaction
+from transactions.services import TransactionService, TransactionEventService
+from transactions.views import TransactionViewSet, include_archived
+import logging
+
+transaction_list_view = TransactionViewSet.as_view({'get': 'list', 'post': 'create'})
+transaction_detail_view = TransactionViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'})
+transaction_report_view = TransactionViewSet.as_view({'get': 'generate_report'})
+transaction_service = TransactionService()
+transaction_event_service = TransactionEventService()
+transaction_events = EventBroadcaster(transaction_event_service.aget_events_after, transaction_event_service.aget_last_event_id,
+                                      event_prefix='transaction.')
+
+
+@async_read_view(Permissions.VIEW_TRANSACTION, transaction_list_view)
+async def list_transactions(request, user):
+    logging.info("Calling async list transactions service with user %s", user.username)
+    return json_response(await transaction_service.aget_all_transaction_dicts(include_archived(request)))
+
+
+@async_read_view(Permissions.VIEW_TRANSACTION, transaction_detail_view)
+async def retrieve_transaction(request, user, pk):
+    logging.info("Calling async retrieve transaction service with user %s", user.username)
+    try:
+        return json_response(await transaction_service.aget_transaction_dict(pk))
+    except Transaction.DoesNotExist:
+        logging.error("There was an error retrieving a transaction with user %s", user.username)
+        return json_response({"error": "Transaction not found"}, 404)
+
+
+@async_read_view(Permissions.VIEW_TRANSACTION, transaction_report_view)
+async def generate_report(request, user, pk):
+    logging.info("Calling async generate transactions report service with user %s", user.username)
+
+    if pk == "json":
+        return json_response((await transaction_service.agenerate_sales_report()).to_dict())
+
+    if pk == "pdf":
+        report = await transaction_service.agenerate_sales_report()
+        buffer = await run_blocking(transaction_service.render_sales_report_pdf, report)
+        return HttpResponse(buffer.getvalue(), content_type='application/pdf',
+                            headers={'Content-Disposition': 'attachment; filename="sales_report.pdf"'})
+
+    logging.error("There was an error calling generate transactions report with user %s", user.username)
+    return HttpResponse(status=404)
+
+
+@async_read_view(Permissions.VIEW_TRANSACTION, allow_query_token=True)
+async def stream_transaction_events(request, user):
+    logging.info("Opening transaction events stream with user %s", user.username)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', '')
+    events = transaction_events.subscribe(int(last_event_id) if last_event_id.isdigit() else None)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,5 +1,6 @@
 from django.core.mail import EmailMessage
 
+from commons.executors import blocking_executor
 from sales_system.settings import EMAIL_HOST_USER
 from transactions.models import Transaction
 import logging
@@ -30,7 +31,11 @@ class EmailService:
             to=[email],
         )
         email.content_subtype = "html"
+        return blocking_executor.submit(EmailService.deliver, email)
+
+    @staticmethod
+    def deliver(email: EmailMessage):
         try:
             email.send()
         except Exception as e:
-            logging.error(f"There was an error sending the email due to {e}")
\ No newline at end of file
+            logging.error("There was an error sending the email due to %s", e)
@@ -1,53 +1,68 @@
-from django.http import FileResponse, HttpResponse
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.http import HttpResponse
 from django.shortcuts import redirect
-from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.viewsets import ViewSet
-import requests
 
-class TransactionsFrontView(ViewSet):
-    renderer_classes = [TemplateHTMLRenderer]
+from commons.front import FrontViewSet
+from commons.permissions import Permissions
+from transactions.serializers import TransactionRequestSerializer
+from transactions.services import TransactionService
+import logging
+
+class TransactionsFrontView(FrontViewSet):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.transaction_service = TransactionService()
 
     def list(self, request):
-        response = requests.get(request.build_absolute_uri('/api/transactions/'), headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return Response({'transactions': response.json(),
-                         'token': request.GET.get('token'),
-                         'products_number': range(1, int(request.GET.get('products_number'))+1) if request.GET.get('products_number') else None},
-                        template_name='transactions/front/templates/transactions.html')
+        if not self.has_token_permission(request, Permissions.VIEW_TRANSACTION):
+            return self.forbidden()
+        page = self.get_page(request, self.transaction_service.get_all_transaction_rows())
+        page.object_list = self.transaction_service.add_products_to_transaction_rows(page.object_list)
+        return self.stream_page(request, 'transactions/front/templates/transactions.html',
+                                {'token': request.GET.get('token'),
+                                 'products_number': range(1, int(request.GET.get('products_number'))+1) if request.GET.get('products_number') else None},
+                                'transactions/front/templates/transaction_row.html', 'transaction', page)
 
     @action(detail=False, methods=['GET'], url_path='update')
     def update_view(self, request):
-        response = requests.get(request.build_absolute_uri(f"/api/transactions/{request.GET.get('id')}"), headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
-        return Response({'transaction': response.json(), 'token': request.GET.get('token')} ,template_name='transactions/front/templates/update.html')
+        if not self.has_token_permission(request, Permissions.VIEW_TRANSACTION):
+            return self.forbidden()
+        try:
+            transaction = self.transaction_service.get_transactions_by_id(request.GET.get('id'))
+        except (ObjectDoesNotExist, DjangoValidationError):
+            return self.forbidden()
+        return Response({'transaction': transaction.to_dict(), 'token': request.GET.get('token')} ,template_name='transactions/front/templates/update.html')
 
     @action(detail=False, methods=['POST'], url_path='update-transaction')
     def update_transaction(self, request):
+        if not self.has_token_permission(request, Permissions.UPDATE_TRANSACTION):
+            return self.forbidden()
         body = {
-            'id': request.data['id'],
             "client": request.data['client'],
             "products": [],
             "payment_method": request.data['payment_method'],
             "status": request.data['status'],
         }
 
-        response = requests.put(request.build_absolute_uri(f"/api/transactions/{request.GET.get('id')}/"),
-                                headers={'authorization': request.GET.get('token'), "Content-Type": "application/json"},
-                                json=body)
-
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        try:
+            transaction_request_serializer = TransactionRequestSerializer(data=body)
+            transaction_request_serializer.is_valid(raise_exception=True)
+            transaction, _ = transaction_request_serializer.create(transaction_request_serializer.data)
+            transaction.id = request.GET.get('id')
+            self.transaction_service.update_transaction(transaction)
+        except (ValidationError, ObjectDoesNotExist, DjangoValidationError):
+            return self.forbidden()
         return redirect(f"/api/front/transactions/?token={request.GET.get('token')}")
 
     def create(self, request):
+        if not self.has_token_permission(request, Permissions.CREATE_TRANSACTION):
+            return self.forbidden()
         products_per_transaction = []
         for product, quantity in zip(request.data.getlist('product'), request.data.getlist('quantity')):
-            products_per_transaction.append({'product': int(product), 'quantity': int(quantity)})
+            products_per_transaction.append({'product': product, 'quantity': quantity})
 
         body = {
             "client": request.data['client'],
@@ -56,30 +71,33 @@ class TransactionsFrontView(ViewSet):
             "status": request.data['status'],
         }
 
-        response = requests.post(request.build_absolute_uri(f"/api/transactions/"),
-                                headers={'authorization': request.GET.get('token'), "Content-Type": "application/json"},
-                                json=body)
-        if response.status_code != 201:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        try:
+            transaction_request_serializer = TransactionRequestSerializer(data=body)
+            transaction_request_serializer.is_valid(raise_exception=True)
+            transaction, products = transaction_request_serializer.create(transaction_request_serializer.data)
+            self.transaction_service.create_transaction(transaction, products)
+        except Exception as e:
+            logging.error("There was an error creating a transaction from the front with error %s", e)
+            return self.forbidden()
         return redirect(f"/api/front/transactions/?token={request.GET.get('token')}")
 
     @action(detail=False, methods=['GET'], url_path='delete')
     def delete_view(self, request):
-        response = requests.delete(request.build_absolute_uri(f"/api/transactions/{request.GET.get('id')}/"),
-                                headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        if not self.has_token_permission(request, Permissions.DELETE_TRANSACTION):
+            return self.forbidden()
+        try:
+            self.transaction_service.delete_transaction(request.GET.get('id'))
+        except (ObjectDoesNotExist, DjangoValidationError):
+            return self.forbidden()
         return redirect(f"/api/front/transactions/?token={request.GET.get('token')}")
 
     @action(detail=False, methods=['post'], url_path='report')
     def report(self, request):
-        response = requests.get(request.build_absolute_uri(f"/api/transactions/pdf/report/"),
-                                headers={'authorization': request.GET.get('token')})
-        if response.status_code != 200:
-            return Response(template_name='auth/front/templates/forbidden.html')
+        if not self.has_token_permission(request, Permissions.VIEW_TRANSACTION):
+            return self.forbidden()
         return HttpResponse(
-            response.content,
+            self.transaction_service.generate_sales_report_pdf().getvalue(),
             content_type='application/pdf',
             headers={'Content-Disposition': 'attachment; filename="sales_report.pdf"'},
             status=200
-        )
\ No newline at end of file
+        )
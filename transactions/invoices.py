@@ -0,0 +1,110 @@
+import hashlib
+import io
+import json
+
+# Bump when the invoice layout changes so cached PDFs are rendered again.
+INVOICE_LAYOUT_VERSION = 1
+
+
+def invoice_version(invoice: dict) -> str:
+    data = json.dumps(invoice, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(f"{INVOICE_LAYOUT_VERSION}:{data}".encode()).hexdigest()[:32]
+
+
+class InvoiceLayout:
+    PAGE_MARGIN = 50
+    ROW_HEIGHT = 16
+    COLUMNS = (("Producto", 50, 'left'), ("Cantidad", 360, 'right'), ("Valor unitario", 450, 'right'),
+               ("Total", 545, 'right'))
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import LETTER
+        from reportlab.pdfbase import pdfmetrics
+
+        self.page_size = LETTER
+        self.width, self.height = LETTER
+        self.header_color = colors.HexColor('#1F3A5F')
+        self.rule_color = colors.HexColor('#C8CDD2')
+        self.fonts = {name: pdfmetrics.getFont(name) for name in ('Helvetica', 'Helvetica-Bold')}
+        self.name_width = self.COLUMNS[1][1] - self.COLUMNS[0][1] - 80
+
+    def fit(self, text: str, font: str, size: int, width: float) -> str:
+        font = self.fonts[font]
+        if font.stringWidth(text, size) <= width:
+            return text
+        while text and font.stringWidth(text + "...", size) > width:
+            text = text[:-1]
+        return text + "..."
+
+    def draw_header(self, page, invoice: dict, page_number: int) -> float:
+        top = self.height - self.PAGE_MARGIN
+        page.setFillColor(self.header_color)
+        page.rect(0, top - 10, self.width, 60, stroke=0, fill=1)
+        page.setFillColorRGB(1, 1, 1)
+        page.setFont('Helvetica-Bold', 18)
+        page.drawString(self.PAGE_MARGIN, top + 12, "FACTURA DE VENTA")
+        page.setFont('Helvetica', 9)
+        page.drawRightString(self.width - self.PAGE_MARGIN, top + 24, f"No. {invoice['id']}")
+        page.drawRightString(self.width - self.PAGE_MARGIN, top + 10, f"Pagina {page_number}")
+        page.setFillColorRGB(0, 0, 0)
+
+        y = top - 35
+        if page_number == 1:
+            page.setFont('Helvetica-Bold', 10)
+            page.drawString(self.PAGE_MARGIN, y, "Cliente")
+            page.drawString(330, y, "Venta")
+            page.setFont('Helvetica', 10)
+            for offset, (left, right) in enumerate((
+                    (invoice['client_name'], f"Fecha: {invoice['created_at']}"),
+                    (f"Documento: {invoice['client']}", f"Metodo de pago: {invoice['payment_method']}"),
+                    (invoice['client_email'], f"Estado: {invoice['status']}"),
+                    (invoice['client_address'], "")), start=1):
+                page.drawString(self.PAGE_MARGIN, y - offset * 14, self.fit(left or "", 'Helvetica', 10, 260))
+                page.drawString(330, y - offset * 14, right)
+            y -= 85
+
+        page.setFont('Helvetica-Bold', 10)
+        for title, x, align in self.COLUMNS:
+            (page.drawString if align == 'left' else page.drawRightString)(x, y, title)
+        page.setStrokeColor(self.rule_color)
+        page.line(self.PAGE_MARGIN, y - 5, self.width - self.PAGE_MARGIN, y - 5)
+        page.setFont('Helvetica', 10)
+        return y - self.ROW_HEIGHT - 4
+
+    def render(self, invoice: dict) -> bytes:
+        from reportlab.pdfgen import canvas
+
+        buffer = io.BytesIO()
+        page = canvas.Canvas(buffer, pagesize=self.page_size, pageCompression=1)
+        page.setTitle(f"Factura {invoice['id']}")
+        page_number = 1
+        y = self.draw_header(page, invoice, page_number)
+        for name, quantity, unit_price, total in invoice['products']:
+            if y < self.PAGE_MARGIN + 60:
+                page.showPage()
+                page_number += 1
+                y = self.draw_header(page, invoice, page_number)
+            page.drawString(self.COLUMNS[0][1], y, self.fit(name, 'Helvetica', 10, self.name_width))
+            page.drawRightString(self.COLUMNS[1][1], y, str(quantity))
+            page.drawRightString(self.COLUMNS[2][1], y, f"{unit_price}")
+            page.drawRightString(self.COLUMNS[3][1], y, f"{total}")
+            y -= self.ROW_HEIGHT
+
+        page.line(self.PAGE_MARGIN, y + 8, self.width - self.PAGE_MARGIN, y + 8)
+        page.setFont('Helvetica-Bold', 12)
+        page.drawString(self.COLUMNS[2][1] - 80, y - 10, "TOTAL")
+        page.drawRightString(self.COLUMNS[3][1], y - 10, f"{invoice['total']}")
+        page.showPage()
+        page.save()
+        return buffer.getvalue()
+
+
+layout = None
+
+
+def render_invoice(invoice: dict) -> bytes:
+    global layout
+    if layout is None:
+        layout = InvoiceLayout()
+    return layout.render(invoice)
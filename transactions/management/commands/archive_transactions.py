@@ -0,0 +1,25 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transactions.services import TransactionArchiveService
+
+
+class Command(BaseCommand):
+    help = "Moves settled transactions older than the archive horizon, with their lines, into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TRANSACTION_ARCHIVE_AFTER_DAYS,
+                            help="Archive transactions created more than this many days ago")
+        parser.add_argument('--batch-size', type=int, default=settings.TRANSACTION_ARCHIVE_BATCH_SIZE,
+                            help="Transactions moved per database transaction")
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        before = timezone.now() - timedelta(days=options['days'])
+        transactions, lines = TransactionArchiveService().archive(before, options['batch_size'])
+        self.stdout.write(f"Archived {transactions} transactions and {lines} transaction lines created before "
+                          f"{before:%Y-%m-%d} in {time.perf_counter() - started_at:.1f}s")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sales_system.openapi import openapi_schema
+
+
+class Command(BaseCommand):
+    help = "Writes the OpenAPI schema served at /swagger.json, or checks that the committed one is up to date"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Fail if the schema file is missing or stale")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            if openapi_schema.is_stale():
+                raise CommandError(f"{openapi_schema.path} is stale, run manage.py generate_openapi_schema")
+            self.stdout.write(f"{openapi_schema.path} is up to date")
+            return
+        changed = openapi_schema.write()
+        self.stdout.write(f"{openapi_schema.path} {'updated' if changed else 'unchanged'}")
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transactions.services import TransactionEventService
+
+
+class Command(BaseCommand):
+    help = "Deletes transaction events older than the retention window from the event log"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TRANSACTION_EVENTS_RETENTION_DAYS,
+                            help="Keep events created in the last this many days")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        deleted = TransactionEventService().prune(before)
+        self.stdout.write(f"Deleted {deleted} transaction events created before {before:%Y-%m-%d}")
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.services import RelatedProductService
+from transactions.services import TransactionService
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the frequently bought together index from the active and archived transaction lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Transaction lines read per query")
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        pairs = RelatedProductService().rebuild(TransactionService().get_baskets(options['batch_size']))
+        self.stdout.write(f"Rebuilt the related products index with {pairs} product pairs in "
+                          f"{time.perf_counter() - started_at:.1f}s")
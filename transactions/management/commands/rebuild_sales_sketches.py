@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from transactions.services import SalesSketchService
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the ticket size and basket size quantile sketches from the active and archived paid transactions"
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        sales = SalesSketchService().rebuild()
+        self.stdout.write(f"Rebuilt the sales sketches from {sales} transactions in {time.perf_counter() - started_at:.1f}s")
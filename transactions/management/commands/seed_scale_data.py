@@ -0,0 +1,134 @@
+import itertools
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from clients.models import Client
+from products.models import Product
+from transactions.models import Transaction, ProductPerTransaction
+
+CATEGORIES = ['Tecnologia', 'Hogar', 'Deportes', 'Ropa', 'Alimentos', 'Juguetes', 'Belleza', 'Libros']
+PAYMENT_METHODS = (('cash', 0.5), ('card', 0.4), ('transfer', 0.1))
+STATUSES = (('PAGADO', 0.9), ('PENDIENTE', 0.07), ('ANULADO', 0.03))
+LINES_PER_TRANSACTION = ((1, 0.45), (2, 0.3), (3, 0.15), (4, 0.07), (5, 0.03))
+
+
+def zipf_cum_weights(size: int, exponent: float) -> list[float]:
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def split(pairs):
+    values, weights = zip(*pairs)
+    return values, list(itertools.accumulate(weights))
+
+
+class Command(BaseCommand):
+    help = "Generates products, clients and transactions with realistic skew for scale testing and benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--clients', type=int, default=10000)
+        parser.add_argument('--transactions', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk_create and per commit")
+        parser.add_argument('--product-skew', type=float, default=1.1,
+                            help="Zipf exponent of product popularity, higher means hotter top SKUs")
+        parser.add_argument('--client-skew', type=float, default=0.8,
+                            help="Zipf exponent of purchases per client, higher means more repeat buyers")
+        parser.add_argument('--days', type=int, default=730, help="Spread transaction dates over this many past days")
+
+    def handle(self, *args, **options):
+        generator = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started_at = time.perf_counter()
+        synchronous = self.set_synchronous('OFF')
+        autocommit = transaction.get_autocommit()
+        transaction.set_autocommit(False)
+        try:
+            products = self.create_products(generator, options['products'], batch_size)
+            clients = self.create_clients(generator, options['clients'], batch_size)
+            created = self.create_transactions(generator, products, clients, options, batch_size)
+        except Exception:
+            transaction.rollback()
+            raise
+        finally:
+            transaction.set_autocommit(autocommit)
+            self.set_synchronous(synchronous)
+        self.stdout.write(f"Created {len(products)} products, {len(clients)} clients, {created[0]} transactions and "
+                          f"{created[1]} transaction lines in {time.perf_counter() - started_at:.1f}s")
+
+    def set_synchronous(self, value):
+        if connection.vendor != 'sqlite' or value is None:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            previous, = cursor.fetchone()
+            cursor.execute(f"PRAGMA synchronous={value}")
+        return previous
+
+    def create_products(self, generator: random.Random, count: int, batch_size: int) -> list[tuple[int, Decimal]]:
+        start = (Product.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        products = [Product(id=start + number, name=f"Producto {start + number}",
+                            category=CATEGORIES[number % len(CATEGORIES)],
+                            subcategory=f"{CATEGORIES[number % len(CATEGORIES)]} {number % 10}",
+                            price=Decimal(generator.randrange(1000, 500000, 100)), quantity=generator.randrange(10 ** 5, 10 ** 6))
+                    for number in range(count)]
+        for offset in range(0, count, batch_size):
+            Product.objects.bulk_create(products[offset:offset + batch_size])
+            transaction.commit()
+        return [(product.id, product.price) for product in products]
+
+    def create_clients(self, generator: random.Random, count: int, batch_size: int) -> list[str]:
+        prefix = f"S{generator.getrandbits(32):08x}"
+        clients = [Client(document=f"{prefix}{number:09d}", name=f"Cliente {number}", last_name=f"Apellido {number}",
+                          email=f"{prefix.lower()}.{number}@example.com", phone=f"3{generator.randrange(10 ** 9):09d}",
+                          address=f"Calle {generator.randrange(1, 200)} #{generator.randrange(1, 100)}-{generator.randrange(1, 100)}")
+                   for number in range(count)]
+        for offset in range(0, count, batch_size):
+            Client.objects.bulk_create(clients[offset:offset + batch_size])
+            transaction.commit()
+        return [client.document for client in clients]
+
+    def create_transactions(self, generator: random.Random, products: list[tuple[int, Decimal]], clients: list[str],
+                            options: dict, batch_size: int) -> tuple[int, int]:
+        product_weights = zipf_cum_weights(len(products), options['product_skew'])
+        client_weights = zipf_cum_weights(len(clients), options['client_skew'])
+        generator.shuffle(products)
+        generator.shuffle(clients)
+        payment_methods, payment_weights = split(PAYMENT_METHODS)
+        statuses, status_weights = split(STATUSES)
+        line_counts, line_weights = split(LINES_PER_TRANSACTION)
+        clock = random.Random(options['seed'])
+        history = timedelta(days=options['days']).total_seconds()
+        now = timezone.now()
+        total_lines = 0
+        for offset in range(0, options['transactions'], batch_size):
+            count = min(batch_size, options['transactions'] - offset)
+            transactions, lines = [], []
+            buyers = generator.choices(clients, cum_weights=client_weights, k=count)
+            for client_id, payment_method, status, line_count in zip(
+                    buyers, generator.choices(payment_methods, cum_weights=payment_weights, k=count),
+                    generator.choices(statuses, cum_weights=status_weights, k=count),
+                    generator.choices(line_counts, cum_weights=line_weights, k=count)):
+                transaction_id = uuid.UUID(int=generator.getrandbits(128), version=4)
+                total = Decimal(0)
+                for product_id, price in dict(generator.choices(products, cum_weights=product_weights, k=line_count)).items():
+                    quantity = generator.choice((1, 1, 1, 2, 2, 3))
+                    lines.append(ProductPerTransaction(transaction_id=transaction_id, product_id=product_id,
+                                                       quantity=quantity, total=price * quantity))
+                    total += price * quantity
+                transactions.append(Transaction(id=transaction_id, client_id=client_id, payment_method=payment_method,
+                                                status=status, total=total,
+                                                created_at=now - timedelta(seconds=clock.random() * history)))
+            Transaction.objects.bulk_create(transactions)
+            ProductPerTransaction.objects.bulk_create(lines)
+            transaction.commit()
+            total_lines += len(lines)
+            self.stdout.write(f"{offset + count}/{options['transactions']} transactions", ending='\r')
+        return options['transactions'], total_lines
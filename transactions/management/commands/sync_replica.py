@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from commons.db_router import ReplicaHealth
+
+
+class Command(BaseCommand):
+    help = "Copies the primary SQLite database into the read replica and records a heartbeat for lag checks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5, help="Seconds between copies")
+        parser.add_argument('--once', action='store_true', help="Copy a single time and exit")
+
+    def handle(self, *args, **options):
+        replica_path = settings.SQLITE_REPLICA_PATH
+        if not replica_path:
+            raise CommandError("SQLITE_REPLICA_PATH is not configured")
+        primary = connections['default']
+        with primary.cursor() as cursor:
+            cursor.execute(f"create table if not exists {ReplicaHealth.HEARTBEAT_TABLE} "
+                           f"(id integer primary key, beat_at real not null)")
+        while True:
+            with primary.cursor() as cursor:
+                cursor.execute(f"insert or replace into {ReplicaHealth.HEARTBEAT_TABLE} (id, beat_at) values (1, %s)",
+                               [time.time()])
+            source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+            target = sqlite3.connect(replica_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(f"Replica {replica_path} synced")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transactionevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesSketchBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=20)),
+                ('period', models.CharField(max_length=10)),
+                ('bucket', models.IntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'period', 'bucket'), name='unique_sales_sketch_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:20
+
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import migrations
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def get_backfill_date(recorder: MigrationRecorder):
+    value = getattr(settings, 'TRANSACTION_CREATED_AT_BACKFILL', None)
+    if value:
+        backfill_date = parse_datetime(value) or datetime.combine(parse_date(value), time.min)
+        return backfill_date if timezone.is_aware(backfill_date) else timezone.make_aware(backfill_date)
+    initial = recorder.migration_qs.filter(app='transactions', name='0001_initial').first()
+    return initial.applied if initial else None
+
+
+# Sales created before 0002_archive got the time that migration ran as created_at, so they looked new to
+# archive_transactions. They are moved back to TRANSACTION_CREATED_AT_BACKFILL or, by default, to the day the sales
+# table was created, the oldest date they can have.
+def backfill_created_at(apps, schema_editor):
+    recorder = MigrationRecorder(schema_editor.connection)
+    archive = recorder.migration_qs.filter(app='transactions', name='0002_archive').first()
+    backfill_date = get_backfill_date(recorder)
+    if archive is None or backfill_date is None:
+        return
+    Transaction = apps.get_model('transactions', 'Transaction')
+    Transaction.objects.using(schema_editor.connection.alias).filter(created_at__lte=archive.applied) \
+        .update(created_at=backfill_date)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_salessketchbucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+    ]
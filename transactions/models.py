@@ -3,6 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 
 from django.db import models
+from django.utils import timezone
 
 from clients.models import Client
 from products.models import Product
@@ -17,6 +18,7 @@ class Transaction(models.Model):
     payment_method = models.CharField(max_length=50)
     status = models.CharField(max_length=50)
     total = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     def to_dict(self):
         return {
@@ -41,9 +43,75 @@ class ProductPerTransaction(models.Model):
             "total": self.total,
         }
 
+class ArchivedTransaction(models.Model):
+    id = models.UUIDField(primary_key=True)
+    client = models.ForeignKey(Client, on_delete=models.DO_NOTHING, db_constraint=False)
+    payment_method = models.CharField(max_length=50)
+    status = models.CharField(max_length=50)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "client": self.client_id,
+            'products': [product.to_dict() for product in
+                         ArchivedProductPerTransaction.objects.filter(transaction_id=self.id).select_related('product')],
+            "payment_method": self.payment_method,
+            "status": self.status,
+            "total": self.total,
+        }
+
+class ArchivedProductPerTransaction(models.Model):
+    transaction = models.ForeignKey(ArchivedTransaction, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=1)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def to_dict(self):
+        return {
+            "product": self.product.name,
+            "quantity": self.quantity,
+            "total": self.total,
+        }
+
+class ArchivedProductSales(models.Model):
+    product = models.OneToOneField(Product, primary_key=True, on_delete=models.CASCADE)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+class ArchivedSalesSummary(models.Model):
+    status = models.CharField(primary_key=True, max_length=50)
+    num_sales = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+class TransactionEvent(models.Model):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    id = models.BigAutoField(primary_key=True)
+    transaction_id = models.UUIDField()
+    event_type = models.CharField(max_length=20)
+    payload = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+class SalesSketchBucket(models.Model):
+    TICKET_SIZE = 'ticket_size'
+    BASKET_SIZE = 'basket_size'
+    ALL_TIME = 'all'
+
+    metric = models.CharField(max_length=20)
+    period = models.CharField(max_length=10)
+    bucket = models.IntegerField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['metric', 'period', 'bucket'], name='unique_sales_sketch_bucket')]
+
 class Report:
     def __init__(self, total_clients: int, total_products: int, num_sales: int, total_sales: Decimal,
-                 best_selling_product: str, selling_by_products: dict[str, Decimal]):
+                 best_selling_product: str, selling_by_products: dict[str, Decimal],
+                 ticket_size: dict[str, Decimal | None] | None = None, basket_size: dict[str, int | None] | None = None):
         self.title = "Reporte de ventas"
         self.total_clients = total_clients
         self.total_products = total_products
@@ -51,6 +119,8 @@ class Report:
         self.total_sales = total_sales
         self.best_selling_product = best_selling_product
         self.selling_by_products = selling_by_products
+        self.ticket_size = ticket_size or {}
+        self.basket_size = basket_size or {}
         self.created_date = datetime.now()
 
     def to_dict(self):
@@ -63,4 +133,6 @@ class Report:
             "total_sales": self.total_sales,
             "best_selling_product": self.best_selling_product,
             "selling_by_products": self.selling_by_products,
+            "ticket_size": self.ticket_size,
+            "basket_size": self.basket_size,
         }
\ No newline at end of file
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from clients.models import Client
@@ -25,10 +26,38 @@ class TransactionRequestSerializer(serializers.Serializer):
 
         return Transaction(client=client, total=0, **validated_data), products_per_transaction
 
+class TransactionFilterSerializer(serializers.Serializer):
+    status = serializers.CharField(max_length=50, required=False)
+    client = serializers.CharField(max_length=100, required=False)
+    payment_method = serializers.CharField(max_length=50, required=False)
+
+class TransactionSelectionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False,
+                                max_length=settings.TRANSACTION_BULK_STATUS_MAX_IDS)
+    filter = TransactionFilterSerializer(required=False)
+
+    def validate(self, data):
+        if ('ids' in data) == bool(data.get('filter')):
+            raise serializers.ValidationError("Se debe enviar una lista de ids o un filtro no vacio")
+        return data
+
+class TransactionBulkStatusRequestSerializer(TransactionSelectionSerializer):
+    status = serializers.CharField(max_length=50)
+
+class TransactionInvoiceBatchRequestSerializer(TransactionSelectionSerializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False,
+                                max_length=settings.INVOICE_BATCH_MAX_IDS)
+
+class TransactionBulkStatusResponseSerializer(serializers.Serializer):
+    status = serializers.CharField()
+    updated = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+    not_found = serializers.IntegerField()
+
 class TransactionDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = '__all__'
+        exclude = ('created_at',)
 
     def map_to_entity(self, data) -> Transaction:
         data.pop('products')
@@ -1,29 +1,155 @@
-import statistics
+import os
+from collections import defaultdict, deque
+from datetime import date, datetime
 from decimal import Decimal
+from functools import partial
+from pathlib import Path
 from uuid import UUID
 
-from django.db import connection
-from django.db.models import QuerySet, Sum
-from reportlab.graphics import renderPDF
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-from reportlab.graphics.charts.textlabels import Label
-from reportlab.graphics.shapes import Drawing
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
+from django.conf import settings
+from django.db import connections, router, transaction as db_transaction
+from django.db.models import Count, F, Q, QuerySet, Sum
 
 from clients.models import Client
+from commons.db_router import immediate_atomic
+from commons.executors import get_process_executor
+from commons.group_commit import group_committer
+from commons.renderers import FastJSONRenderer
+from commons.sketches import QuantileSketch
+from commons.zipstream import stream_zip
 from products.models import Product
+from products.services import RelatedProductService
 from transactions.email_service import EmailService
-from transactions.models import Transaction, ProductPerTransaction, Report
+from transactions.invoices import invoice_version, render_invoice
+from transactions.models import Transaction, ProductPerTransaction, Report, ArchivedTransaction, \
+    ArchivedProductPerTransaction, ArchivedProductSales, ArchivedSalesSummary, TransactionEvent, SalesSketchBucket
 from transactions.serializers import TransactionDataSerializer
 import io
-from reportlab.pdfgen import canvas
+
+
+class TransactionEventService:
+    def record(self, event_type: str, payloads: list[dict]) -> None:
+        renderer = FastJSONRenderer()
+        TransactionEvent.objects.bulk_create([TransactionEvent(transaction_id=payload['id'], event_type=event_type,
+                                                               payload=renderer.render(payload).decode())
+                                              for payload in payloads])
+
+    def get_events_after(self, last_event_id: int, limit: int) -> QuerySet:
+        return (TransactionEvent.objects.filter(id__gt=last_event_id).order_by('id')
+                .values_list('id', 'event_type', 'payload')[:limit])
+
+    async def aget_events_after(self, last_event_id: int, limit: int) -> list[tuple[int, str, str]]:
+        return [event async for event in self.get_events_after(last_event_id, limit)]
+
+    async def aget_last_event_id(self) -> int:
+        return await TransactionEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+
+    def prune(self, before: datetime) -> int:
+        deleted, _ = TransactionEvent.objects.filter(created_at__lt=before).delete()
+        return deleted
+
+
+class SalesSketchService:
+    STATUS = 'PAGADO'
+    QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99))
+
+    def new_sketch(self, buckets: dict[int, int] | None = None) -> QuantileSketch:
+        return QuantileSketch(settings.SALES_SKETCH_RELATIVE_ACCURACY, buckets)
+
+    def get_sale_rows(self, transactions: QuerySet, lines_field: str = 'productpertransaction') -> QuerySet:
+        return transactions.annotate(items=Sum(f'{lines_field}__quantity')).values_list('created_at', 'total', 'items')
+
+    def remove(self, transactions: QuerySet) -> None:
+        self.record(self.get_sale_rows(transactions.filter(status=self.STATUS)), sign=-1)
+
+    def record_status_change(self, transactions: QuerySet, status: str) -> None:
+        if status == self.STATUS:
+            self.record(self.get_sale_rows(transactions.exclude(status=self.STATUS)))
+        else:
+            self.remove(transactions)
+
+    def get_increments(self, sale_rows, sign: int = 1) -> dict[tuple[str, str, int], int]:
+        sketch = self.new_sketch()
+        increments = defaultdict(int)
+        for created_at, total, items in sale_rows:
+            for period in (SalesSketchBucket.ALL_TIME, created_at.date().isoformat()):
+                increments[(SalesSketchBucket.TICKET_SIZE, period, sketch.key(total))] += sign
+                increments[(SalesSketchBucket.BASKET_SIZE, period, sketch.key(items or 0))] += sign
+        return increments
+
+    def record(self, sale_rows, sign: int = 1) -> None:
+        increments = self.get_increments(sale_rows, sign)
+        if not increments:
+            return
+        connection = connections[router.db_for_write(SalesSketchBucket)]
+        table, count = (connection.ops.quote_name(name) for name in (SalesSketchBucket._meta.db_table, 'count'))
+        with connection.cursor() as cursor:
+            cursor.executemany(f"insert into {table} (metric, period, bucket, {count}) values (%s, %s, %s, %s) "
+                               f"on conflict (metric, period, bucket) do update set {count} = {table}.{count} + excluded.{count}",
+                               [(*bucket, count) for bucket, count in increments.items()])
+
+    def get_buckets(self, since: date | None = None, until: date | None = None) -> QuerySet:
+        queryset = SalesSketchBucket.objects.all()
+        if since is None and until is None:
+            return queryset.filter(period=SalesSketchBucket.ALL_TIME).values_list('metric', 'bucket', 'count')
+        queryset = queryset.exclude(period=SalesSketchBucket.ALL_TIME)
+        if since is not None:
+            queryset = queryset.filter(period__gte=since.isoformat())
+        if until is not None:
+            queryset = queryset.filter(period__lte=until.isoformat())
+        return (queryset.values('metric', 'bucket').annotate(total_count=Sum('count'))
+                .values_list('metric', 'bucket', 'total_count'))
+
+    # Ticket and basket size buckets are read with one query and split by metric.
+    def get_sketches(self, since: date | None = None, until: date | None = None) -> dict[str, QuantileSketch]:
+        return self.new_sketches(self.get_buckets(since, until))
+
+    async def aget_sketches(self, since: date | None = None, until: date | None = None) -> dict[str, QuantileSketch]:
+        return self.new_sketches([row async for row in self.get_buckets(since, until)])
+
+    def new_sketches(self, rows) -> dict[str, QuantileSketch]:
+        buckets = {SalesSketchBucket.TICKET_SIZE: {}, SalesSketchBucket.BASKET_SIZE: {}}
+        for metric, bucket, count in rows:
+            buckets[metric][bucket] = count
+        return {metric: self.new_sketch(metric_buckets) for metric, metric_buckets in buckets.items()}
+
+    def get_ticket_size(self, sketch: QuantileSketch) -> dict[str, Decimal | None]:
+        return {name: None if (value := sketch.quantile(q)) is None else Decimal(value).quantize(Decimal('0.01'))
+                for name, q in self.QUANTILES}
+
+    def get_basket_size(self, sketch: QuantileSketch) -> dict[str, int | None]:
+        return {name: None if (value := sketch.quantile(q)) is None else round(value) for name, q in self.QUANTILES}
+
+    def rebuild(self) -> int:
+        increments = defaultdict(int)
+        for transactions, lines_field in ((Transaction.objects.order_by(), 'productpertransaction'),
+                                          (ArchivedTransaction.objects.order_by(), 'archivedproductpertransaction')):
+            sale_rows = self.get_sale_rows(transactions.filter(status=self.STATUS), lines_field).iterator()
+            for bucket, count in self.get_increments(sale_rows).items():
+                increments[bucket] += count
+        with immediate_atomic():
+            SalesSketchBucket.objects.all().delete()
+            SalesSketchBucket.objects.bulk_create([SalesSketchBucket(metric=metric, period=period, bucket=bucket, count=count)
+                                                   for (metric, period, bucket), count in increments.items()], batch_size=1000)
+        return sum(count for (metric, period, _), count in increments.items()
+                   if metric == SalesSketchBucket.TICKET_SIZE and period == SalesSketchBucket.ALL_TIME)
 
 
 class TransactionService:
-    def __init__(self):
-        self.cursor = connection.cursor()
+    event_service = TransactionEventService()
+    sketch_service = SalesSketchService()
+    related_product_service = RelatedProductService()
+    TRANSACTION_FIELDS = ('id', 'client_id', 'payment_method', 'status', 'total')
+    SALES_BY_PRODUCT_SQL = (f"select product_id, total from {ProductPerTransaction._meta.db_table} union all "
+                            f"select product_id, total from {ArchivedProductSales._meta.db_table}")
+
     def create_transaction(self, transaction: Transaction, products_per_transaction: list[ProductPerTransaction]) -> Transaction:
+        if settings.GROUP_COMMIT_ENABLED:
+            return group_committer.submit(partial(self.save_transaction, transaction, products_per_transaction))
+        with immediate_atomic():
+            return self.save_transaction(transaction, products_per_transaction)
+
+    def save_transaction(self, transaction: Transaction, products_per_transaction: list[ProductPerTransaction]) -> Transaction:
         transaction.status = 'PAGADO'
         for product_per_transaction in products_per_transaction:
             product_per_transaction.transaction = transaction
@@ -40,10 +166,25 @@ class TransactionService:
             data_saved = data_serializer.data
             for product_per_transaction in products_per_transaction:
                 product_per_transaction.save()
-                stock = product_per_transaction.product.quantity - product_per_transaction.quantity
-                product_per_transaction.product.quantity = stock
-                Product.objects.bulk_update([product_per_transaction.product], fields=['quantity'])
-            EmailService.send(transaction.client.email, transaction)
+                # Conditional decrement so sales of the same product written in one batch never oversell it.
+                product = product_per_transaction.product
+                if not Product.objects.filter(id=product.id, quantity__gte=product_per_transaction.quantity) \
+                        .update(quantity=F('quantity') - product_per_transaction.quantity):
+                    raise Exception(f"El producto {product.name} no cuenta con suficiento stock para realizar esta transaccion")
+                product.quantity -= product_per_transaction.quantity
+            self.event_service.record(TransactionEvent.CREATED, [{
+                "id": transaction.id,
+                "client": transaction.client.document,
+                "products": [product_per_transaction.to_dict() for product_per_transaction in products_per_transaction],
+                "payment_method": transaction.payment_method,
+                "status": transaction.status,
+                "total": transaction.total,
+            }])
+            self.sketch_service.record([(data_serializer.instance.created_at, transaction.total,
+                                         sum(product_per_transaction.quantity for product_per_transaction in products_per_transaction))])
+            self.related_product_service.record([[product_per_transaction.product.id
+                                                  for product_per_transaction in products_per_transaction]])
+            db_transaction.on_commit(partial(EmailService.send, transaction.client.email, transaction))
             return data_serializer.map_to_entity(data_saved)
 
         raise Exception("Ocurrio un error al efectuar la transaccion")
@@ -51,9 +192,101 @@ class TransactionService:
     def get_transactions_by_id(self, transaction_id: UUID) -> Transaction:
         return Transaction.objects.get(id=transaction_id)
 
+    def get_transaction_for_read(self, transaction_id: UUID) -> Transaction | ArchivedTransaction:
+        try:
+            return self.get_transactions_by_id(transaction_id)
+        except Transaction.DoesNotExist:
+            archived_transaction = ArchivedTransaction.objects.filter(id=transaction_id).first()
+            if archived_transaction is None:
+                raise
+            return archived_transaction
+
     def get_all_transactions(self) -> QuerySet:
         return Transaction.objects.all()
 
+    def get_all_transaction_rows(self) -> QuerySet:
+        return Transaction.objects.order_by('id').values(*self.TRANSACTION_FIELDS)
+
+    async def aget_transaction_dict(self, transaction_id: UUID) -> dict:
+        try:
+            transaction = await Transaction.objects.aget(id=transaction_id)
+            lines = ProductPerTransaction.objects.filter(transaction_id=transaction.id)
+        except Transaction.DoesNotExist:
+            transaction = await ArchivedTransaction.objects.filter(id=transaction_id).afirst()
+            if transaction is None:
+                raise
+            lines = ArchivedProductPerTransaction.objects.filter(transaction_id=transaction.id)
+        products = [product_per_transaction.to_dict() async for product_per_transaction in lines.select_related('product')]
+        return {
+            "id": transaction.id,
+            "client": transaction.client_id,
+            'products': products,
+            "payment_method": transaction.payment_method,
+            "status": transaction.status,
+            "total": transaction.total,
+        }
+
+    def get_list_models(self, include_archived: bool) -> tuple:
+        models = ((Transaction, ProductPerTransaction), (ArchivedTransaction, ArchivedProductPerTransaction))
+        return models if include_archived else models[:1]
+
+    def get_all_transaction_dicts(self, include_archived: bool = False) -> list[dict]:
+        rows = []
+        for transaction_model, product_model in self.get_list_models(include_archived):
+            transaction_rows = self.to_transaction_dicts(transaction_model.objects.values(*self.TRANSACTION_FIELDS))
+            rows_by_id = {row['id']: row for row in transaction_rows}
+            for transaction_id, product_name, quantity, total in self.get_all_product_lines(product_model):
+                if transaction_id in rows_by_id:
+                    rows_by_id[transaction_id]['products'].append({'product': product_name, 'quantity': quantity, 'total': total})
+            rows.extend(transaction_rows)
+        return rows
+
+    async def aget_all_transaction_dicts(self, include_archived: bool = False) -> list[dict]:
+        rows = []
+        for transaction_model, product_model in self.get_list_models(include_archived):
+            transaction_rows = self.to_transaction_dicts([row async for row in transaction_model.objects.values(*self.TRANSACTION_FIELDS)])
+            rows_by_id = {row['id']: row for row in transaction_rows}
+            async for transaction_id, product_name, quantity, total in self.get_all_product_lines(product_model):
+                if transaction_id in rows_by_id:
+                    rows_by_id[transaction_id]['products'].append({'product': product_name, 'quantity': quantity, 'total': total})
+            rows.extend(transaction_rows)
+        return rows
+
+    def get_all_product_lines(self, model=ProductPerTransaction) -> QuerySet:
+        return model.objects.order_by('id').values_list('transaction_id', 'product__name', 'quantity', 'total')
+
+    def to_transaction_dicts(self, transaction_rows) -> list[dict]:
+        return [{
+            'id': row['id'],
+            'client': row['client_id'],
+            'products': [],
+            'payment_method': row['payment_method'],
+            'status': row['status'],
+            'total': row['total'],
+        } for row in transaction_rows]
+
+    def add_products_to_transaction_rows(self, transaction_rows) -> list[dict]:
+        rows = self.to_transaction_dicts(transaction_rows)
+        rows_by_id = {row['id']: row for row in rows}
+        products_per_transaction = (ProductPerTransaction.objects.filter(transaction_id__in=rows_by_id.keys())
+                                    .order_by('id').values_list('transaction_id', 'product__name', 'quantity', 'total'))
+        for transaction_id, product_name, quantity, total in products_per_transaction:
+            rows_by_id[transaction_id]['products'].append({'product': product_name, 'quantity': quantity, 'total': total})
+        return rows
+
+    def get_baskets(self, batch_size: int = 5000):
+        for model in (ProductPerTransaction, ArchivedProductPerTransaction):
+            basket, basket_id = [], None
+            lines = model.objects.order_by('transaction_id').values_list('transaction_id', 'product_id')
+            for transaction_id, product_id in lines.iterator(chunk_size=batch_size):
+                if transaction_id != basket_id and basket:
+                    yield basket
+                    basket = []
+                basket_id = transaction_id
+                basket.append(product_id)
+            if basket:
+                yield basket
+
     def get_transaction_to_update(self, old_transaction: Transaction, transaction_to_update: Transaction) -> Transaction:
         old_transaction.status = transaction_to_update.status
         return old_transaction
@@ -61,25 +294,82 @@ class TransactionService:
     def update_transaction(self, transaction: Transaction) -> Transaction | None:
         old_transaction: Transaction = self.get_transactions_by_id(transaction.id)
         updated_transaction = self.get_transaction_to_update(old_transaction, transaction)
-        Transaction.objects.bulk_update(objs=[updated_transaction], fields=['status'])
+        with immediate_atomic():
+            self.sketch_service.record_status_change(Transaction.objects.filter(id=transaction.id), updated_transaction.status)
+            Transaction.objects.bulk_update(objs=[updated_transaction], fields=['status'])
+            self.event_service.record(TransactionEvent.UPDATED, [{"id": updated_transaction.id, "status": updated_transaction.status}])
         return updated_transaction
 
+    def bulk_update_status(self, status: str, ids: list[UUID] | None = None, filters: dict | None = None) -> dict[str, int]:
+        if ids is not None:
+            ids = set(ids)
+            queryset = Transaction.objects.filter(id__in=ids)
+        else:
+            queryset = Transaction.objects.filter(**filters)
+        with immediate_atomic():
+            counts = queryset.aggregate(matched=Count('id'), unchanged=Count('id', filter=Q(status=status)))
+            updated_ids = list(queryset.exclude(status=status).values_list('id', flat=True))
+            self.sketch_service.record_status_change(queryset.exclude(status=status), status)
+            updated = queryset.exclude(status=status).update(status=status)
+            self.event_service.record(TransactionEvent.UPDATED, [{"id": transaction_id, "status": status}
+                                                                 for transaction_id in updated_ids])
+        return {
+            'status': status,
+            'updated': updated,
+            'unchanged': counts['unchanged'],
+            'not_found': len(ids) - counts['matched'] if ids is not None else 0,
+        }
+
     def delete_transaction(self, transaction_id: UUID) -> None:
         transaction = self.get_transactions_by_id(transaction_id)
-        transaction.delete()
+        with immediate_atomic():
+            self.sketch_service.remove(Transaction.objects.filter(id=transaction_id))
+            self.related_product_service.record([ProductPerTransaction.objects.filter(transaction_id=transaction_id)
+                                                 .values_list('product_id', flat=True)], sign=-1)
+            transaction.delete()
+            self.event_service.record(TransactionEvent.DELETED, [{"id": transaction_id}])
 
     def generate_sales_report(self) -> Report:
+        selling_by_products = self.get_selling_by_products()
+        num_sales, total_sales = self.get_paid_sales()
+        sketches = self.sketch_service.get_sketches()
         return Report(
             total_clients=self.get_total_clients(),
             total_products=self.get_total_products(),
-            num_sales=self.get_num_sales(),
-            total_sales=self.get_total_sales(),
-            best_selling_product=self.get_best_selling_product(),
-            selling_by_products=self.get_selling_by_products()
+            num_sales=num_sales,
+            total_sales=total_sales,
+            best_selling_product=self.get_best_selling_product(selling_by_products),
+            selling_by_products=selling_by_products,
+            ticket_size=self.sketch_service.get_ticket_size(sketches[SalesSketchBucket.TICKET_SIZE]),
+            basket_size=self.sketch_service.get_basket_size(sketches[SalesSketchBucket.BASKET_SIZE])
+        )
+
+    async def agenerate_sales_report(self) -> Report:
+        selling_by_products = await self.aget_selling_by_products()
+        num_sales, total_sales = await self.aget_paid_sales()
+        sketches = await self.sketch_service.aget_sketches()
+        return Report(
+            total_clients=await Client.objects.acount(),
+            total_products=await Product.objects.acount(),
+            num_sales=num_sales,
+            total_sales=total_sales,
+            best_selling_product=self.get_best_selling_product(selling_by_products),
+            selling_by_products=selling_by_products,
+            ticket_size=self.sketch_service.get_ticket_size(sketches[SalesSketchBucket.TICKET_SIZE]),
+            basket_size=self.sketch_service.get_basket_size(sketches[SalesSketchBucket.BASKET_SIZE])
         )
 
     def generate_sales_report_pdf(self):
-        report = self.generate_sales_report()
+        return self.render_sales_report_pdf(self.generate_sales_report())
+
+    def render_sales_report_pdf(self, report: Report):
+        from reportlab.graphics.charts.barcharts import VerticalBarChart
+        from reportlab.graphics.charts.textlabels import Label
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib import colors
+        from reportlab.pdfgen import canvas
+        from reportlab.platypus import Table, TableStyle
+
         buffer = io.BytesIO()
         page = canvas.Canvas(buffer)
         page.setFont('Helvetica-Bold', 15)
@@ -91,6 +381,11 @@ class TransactionService:
         page.drawString(100, 670, f"Numero de ventas: {report.num_sales}")
         page.drawString(100, 640, f"Ventas totales: {report.total_sales}")
         page.drawString(100, 610, f"Producto mas vendido: {report.best_selling_product}")
+        y = 760
+        for label, quantiles in (("Valor de venta", report.ticket_size), ("Unidades por venta", report.basket_size)):
+            for name in ('p50', 'p95', 'p99'):
+                page.drawString(330, y, f"{label} {name}: {quantiles.get(name)}")
+                y -= 30
         page.setFont('Helvetica-Bold', 15)
         page.drawString(100, 570, "Ventas por productos")
         data = [["Producto", "Venta total"]]
@@ -126,7 +421,6 @@ class TransactionService:
 
         draw.add(bar)
         draw.add(title)
-        draw.save()
         draw.drawOn(page, 100, 140)
 
         page.showPage()
@@ -140,27 +434,203 @@ class TransactionService:
     def get_total_products(self) -> int:
         return Product.objects.count()
 
-    def get_num_sales(self) -> int:
-        return Transaction.objects.filter(status='PAGADO').count()
+    def get_paid_sales(self) -> tuple[int, Decimal | None]:
+        paid = Transaction.objects.filter(status='PAGADO').aggregate(num_sales=Count('id'), total=Sum('total'))
+        archived_summary = self.get_archived_summary()
+        return paid['num_sales'] + archived_summary.num_sales, self.add_archived_total(paid['total'], archived_summary)
+
+    async def aget_paid_sales(self) -> tuple[int, Decimal | None]:
+        paid = await Transaction.objects.filter(status='PAGADO').aaggregate(num_sales=Count('id'), total=Sum('total'))
+        archived_summary = await self.aget_archived_summary()
+        return paid['num_sales'] + archived_summary.num_sales, self.add_archived_total(paid['total'], archived_summary)
+
+    def get_archived_summary(self, status: str = 'PAGADO') -> ArchivedSalesSummary:
+        return ArchivedSalesSummary.objects.filter(status=status).first() or ArchivedSalesSummary(status=status)
+
+    async def aget_archived_summary(self, status: str = 'PAGADO') -> ArchivedSalesSummary:
+        return await ArchivedSalesSummary.objects.filter(status=status).afirst() or ArchivedSalesSummary(status=status)
 
-    def get_total_sales(self) -> Decimal:
-        return Transaction.objects.filter(status='PAGADO').aggregate(Sum('total'))['total__sum']
+    def add_archived_total(self, total: Decimal | None, archived_summary: ArchivedSalesSummary) -> Decimal | None:
+        if not archived_summary.num_sales:
+            return total
+        return (total or 0) + archived_summary.total
 
-    def get_best_selling_product(self) -> str:
-        self.cursor.execute("select products.name, sum(total) as total_by_product from transactions_productpertransaction "
-                            "inner join products on transactions_productpertransaction.product_id = products.id "
-                            "group by product_id ORDER BY total_by_product DESC")
+    def get_read_connection(self):
+        return connections[router.db_for_read(ProductPerTransaction)]
 
-        product_name, total = self.cursor.fetchone()
-        return product_name
+    def get_best_selling_product(self, selling_by_products: dict[str, Decimal]) -> str | None:
+        return max(selling_by_products, key=selling_by_products.get) if selling_by_products else None
 
     def get_selling_by_products(self) -> dict[str, Decimal]:
-        self.cursor.execute("select products.name, sum(total) as total_by_product from transactions_productpertransaction "
-                            "inner join products on transactions_productpertransaction.product_id = products.id "
-                            "group by product_id")
-        selling_by_product: dict[str, Decimal] = {}
+        with self.get_read_connection().cursor() as cursor:
+            cursor.execute(f"select products.name, sum(total) as total_by_product from ({self.SALES_BY_PRODUCT_SQL}) as sales "
+                           "inner join products on sales.product_id = products.id "
+                           "group by sales.product_id")
+            selling_by_product: dict[str, Decimal] = {}
+
+            for product_name, total in cursor.fetchall():
+                selling_by_product[product_name] = Decimal(total)
+
+        return selling_by_product
+
+    async def aget_selling_by_products(self) -> dict[str, Decimal]:
+        selling_by_product_id: dict[int, tuple[str, Decimal]] = {}
+        async for row in (ProductPerTransaction.objects.values('product_id', 'product__name')
+                          .annotate(total_by_product=Sum('total')).order_by('product_id')):
+            selling_by_product_id[row['product_id']] = (row['product__name'], Decimal(row['total_by_product']))
+        async for product_id, product_name, total in ArchivedProductSales.objects.values_list('product_id', 'product__name', 'total'):
+            _, hot_total = selling_by_product_id.get(product_id, (product_name, Decimal(0)))
+            selling_by_product_id[product_id] = (product_name, hot_total + total)
+        return {product_name: total for _, (product_name, total) in sorted(selling_by_product_id.items())}
+
+class TransactionArchiveService:
+    TRANSACTION_COLUMNS = ('id', 'client', 'payment_method', 'status', 'total', 'created_at')
+    PRODUCT_COLUMNS = ('id', 'transaction', 'product', 'quantity', 'total')
+    UNSETTLED_STATUSES = ('PENDIENTE',)
+
+    def archive(self, before: datetime, batch_size: int = 1000) -> tuple[int, int]:
+        archived_transactions, archived_lines = 0, 0
+        while True:
+            with immediate_atomic():
+                transaction_ids = list(Transaction.objects.filter(created_at__lt=before)
+                                       .exclude(status__in=self.UNSETTLED_STATUSES)
+                                       .order_by('created_at', 'id').values_list('id', flat=True)[:batch_size])
+                if not transaction_ids:
+                    return archived_transactions, archived_lines
+                archived_lines += self.archive_batch(transaction_ids)
+                archived_transactions += len(transaction_ids)
+
+    def archive_batch(self, transaction_ids: list[UUID]) -> int:
+        transactions = Transaction.objects.filter(id__in=transaction_ids)
+        lines = ProductPerTransaction.objects.filter(transaction_id__in=transaction_ids)
+        self.add_to_rollups(transactions, lines)
+        self.copy_rows(ArchivedTransaction, transactions, self.TRANSACTION_COLUMNS)
+        self.copy_rows(ArchivedProductPerTransaction, lines, self.PRODUCT_COLUMNS)
+        archived_lines, _ = lines.delete()
+        transactions.delete()
+        return archived_lines
+
+    def copy_rows(self, target_model, queryset: QuerySet, fields: tuple[str, ...]) -> None:
+        sql, params = queryset.order_by().values_list(*fields).query.sql_with_params()
+        columns = ', '.join(target_model._meta.get_field(field).column for field in fields)
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f"insert into {target_model._meta.db_table} ({columns}) {sql}", params)
+
+    def add_to_rollups(self, transactions: QuerySet, lines: QuerySet) -> None:
+        sales_by_product = {row['product_id']: row['total_by_product'] for row in
+                            lines.values('product_id').annotate(total_by_product=Sum('total')).order_by()}
+        product_sales = ArchivedProductSales.objects.in_bulk(sales_by_product.keys())
+        ArchivedProductSales.objects.bulk_create(
+            [ArchivedProductSales(product_id=product_id,
+                                  total=total + (product_sales[product_id].total if product_id in product_sales else 0))
+             for product_id, total in sales_by_product.items()],
+            update_conflicts=True, unique_fields=['product'], update_fields=['total'])
+
+        sales_by_status = {row['status']: row for row in
+                           transactions.values('status').annotate(num_sales=Count('id'), total_sales=Sum('total')).order_by()}
+        summaries = ArchivedSalesSummary.objects.in_bulk(sales_by_status.keys())
+        ArchivedSalesSummary.objects.bulk_create(
+            [ArchivedSalesSummary(status=status,
+                                  num_sales=row['num_sales'] + (summaries[status].num_sales if status in summaries else 0),
+                                  total=row['total_sales'] + (summaries[status].total if status in summaries else 0))
+             for status, row in sales_by_status.items()],
+            update_conflicts=True, unique_fields=['status'], update_fields=['num_sales', 'total'])
+
+
+class TransactionInvoiceService:
+    INVOICE_FIELDS = ('id', 'created_at', 'client_id', 'client__name', 'client__last_name', 'client__email',
+                      'client__address', 'payment_method', 'status', 'total')
+
+    def get_invoices(self, transaction_ids: list[UUID]) -> list[dict]:
+        invoices = {}
+        for transaction_model, product_model in TransactionService().get_list_models(include_archived=True):
+            missing_ids = [transaction_id for transaction_id in transaction_ids if transaction_id not in invoices]
+            if not missing_ids:
+                break
+            for row in transaction_model.objects.filter(id__in=missing_ids).values(*self.INVOICE_FIELDS):
+                invoices[row['id']] = {
+                    'id': str(row['id']),
+                    'created_at': f"{row['created_at']:%Y-%m-%d %H:%M}",
+                    'client': row['client_id'],
+                    'client_name': f"{row['client__name']} {row['client__last_name']}",
+                    'client_email': row['client__email'],
+                    'client_address': row['client__address'],
+                    'payment_method': row['payment_method'],
+                    'status': row['status'],
+                    'total': str(row['total']),
+                    'products': [],
+                }
+            lines = (product_model.objects.filter(transaction_id__in=missing_ids).order_by('id')
+                     .values_list('transaction_id', 'product__name', 'quantity', 'total'))
+            for transaction_id, product_name, quantity, total in lines:
+                if transaction_id in invoices:
+                    unit_price = (total / quantity).quantize(Decimal('0.01')) if quantity else total
+                    invoices[transaction_id]['products'].append((product_name, quantity, str(unit_price), str(total)))
+        return [invoices[transaction_id] for transaction_id in transaction_ids if transaction_id in invoices]
+
+    # Archived sales go first since they are the oldest. A filter selects at most one id over INVOICE_BATCH_MAX_IDS,
+    # enough for the caller to tell the selection is too large without loading all of it.
+    def get_selected_ids(self, ids: list[UUID] | None = None, filters: dict | None = None) -> list[UUID]:
+        if ids is not None:
+            return list(dict.fromkeys(ids))
+        limit = settings.INVOICE_BATCH_MAX_IDS + 1
+        selected_ids = []
+        for transaction_model, _ in reversed(TransactionService().get_list_models(include_archived=True)):
+            selected_ids.extend(transaction_model.objects.filter(**filters).order_by('created_at', 'id')
+                                .values_list('id', flat=True)[:limit - len(selected_ids)])
+        return selected_ids
+
+    def get_cache_path(self, invoice: dict) -> Path:
+        return Path(settings.INVOICE_CACHE_DIR) / invoice['id'][:2] / f"{invoice['id']}-{invoice_version(invoice)}.pdf"
+
+    def get_cached(self, invoice: dict) -> bytes | None:
+        try:
+            return self.get_cache_path(invoice).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def store(self, invoice: dict, pdf: bytes) -> None:
+        path = self.get_cache_path(invoice)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for stale_path in path.parent.glob(f"{invoice['id']}-*.pdf"):
+            stale_path.unlink(missing_ok=True)
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temporary_path.write_bytes(pdf)
+        os.replace(temporary_path, path)
+
+    def get_invoice_pdf(self, transaction_id: UUID) -> bytes:
+        invoices = self.get_invoices([transaction_id])
+        if not invoices:
+            raise Transaction.DoesNotExist(f"Transaction {transaction_id} does not exist")
+        pdf = self.get_cached(invoices[0])
+        if pdf is None:
+            pdf = render_invoice(invoices[0])
+            self.store(invoices[0], pdf)
+        return pdf
+
+    def iter_invoice_pdfs(self, transaction_ids: list[UUID]):
+        executor = get_process_executor() if settings.INVOICE_RENDER_IN_PROCESS_POOL else None
+        max_in_flight = 4 * (settings.PROCESS_EXECUTOR_WORKERS or 1)
+        in_flight = deque()
+        for offset in range(0, len(transaction_ids), settings.INVOICE_BATCH_LOAD_SIZE):
+            for invoice in self.get_invoices(transaction_ids[offset:offset + settings.INVOICE_BATCH_LOAD_SIZE]):
+                pdf = self.get_cached(invoice)
+                if pdf is None:
+                    pdf = executor.submit(render_invoice, invoice) if executor else render_invoice(invoice)
+                    in_flight.append((invoice, pdf, True))
+                else:
+                    in_flight.append((invoice, pdf, False))
+                while len(in_flight) > max_in_flight:
+                    yield self.complete(*in_flight.popleft())
+        while in_flight:
+            yield self.complete(*in_flight.popleft())
 
-        for product_name, total in self.cursor.fetchall():
-            selling_by_product[product_name] = Decimal(total)
+    def complete(self, invoice: dict, pdf, rendered: bool) -> tuple[dict, bytes]:
+        if not isinstance(pdf, bytes):
+            pdf = pdf.result()
+        if rendered:
+            self.store(invoice, pdf)
+        return invoice, pdf
 
-        return selling_by_product
\ No newline at end of file
+    def stream_invoice_zip(self, transaction_ids: list[UUID]):
+        return stream_zip((f"factura-{invoice['id']}.pdf", pdf) for invoice, pdf in self.iter_invoice_pdfs(transaction_ids))
@@ -1,14 +1,32 @@
+from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.auth.models import User
 # Create your tests here.
 
-from django.test import TestCase, Client
+import asyncio
+import io
+import re
+import threading
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import Count, Sum
+from django.test import TestCase, TransactionTestCase, Client, AsyncClient, override_settings
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 
 import clients.models
 from products.models import Product
-from transactions.models import Transaction
+from commons.group_commit import group_committer
+from transactions.async_views import transaction_events
+from transactions.models import Transaction, ProductPerTransaction, ArchivedTransaction, TransactionEvent, SalesSketchBucket
 
 
 # Create your tests here.
@@ -108,6 +126,18 @@ class ClientTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.json()), 2)
 
+    def test_list_transactions_is_byte_compatible_with_model_serialization(self):
+        product = Product.objects.create(name="Producto ñ", category="Test", subcategory="Test", price=1500.50, quantity=15)
+        client = clients.models.Client.objects.create(document="test", name="test", last_name="test", email="test@example.com")
+        for quantity in (1, 2):
+            transaction = Transaction.objects.create(client=client, payment_method="cash", status="PAGADO", total=quantity * 1500.50)
+            ProductPerTransaction.objects.create(transaction=transaction, product=product, quantity=quantity, total=quantity * 1500.50)
+            ProductPerTransaction.objects.create(transaction=transaction, product=product, quantity=1, total=1500.50)
+
+        response = self.client.get("/api/transactions/")
+        expected = JSONRenderer().render([transaction.to_dict() for transaction in Transaction.objects.all()])
+        self.assertEqual(response.content, expected)
+
     def test_update_transaction_successfully(self):
         Product.objects.create(
             name="Another Product",
@@ -138,6 +168,37 @@ class ClientTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json()["status"], "PENDIENTE")
 
+    def test_bulk_update_transaction_status_successfully(self):
+        clients.models.Client.objects.create(document="test", name="test", last_name="test", email="test@example.com")
+        clients.models.Client.objects.create(document="other", name="other", last_name="other", email="other@example.com")
+        pending = [Transaction.objects.create(client_id="test", payment_method="cash", status="PENDIENTE", total=Decimal(100))
+                   for _ in range(3)]
+        paid = Transaction.objects.create(client_id="test", payment_method="cash", status="PAGADO", total=Decimal(100))
+        other = Transaction.objects.create(client_id="other", payment_method="card", status="PENDIENTE", total=Decimal(100))
+
+        response = self.client.post("/api/transactions/bulk-status/", {
+            "ids": [str(transaction.id) for transaction in pending] + [str(paid.id), "12345678-1234-5678-1234-567812345678"],
+            "status": "PAGADO",
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.json(), {"status": "PAGADO", "updated": 3, "unchanged": 1, "not_found": 1})
+        self.assertEqual(Transaction.objects.filter(status="PAGADO").count(), 4)
+
+        response = self.client.post("/api/transactions/bulk-status/", {
+            "filter": {"client": "test", "status": "PAGADO"},
+            "status": "ANULADO",
+        }, content_type="application/json")
+        self.assertDictEqual(response.json(), {"status": "ANULADO", "updated": 4, "unchanged": 0, "not_found": 0})
+        other.refresh_from_db()
+        self.assertEqual(other.status, "PENDIENTE")
+
+    @override_settings(ADMISSION_CONTROL_ENABLED=False)
+    def test_bulk_update_transaction_status_requires_ids_or_filter(self):
+        for body in ({"status": "PAGADO"}, {"status": "PAGADO", "filter": {}},
+                     {"status": "PAGADO", "ids": ["12345678-1234-5678-1234-567812345678"], "filter": {"client": "test"}}):
+            response = self.client.post("/api/transactions/bulk-status/", body, content_type="application/json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_delete_product_successfully(self):
         Product.objects.create(
             name="Another Product",
@@ -163,3 +224,417 @@ class ClientTestCase(TestCase):
 
         with self.assertRaises(Transaction.DoesNotExist):
             Transaction.objects.get(id=transaction.id)
+
+    def test_front_create_transaction_successfully(self):
+        Product.objects.create(
+            name="Another Product",
+            category="Another Category",
+            subcategory="Another Subcategory",
+            price=25000.00,
+            quantity=15
+        )
+
+        clients.models.Client.objects.create(
+            document= "test",
+            name="test",
+            last_name="test",
+            email="test@example.com",
+            phone="123456789",
+            address= "test #123-45"
+        )
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+
+        response = Client().post(f"/api/front/transactions/?token={token}", {
+            "client": "test",
+            "product": ["1"],
+            "quantity": ["2"],
+            "payment_method": "cash",
+            "status": "PAGADO"
+        })
+        self.assertRedirects(response, f"/api/front/transactions/?token={token}", fetch_redirect_response=False)
+        self.assertEqual(Transaction.objects.get().total, Decimal("50000.00"))
+        self.assertEqual(Product.objects.get(id=1).quantity, 13)
+
+    @override_settings(FRONT_PAGE_SIZE=1)
+    def test_front_list_transactions_is_paginated(self):
+        Product.objects.create(
+            name="Another Product",
+            category="Another Category",
+            subcategory="Another Subcategory",
+            price=25000.00,
+            quantity=15
+        )
+
+        clients.models.Client.objects.create(
+            document= "test",
+            name="test",
+            last_name="test",
+            email="test@example.com",
+            phone="123456789",
+            address= "test #123-45"
+        )
+        transaction1 = Transaction.objects.create(client=clients.models.Client(document="test"), total=Decimal(50000))
+        transaction2 = Transaction.objects.create(client=clients.models.Client(document="test"), total=Decimal(60000))
+        ProductPerTransaction.objects.create(transaction=transaction1, product_id=1, quantity=2, total=Decimal(50000))
+        first_transaction, second_transaction = sorted([transaction1, transaction2], key=lambda transaction: transaction.id)
+        token = self.client.post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+
+        with self.assertNumQueries(3):
+            response = Client().get(f"/api/front/transactions/?token={token}&page=2")
+            content = b"".join(response.streaming_content).decode()
+        self.assertIn(str(second_transaction.id), content)
+        self.assertNotIn(str(first_transaction.id), content)
+        self.assertIn("Pagina 2 de 2", content)
+
+
+
+class ArchiveTransactionsTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.client = Client(headers={"authorization": token})
+        products = [Product.objects.create(name=f"Producto {number}", category="Test", subcategory="Test", price=1000,
+                                           quantity=100) for number in range(3)]
+        clients.models.Client.objects.create(document="test", name="test", last_name="test", email="test@example.com")
+        old = timezone.now() - timedelta(days=400)
+        self.transactions = []
+        for number, (status_name, created_at) in enumerate([("PAGADO", old), ("PAGADO", old), ("ANULADO", old),
+                                                            ("PENDIENTE", old), ("PAGADO", timezone.now())]):
+            transaction = Transaction.objects.create(client_id="test", payment_method="cash", status=status_name,
+                                                     total=Decimal(3000), created_at=created_at)
+            ProductPerTransaction.objects.create(transaction=transaction, product=products[number % 3], quantity=1, total=1000)
+            ProductPerTransaction.objects.create(transaction=transaction, product=products[0], quantity=2, total=2000)
+            self.transactions.append(transaction)
+
+    def test_archive_keeps_reports_and_reads_intact(self):
+        report = self.client.get("/api/transactions/json/report/").json()
+        transactions = sorted(self.client.get("/api/transactions/").json(), key=lambda row: row["id"])
+        archived_detail = self.client.get(f"/api/transactions/{self.transactions[0].id}/").json()
+
+        call_command("archive_transactions", days=365, batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(ProductPerTransaction.objects.count(), 4)
+        self.assertEqual(ArchivedTransaction.objects.count(), 3)
+        archived_report = self.client.get("/api/transactions/json/report/").json()
+        for field in ("num_sales", "total_sales", "best_selling_product", "selling_by_products"):
+            self.assertEqual(archived_report[field], report[field])
+        self.assertEqual(len(self.client.get("/api/transactions/").json()), 2)
+        self.assertEqual(sorted(self.client.get("/api/transactions/?include_archived=true").json(), key=lambda row: row["id"]),
+                         transactions)
+        self.assertEqual(self.client.get(f"/api/transactions/{self.transactions[0].id}/").json(), archived_detail)
+
+        with override_settings(ROOT_URLCONF='sales_system.async_urls'):
+            async_report = async_to_sync(AsyncClient().get)("/api/transactions/json/report/",
+                                                            headers={"authorization": self.client.defaults["HTTP_AUTHORIZATION"]}).json()
+        self.assertEqual(async_report["selling_by_products"], report["selling_by_products"])
+        self.assertEqual(async_report["num_sales"], report["num_sales"])
+
+
+class SalesSketchTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.client = Client(headers={"authorization": token})
+        products = [Product.objects.create(name=f"Producto {number}", category="Test", subcategory="Test",
+                                           price=Decimal(1000 * number + 250), quantity=1000) for number in range(1, 6)]
+        clients.models.Client.objects.create(document="test", name="test", last_name="test", email="test@example.com")
+        self.transaction_ids = []
+        for number in range(30):
+            response = self.client.post("/api/transactions/", {
+                "client": "test",
+                "products": [{"product": product.id, "quantity": number % 4 + 1} for product in products[:number % 5 + 1]],
+                "payment_method": "cash",
+                "status": "PAGADO",
+            }, content_type="application/json")
+            self.transaction_ids.append(response.json()["id"])
+
+    def get_buckets(self) -> list[tuple]:
+        return list(SalesSketchBucket.objects.exclude(count=0).order_by('metric', 'period', 'bucket')
+                    .values_list('metric', 'period', 'bucket', 'count'))
+
+    def test_report_percentiles_follow_sales_changes(self):
+        self.client.put(f"/api/transactions/{self.transaction_ids[0]}/", {"client": "test", "products": [],
+                        "payment_method": "cash", "status": "ANULADO"}, content_type="application/json")
+        self.client.post("/api/transactions/bulk-status/", {"ids": self.transaction_ids[1:4], "status": "PENDIENTE"},
+                         content_type="application/json")
+        self.client.post("/api/transactions/bulk-status/", {"ids": self.transaction_ids[2:3], "status": "PAGADO"},
+                         content_type="application/json")
+        self.client.delete(f"/api/transactions/{self.transaction_ids[5]}/")
+
+        paid = Transaction.objects.filter(status="PAGADO").annotate(items=Sum('productpertransaction__quantity'))
+        totals = sorted(paid.values_list('total', flat=True))
+        items = sorted(paid.values_list('items', flat=True))
+        report = self.client.get("/api/transactions/json/report/").json()
+        for name, q in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99)):
+            expected = totals[int(q * (len(totals) - 1))]
+            self.assertLessEqual(abs(Decimal(str(report["ticket_size"][name])) - expected), expected * Decimal("0.0101"))
+            self.assertEqual(report["basket_size"][name], items[int(q * (len(items) - 1))])
+
+        buckets = self.get_buckets()
+        call_command("archive_transactions", days=0, stdout=io.StringIO())
+        self.assertEqual(self.get_buckets(), buckets)
+        call_command("rebuild_sales_sketches", stdout=io.StringIO())
+        self.assertEqual(self.get_buckets(), buckets)
+
+        response = self.client.get("/api/transactions/pdf/report/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class InvoiceTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.client = Client(headers={"authorization": token})
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = Path(cache_dir.name)
+        settings_override = override_settings(INVOICE_CACHE_DIR=self.cache_dir, PROCESS_EXECUTOR_WORKERS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        products = [Product.objects.create(name=f"Producto {number}", category="Test", subcategory="Test",
+                                           price=Decimal("1500.50"), quantity=1000) for number in range(60)]
+        clients.models.Client.objects.create(document="test", name="Ana", last_name="Perez", email="test@example.com",
+                                             address="Calle 1 #2-3")
+        self.transactions = []
+        for number, lines in enumerate((2, 60, 1)):
+            transaction = Transaction.objects.create(client_id="test", payment_method="cash", status="PAGADO", total=0)
+            for product in products[:lines]:
+                ProductPerTransaction.objects.create(transaction=transaction, product=product, quantity=2, total=Decimal("3001.00"))
+            self.transactions.append(transaction)
+
+    def test_invoice_is_rendered_once_per_version(self):
+        transaction = self.transactions[0]
+        response = self.client.get(f"/api/transactions/{transaction.id}/invoice/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        pdf = b"".join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(len(list(self.cache_dir.rglob(f"{transaction.id}-*.pdf"))), 1)
+
+        with mock.patch("transactions.services.render_invoice") as render_invoice:
+            self.assertEqual(b"".join(self.client.get(f"/api/transactions/{transaction.id}/invoice/").streaming_content), pdf)
+        render_invoice.assert_not_called()
+
+        self.client.post("/api/transactions/bulk-status/", {"ids": [str(transaction.id)], "status": "ANULADO"},
+                         content_type="application/json")
+        self.assertNotEqual(b"".join(self.client.get(f"/api/transactions/{transaction.id}/invoice/").streaming_content), pdf)
+        self.assertEqual(len(list(self.cache_dir.rglob(f"{transaction.id}-*.pdf"))), 1)
+
+        self.assertEqual(self.client.get("/api/transactions/12345678-1234-5678-1234-567812345678/invoice/").status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_invoices_are_streamed_as_zip(self):
+        self.client.get(f"/api/transactions/{self.transactions[2].id}/invoice/")
+        response = self.client.post("/api/transactions/invoices/", {"filter": {"client": "test"}}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertNotIn("Content-Encoding", response)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.namelist(), [f"factura-{transaction.id}.pdf" for transaction in self.transactions])
+        pages = [len(re.findall(rb"/Type /Page\b(?!s)", archive.read(name))) for name in archive.namelist()]
+        self.assertEqual(pages, [1, 2, 1])
+        self.assertEqual(len(list(self.cache_dir.rglob("*.pdf"))), 3)
+
+        response = self.client.post("/api/transactions/invoices/", {"ids": [str(self.transactions[1].id)],
+                                    "filter": {"client": "test"}}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invoice_filter_includes_archived_sales_and_is_capped(self):
+        Transaction.objects.filter(id=self.transactions[0].id).update(created_at=timezone.now() - timedelta(days=400))
+        call_command("archive_transactions", days=365, stdout=io.StringIO())
+        self.assertTrue(ArchivedTransaction.objects.filter(id=self.transactions[0].id).exists())
+
+        response = self.client.post("/api/transactions/invoices/", {"filter": {"client": "test"}}, content_type="application/json")
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f"factura-{transaction.id}.pdf" for transaction in self.transactions])
+
+        with override_settings(INVOICE_BATCH_MAX_IDS=2):
+            response = self.client.post("/api/transactions/invoices/", {"filter": {"client": "test"}},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(ROOT_URLCONF='sales_system.async_urls')
+    def test_invoices_are_streamed_chunk_by_chunk_under_asgi(self):
+        async def post():
+            response = await AsyncClient().post("/api/transactions/invoices/", {"ids": [str(self.transactions[0].id)]},
+                                                content_type="application/json",
+                                                headers={"authorization": self.client.defaults["HTTP_AUTHORIZATION"]})
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(post)()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        self.assertEqual(archive.namelist(), [f"factura-{self.transactions[0].id}.pdf"])
+
+
+@override_settings(ROOT_URLCONF='sales_system.async_urls')
+class AsyncTransactionTestCase(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        self.headers = {"authorization": token}
+        self.client = Client(headers=self.headers)
+        self.async_client = AsyncClient()
+        Product.objects.create(
+            name="Another Product",
+            category="Another Category",
+            subcategory="Another Subcategory",
+            price=25000.00,
+            quantity=15
+        )
+        clients.models.Client.objects.create(
+            document= "test",
+            name="test",
+            last_name="test",
+            email="test@example.com",
+            phone="123456789",
+            address= "test #123-45"
+        )
+        self.transaction = Transaction.objects.create(client=clients.models.Client(document="test"), payment_method="cash",
+                                                      status="PAGADO", total=Decimal(50000))
+        ProductPerTransaction.objects.create(transaction=self.transaction, product_id=1, quantity=2, total=Decimal(50000))
+
+    def test_async_list_and_retrieve_match_sync_responses(self):
+        for url in ["/api/transactions/", f"/api/transactions/{self.transaction.id}/", "/api/products/", "/api/products/1/",
+                    "/api/clients/", "/api/clients/test/"]:
+            async_response = async_to_sync(self.async_client.get)(url, headers=self.headers)
+            with override_settings(ROOT_URLCONF='sales_system.urls'):
+                sync_response = self.client.get(url)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response.content, sync_response.content)
+
+    async def test_async_report_is_generated(self):
+        response = await self.async_client.get("/api/transactions/json/report/", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["best_selling_product"], "Another Product")
+
+        response = await self.async_client.get("/api/transactions/pdf/report/", headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.content.startswith(b"%PDF"))
+
+    async def test_async_views_require_token(self):
+        response = await AsyncClient().get("/api/transactions/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def next_event(self, stream) -> str:
+        while (chunk := await asyncio.wait_for(anext(stream), 5)) == b": keepalive\n\n":
+            pass
+        return chunk.decode()
+
+    @override_settings(EVENT_STREAM_POLL_INTERVAL=0.01, EVENT_STREAM_HEARTBEAT=0.05)
+    async def test_events_stream_resumes_and_pushes_committed_changes(self):
+        await sync_to_async(self.client.put)(f"/api/transactions/{self.transaction.id}/", {
+            "client": "test", "products": [], "payment_method": "cash", "status": "ANULADO"}, content_type="application/json")
+
+        event_id = (await TransactionEvent.objects.alast()).id
+
+        response = await self.async_client.get("/api/transactions/events/",
+                                               headers={**self.headers, "Last-Event-ID": str(event_id - 1)})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await self.next_event(stream), "retry: 3000\n\n")
+            self.assertEqual(await self.next_event(stream), f'id: {event_id}\nevent: transaction.updated\n'
+                                                            f'data: {{"id":"{self.transaction.id}","status":"ANULADO"}}\n\n')
+
+            await sync_to_async(self.client.delete)(f"/api/transactions/{self.transaction.id}/")
+            self.assertEqual(await self.next_event(stream), f'id: {event_id + 1}\nevent: transaction.deleted\n'
+                                                            f'data: {{"id":"{self.transaction.id}"}}\n\n')
+        finally:
+            await stream.aclose()
+
+    @override_settings(EVENT_STREAM_POLL_INTERVAL=0.01, EVENT_STREAM_HEARTBEAT=0.05, EVENT_STREAM_MAX_CATCH_UP=1)
+    async def test_events_stream_resets_clients_too_far_behind(self):
+        for status_name in ("ANULADO", "PAGADO"):
+            await sync_to_async(self.client.put)(f"/api/transactions/{self.transaction.id}/", {
+                "client": "test", "products": [], "payment_method": "cash", "status": status_name},
+                content_type="application/json")
+        event_id = (await TransactionEvent.objects.alast()).id
+
+        response = await self.async_client.get("/api/transactions/events/",
+                                               headers={**self.headers, "Last-Event-ID": str(event_id - 2)})
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await self.next_event(stream), "retry: 3000\n\n")
+            self.assertEqual(await self.next_event(stream), f"id: {event_id}\nevent: transaction.reset\ndata: {{}}\n\n")
+        finally:
+            await stream.aclose()
+
+    @override_settings(EVENT_STREAM_POLL_INTERVAL=0.01, EVENT_STREAM_HEARTBEAT=0.05)
+    async def test_events_stream_fails_and_restarts_when_the_poller_cannot_start(self):
+        with mock.patch.object(transaction_events, 'get_last_id', side_effect=DatabaseError("database is locked")):
+            response = await self.async_client.get("/api/transactions/events/", headers=self.headers)
+            with self.assertRaises(DatabaseError):
+                await asyncio.wait_for(anext(aiter(response.streaming_content)), 5)
+        self.assertIsNone(transaction_events.poller)
+
+        response = await self.async_client.get("/api/transactions/events/", headers=self.headers)
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await self.next_event(stream), "retry: 3000\n\n")
+        finally:
+            await stream.aclose()
+
+    async def test_events_stream_requires_token(self):
+        response = await AsyncClient().get("/api/transactions/events/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class SeedScaleDataTestCase(TransactionTestCase):
+    def seed(self) -> dict:
+        call_command("seed_scale_data", products=20, clients=50, transactions=300, batch_size=100, stdout=io.StringIO())
+        summary = Transaction.objects.aggregate(count=Count('id'), total=Sum('total'))
+        summary['lines'] = ProductPerTransaction.objects.count()
+        return summary
+
+    def test_seed_is_deterministic_and_skewed(self):
+        summary = self.seed()
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(clients.models.Client.objects.count(), 50)
+        self.assertEqual(summary['count'], 300)
+        self.assertEqual(summary['total'], ProductPerTransaction.objects.aggregate(Sum('total'))['total__sum'])
+
+        top_product = ProductPerTransaction.objects.values('product').annotate(lines=Count('id')).order_by('-lines')[0]
+        self.assertGreater(top_product['lines'], summary['lines'] / 20 * 2)
+
+        ProductPerTransaction.objects.all().delete()
+        Transaction.objects.all().delete()
+        clients.models.Client.objects.all().delete()
+        Product.objects.all().delete()
+        self.assertEqual(self.seed(), summary)
+
+
+@override_settings(GROUP_COMMIT_ENABLED=True, GROUP_COMMIT_WINDOW_MS=200)
+class GroupCommitTestCase(TransactionTestCase):
+    def test_concurrent_creates_share_a_commit_and_keep_their_own_result(self):
+        User.objects.create_superuser('test', 'test@gmail.com', 'testpass')
+        token = Client().post("/api/auth/login/", {"username": "test", "password": "testpass"}).json()["token"]
+        product = Product.objects.create(name="Producto", category="Hogar", subcategory="Test", price=1000, quantity=5)
+        clients.models.Client.objects.create(document="test", name="test", last_name="test", email="test@example.com")
+        responses, barrier = [], threading.Barrier(8)
+
+        def buy():
+            client = Client(headers={"authorization": token})
+            barrier.wait()
+            responses.append(client.post("/api/transactions/", {
+                "client": "test", "products": [{"product": product.id, "quantity": 1}],
+                "payment_method": "cash", "status": "PAGADO"}, content_type="application/json"))
+
+        with mock.patch.object(group_committer, 'commit', wraps=group_committer.commit) as commit:
+            threads = [threading.Thread(target=buy) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertLess(commit.call_count, 8)
+        self.assertEqual(sorted(response.status_code for response in responses), [201] * 5 + [500] * 3)
+        self.assertTrue(all("stock" in response.json()['error'] for response in responses if response.status_code == 500))
+        self.assertEqual(Product.objects.get(id=product.id).quantity, 0)
+        self.assertEqual(Transaction.objects.count(), 5)
+        self.assertEqual(sorted(str(transaction_id) for transaction_id in Transaction.objects.values_list('id', flat=True)),
+                         sorted(response.json()['id'] for response in responses if response.status_code == 201))
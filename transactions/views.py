@@ -1,3 +1,7 @@
+import io
+from uuid import UUID
+
+from django.conf import settings
 from django.http import FileResponse
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
@@ -5,128 +9,124 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from commons.jwt_utils import JWTUtils
-from commons.permissions import Permissions
+from commons.authentication import JWTAuthentication
+from commons.permissions import Permissions, HasActionPermission
+from commons.streaming import streaming_response
 from transactions.models import Transaction
-from transactions.serializers import TransactionRequestSerializer, TransactionDataSerializer
-from transactions.services import TransactionService
+from transactions.serializers import TransactionRequestSerializer, TransactionDataSerializer, \
+    TransactionBulkStatusRequestSerializer, TransactionBulkStatusResponseSerializer, TransactionInvoiceBatchRequestSerializer
+from transactions.services import TransactionService, TransactionInvoiceService
 import logging
 
 # Create your views here.
 
+def include_archived(request) -> bool:
+    return request.GET.get('include_archived', '').lower() in ('true', '1')
+
+
 class TransactionViewSet(viewsets.ViewSet):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [HasActionPermission]
+    action_permissions = {
+        'create': (Permissions.CREATE_TRANSACTION,),
+        'retrieve': (Permissions.VIEW_TRANSACTION,),
+        'list': (Permissions.VIEW_TRANSACTION,),
+        'update': (Permissions.UPDATE_TRANSACTION,),
+        'bulk_update_status': (Permissions.UPDATE_TRANSACTION,),
+        'destroy': (Permissions.DELETE_TRANSACTION,),
+        'generate_report': (Permissions.VIEW_TRANSACTION,),
+        'invoice': (Permissions.VIEW_TRANSACTION,),
+        'invoices': (Permissions.VIEW_TRANSACTION,),
+    }
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.transaction_service = TransactionService()
-        self.forbidden_response = Response({
-            "message": "You don't have permissions to perform this action.",
-        }, status=status.HTTP_403_FORBIDDEN)
+        self.invoice_service = TransactionInvoiceService()
 
     header_param = openapi.Parameter('authorization', openapi.IN_HEADER, description="authorization token header param",
                                      type=openapi.IN_HEADER)
+    include_archived_param = openapi.Parameter('include_archived', openapi.IN_QUERY,
+                                               description="include archived transactions", type=openapi.TYPE_BOOLEAN)
 
     @swagger_auto_schema(request_body=TransactionRequestSerializer, responses={201: TransactionDataSerializer()},
                          manual_parameters=[header_param])
     def create(self, request):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.CREATE_TRANSACTION not in token_info['permissions']:
-            return self.forbidden_response
         try:
-            logging.info(f"Calling create transaction service with user {token_info['user']}")
+            logging.info("Calling create transaction service with user %s", request.user.username)
             transaction_request_serializer: TransactionRequestSerializer = TransactionRequestSerializer(data=request.data)
             if transaction_request_serializer.is_valid(raise_exception=True):
                 transaction, products_per_transaction = transaction_request_serializer.create(transaction_request_serializer.data)
                 transaction_saved: Transaction = self.transaction_service.create_transaction(transaction, products_per_transaction)
                 transaction_serializer: TransactionDataSerializer = TransactionDataSerializer(transaction_saved)
-                logging.info(f"Create transaction service called successfully with user {token_info['user']}")
+                logging.info("Create transaction service called successfully with user %s", request.user.username)
                 return Response(transaction_serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
-            logging.error(f"There was an error calling create transaction service with user {token_info['user']} and error {e.args[0]}")
+            logging.error("There was an error calling create transaction service with user %s and error %s", request.user.username, e.args[0])
             return Response({'error': e.args[0]}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @swagger_auto_schema(responses={200: TransactionDataSerializer(),
                                     404: "{'error': 'Transaction not found'}"},
                          manual_parameters=[header_param])
     def retrieve(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_TRANSACTION not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling retrieve transaction service with user {token_info['user']}")
+        logging.info("Calling retrieve transaction service with user %s", request.user.username)
         try:
-            logging.info(f"Retrieve transaction service called successfully with user {token_info['user']}")
-            return Response(self.transaction_service.get_transactions_by_id(pk).to_dict(), status=status.HTTP_200_OK)
+            logging.info("Retrieve transaction service called successfully with user %s", request.user.username)
+            return Response(self.transaction_service.get_transaction_for_read(pk).to_dict(), status=status.HTTP_200_OK)
         except Transaction.DoesNotExist:
-            logging.error(f"There was an error retrieving a transaction with user {token_info['user']}")
+            logging.error("There was an error retrieving a transaction with user %s", request.user.username)
             return Response({
                 "error": "Transaction not found",
             },status=status.HTTP_404_NOT_FOUND)
 
-    @swagger_auto_schema(responses={200: TransactionDataSerializer(many=True)}, manual_parameters=[header_param])
+    @swagger_auto_schema(responses={200: TransactionDataSerializer(many=True)},
+                         manual_parameters=[header_param, include_archived_param])
     def list(self, request):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
+        logging.info("Calling list transactions service with user %s", request.user.username)
+        response = self.transaction_service.get_all_transaction_dicts(include_archived(request))
 
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_TRANSACTION not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling list transactions service with user {token_info['user']}")
-        transactions = self.transaction_service.get_all_transactions()
-        response = []
-        for transaction in transactions:
-            response.append(transaction.to_dict())
-
-        logging.info(f"List transactions service called successfully with user {token_info['user']}")
+        logging.info("List transactions service called successfully with user %s", request.user.username)
         return Response(response, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(request_body=TransactionRequestSerializer, responses={200: TransactionDataSerializer()},
                          manual_parameters=[header_param])
     def update(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.UPDATE_TRANSACTION not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling update transaction service with user {token_info['user']}")
+        logging.info("Calling update transaction service with user %s", request.user.username)
         transaction_request_serializer: TransactionRequestSerializer = TransactionRequestSerializer(data=request.data)
         if transaction_request_serializer.is_valid(raise_exception=True):
             transaction, _ = transaction_request_serializer.create(transaction_request_serializer.data)
             transaction.id = pk
             transaction_saved: Transaction = self.transaction_service.update_transaction(transaction)
-            logging.info(f"Update transaction service called successfully with user {token_info['user']}")
+            logging.info("Update transaction service called successfully with user %s", request.user.username)
             return Response(transaction_saved.to_dict(), status=status.HTTP_200_OK)
 
-        logging.error(f"There was an error updating a transaction with user {token_info['user']}")
+        logging.error("There was an error updating a transaction with user %s", request.user.username)
+
+    @swagger_auto_schema(request_body=TransactionBulkStatusRequestSerializer,
+                         responses={200: TransactionBulkStatusResponseSerializer()}, manual_parameters=[header_param])
+    @action(detail=False, methods=['POST'], url_path='bulk-status')
+    def bulk_update_status(self, request):
+        logging.info("Calling bulk update transaction status service with user %s", request.user.username)
+        bulk_status_serializer = TransactionBulkStatusRequestSerializer(data=request.data)
+        bulk_status_serializer.is_valid(raise_exception=True)
+        data = bulk_status_serializer.validated_data
+        counts = self.transaction_service.bulk_update_status(data['status'], ids=data.get('ids'), filters=data.get('filter'))
+        logging.info("Bulk update transaction status service called successfully with user %s", request.user.username)
+        return Response(counts, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(responses={200: "'message': 'This Transaction has been deleted successfully'",
                                     404: "{'error': 'Transaction not found'}"},
                          manual_parameters=[header_param])
     def destroy(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.DELETE_TRANSACTION not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling delete transaction service with user {token_info['user']}")
+        logging.info("Calling delete transaction service with user %s", request.user.username)
         try:
             self.transaction_service.delete_transaction(pk)
-            logging.info(f"Delete transaction service called successfully with user {token_info['user']}")
+            logging.info("Delete transaction service called successfully with user %s", request.user.username)
             return Response({
                 "message": "This transaction has been deleted successfully",
             },status=status.HTTP_200_OK)
         except Transaction.DoesNotExist:
-            logging.error(f"There was an error retrieving a transaction in delete transaction service with user {token_info['user']}")
+            logging.error("There was an error retrieving a transaction in delete transaction service with user %s", request.user.username)
             return Response({
                 "error": "Transaction not found",
             },status=status.HTTP_404_NOT_FOUND)
@@ -134,26 +134,56 @@ class TransactionViewSet(viewsets.ViewSet):
     @swagger_auto_schema(manual_parameters=[header_param])
     @action(detail=True, methods=['GET'], url_path='report')
     def generate_report(self, request, pk=None):
-        if 'authorization' not in request.headers:
-            return self.forbidden_response
-
-        token_info = JWTUtils.decode(request.headers['authorization'])
-        if Permissions.VIEW_TRANSACTION not in token_info['permissions']:
-            return self.forbidden_response
-
-        logging.info(f"Calling generate transactions report service with user {token_info['user']}")
+        logging.info("Calling generate transactions report service with user %s", request.user.username)
 
         if pk == "json":
-            logging.info(f"Generate transactions report service called successfully with json format and user {token_info['user']}")
+            logging.info("Generate transactions report service called successfully with json format and user %s", request.user.username)
             return Response(self.transaction_service.generate_sales_report().to_dict(), status=status.HTTP_200_OK)
 
         if pk == "pdf":
-            logging.info(f"Generate transactions report service called successfully with pdf format and user {token_info['user']}")
+            logging.info("Generate transactions report service called successfully with pdf format and user %s", request.user.username)
             return FileResponse(self.transaction_service.generate_sales_report_pdf(),
                             as_attachment=True, filename="sales_report.pdf",
                             status=status.HTTP_200_OK)
 
-        logging.error(f"There was an error calling generate transactions report with user {token_info['user']}")
+        logging.error("There was an error calling generate transactions report with user %s", request.user.username)
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    @swagger_auto_schema(responses={200: "invoice PDF", 404: "{'error': 'Transaction not found'}"},
+                         manual_parameters=[header_param])
+    @action(detail=True, methods=['GET'], url_path='invoice')
+    def invoice(self, request, pk=None):
+        logging.info("Calling transaction invoice service with user %s", request.user.username)
+        try:
+            pdf = self.invoice_service.get_invoice_pdf(UUID(pk))
+        except (ValueError, Transaction.DoesNotExist):
+            logging.error("There was an error retrieving a transaction in transaction invoice service with user %s", request.user.username)
+            return Response({
+                "error": "Transaction not found",
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        logging.info("Transaction invoice service called successfully with user %s", request.user.username)
+        return FileResponse(io.BytesIO(pdf), as_attachment=True, filename=f"factura-{pk}.pdf",
+                            content_type="application/pdf", status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(request_body=TransactionInvoiceBatchRequestSerializer, responses={200: "ZIP with one invoice PDF per transaction", 400: "{'error': 'The selection has more than N transactions'}"},
+                         manual_parameters=[header_param])
+    @action(detail=False, methods=['POST'], url_path='invoices')
+    def invoices(self, request):
+        logging.info("Calling transaction invoices export service with user %s", request.user.username)
+        invoice_batch_serializer = TransactionInvoiceBatchRequestSerializer(data=request.data)
+        invoice_batch_serializer.is_valid(raise_exception=True)
+        data = invoice_batch_serializer.validated_data
+        transaction_ids = self.invoice_service.get_selected_ids(ids=data.get('ids'), filters=data.get('filter'))
+        if len(transaction_ids) > settings.INVOICE_BATCH_MAX_IDS:
+            logging.error("Too many transactions selected in transaction invoices export service with user %s", request.user.username)
+            return Response({
+                "error": f"The selection has more than {settings.INVOICE_BATCH_MAX_IDS} transactions",
+            }, status=status.HTTP_400_BAD_REQUEST)
+        response = streaming_response(request, self.invoice_service.stream_invoice_zip(transaction_ids),
+                                      content_type="application/zip")
+        response['Content-Disposition'] = 'attachment; filename="facturas.zip"'
+        logging.info("Transaction invoices export service called successfully with user %s", request.user.username)
+        return response
+
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
\ No newline at end of file